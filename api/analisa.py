@@ -6,6 +6,16 @@ Handles manual analysis and case management
 from flask import jsonify, request
 from datetime import datetime
 
+from core.writer import run_write
+from core.versioning import touch_nomen
+
+
+def _touch_analisa(conn, analisa_id):
+    """Tandai nomen kasus ini berubah (cache profil pelanggan)"""
+    row = conn.execute('SELECT nomen FROM analisa_manual WHERE id = ?', (analisa_id,)).fetchone()
+    if row is not None:
+        touch_nomen(conn, row[0])
+
 def register_analisa_routes(app, get_db):
     """Register analisa manual routes"""
     
@@ -71,26 +81,27 @@ def register_analisa_routes(app, get_db):
             if not nomen or not jenis_anomali:
                 return jsonify({'error': 'Missing required fields'}), 400
             
-            db = get_db()
-            cursor = db.cursor()
-            
             now = datetime.now().isoformat()
             
-            cursor.execute('''
-                INSERT INTO analisa_manual 
-                (nomen, jenis_anomali, deskripsi, status, priority, assigned_to, due_date, created_at, updated_at)
-                VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?)
-            ''', (nomen, jenis_anomali, deskripsi, priority, assigned_to, due_date, now, now))
-            
-            analisa_id = cursor.lastrowid
-            
-            # Add activity log
-            cursor.execute('''
-                INSERT INTO analisa_activity (analisa_id, action, user, icon, created_at)
-                VALUES (?, 'created', ?, 'plus-circle', ?)
-            ''', (analisa_id, assigned_to or 'system', now))
-            
-            db.commit()
+            def _create(conn):
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO analisa_manual 
+                    (nomen, jenis_anomali, deskripsi, status, priority, assigned_to, due_date, created_at, updated_at)
+                    VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?)
+                ''', (nomen, jenis_anomali, deskripsi, priority, assigned_to, due_date, now, now))
+                
+                analisa_id = cursor.lastrowid
+                
+                # Add activity log
+                cursor.execute('''
+                    INSERT INTO analisa_activity (analisa_id, action, "user", icon, created_at)
+                    VALUES (?, 'created', ?, 'plus-circle', ?)
+                ''', (analisa_id, assigned_to or 'system', now))
+                touch_nomen(conn, nomen)
+                return analisa_id
+            
+            analisa_id = run_write(_create)
             
             return jsonify({
                 'success': True,
@@ -112,9 +123,6 @@ def register_analisa_routes(app, get_db):
             assigned_to = data.get('assigned_to')
             due_date = data.get('due_date')
             
-            db = get_db()
-            cursor = db.cursor()
-            
             updates = []
             params = []
             
@@ -144,16 +152,19 @@ def register_analisa_routes(app, get_db):
             params.append(analisa_id)
             
             query = f"UPDATE analisa_manual SET {', '.join(updates)} WHERE id = ?"
-            cursor.execute(query, params)
-            
-            # Add activity log
             action = f"updated: {', '.join(data.keys())}"
-            cursor.execute('''
-                INSERT INTO analisa_activity (analisa_id, action, user, icon, created_at)
-                VALUES (?, ?, ?, 'edit', ?)
-            ''', (analisa_id, action, data.get('user', 'system'), now))
             
-            db.commit()
+            def _update(conn):
+                conn.execute(query, params)
+                
+                # Add activity log
+                conn.execute('''
+                    INSERT INTO analisa_activity (analisa_id, action, "user", icon, created_at)
+                    VALUES (?, ?, ?, 'edit', ?)
+                ''', (analisa_id, action, data.get('user', 'system'), now))
+                _touch_analisa(conn, analisa_id)
+            
+            run_write(_update)
             
             return jsonify({
                 'success': True,
@@ -204,23 +215,22 @@ def register_analisa_routes(app, get_db):
             if not user or not comment:
                 return jsonify({'error': 'Missing user or comment'}), 400
             
-            db = get_db()
-            cursor = db.cursor()
-            
             now = datetime.now().isoformat()
             
-            cursor.execute('''
-                INSERT INTO analisa_comments (analisa_id, user, comment, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (analisa_id, user, comment, now))
-            
-            # Add activity log
-            cursor.execute('''
-                INSERT INTO analisa_activity (analisa_id, action, user, icon, created_at)
-                VALUES (?, 'commented', ?, 'message-circle', ?)
-            ''', (analisa_id, user, now))
-            
-            db.commit()
+            def _comment(conn):
+                conn.execute('''
+                    INSERT INTO analisa_comments (analisa_id, "user", comment, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (analisa_id, user, comment, now))
+                
+                # Add activity log
+                conn.execute('''
+                    INSERT INTO analisa_activity (analisa_id, action, "user", icon, created_at)
+                    VALUES (?, 'commented', ?, 'message-circle', ?)
+                ''', (analisa_id, user, now))
+                _touch_analisa(conn, analisa_id)
+            
+            run_write(_comment)
             
             return jsonify({
                 'success': True,
@@ -5,6 +5,7 @@ Handles SBRS data anomaly analysis and summary
 
 from flask import jsonify, request
 import traceback
+from core.queries import fetch_one, fetch_all
 
 def register_anomaly_routes(app, get_db):
     """Register all anomaly detection routes"""
@@ -16,14 +17,7 @@ def register_anomaly_routes(app, get_db):
         
         try:
             # Ambil periode terakhir dari SBRS
-            periode_query = """
-                SELECT periode_bulan, periode_tahun 
-                FROM sbrs_data 
-                WHERE periode_bulan IS NOT NULL AND periode_tahun IS NOT NULL
-                ORDER BY periode_tahun DESC, periode_bulan DESC 
-                LIMIT 1
-            """
-            periode_row = db.execute(periode_query).fetchone()
+            periode_row = fetch_one(db, 'latest_periode_sbrs')
             
             if not periode_row:
                 return jsonify({
@@ -43,18 +37,7 @@ def register_anomaly_routes(app, get_db):
             anomalies = {}
             
             # 1. PEMAKAIAN EXTREME (>100 m3 atau >3x avg)
-            extreme_query = """
-                SELECT COUNT(DISTINCT nomen) as count,
-                       SUM(volume) as total_kubikasi,
-                       AVG(volume) as avg_kubikasi
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND (volume > 100 OR volume > (
-                    SELECT AVG(volume) * 3 FROM sbrs_data 
-                    WHERE periode_bulan = ? AND periode_tahun = ?
-                ))
-            """
-            extreme = db.execute(extreme_query, (periode_bulan, periode_tahun, periode_bulan, periode_tahun)).fetchone()
+            extreme = fetch_one(db, 'anomaly_extreme', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
             anomalies['extreme'] = {
                 'count': extreme[0] or 0,
                 'total_kubikasi': extreme[1] or 0,
@@ -62,53 +45,22 @@ def register_anomaly_routes(app, get_db):
             }
             
             # 2. PEMAKAIAN TURUN (turun >50% dari periode sebelumnya)
-            turun_query = """
-                SELECT COUNT(*) as count
-                FROM sbrs_data s1
-                LEFT JOIN sbrs_data s2 ON s1.nomen = s2.nomen 
-                WHERE s1.periode_bulan = ? AND s1.periode_tahun = ?
-                AND (
-                    (s1.periode_bulan = 1 AND s2.periode_bulan = 12 AND s2.periode_tahun = s1.periode_tahun - 1)
-                    OR (s1.periode_bulan > 1 AND s2.periode_bulan = s1.periode_bulan - 1 AND s2.periode_tahun = s1.periode_tahun)
-                )
-                AND s2.volume > 0
-                AND s1.volume < (s2.volume * 0.5)
-            """
-            turun = db.execute(turun_query, (periode_bulan, periode_tahun)).fetchone()
+            turun = fetch_one(db, 'anomaly_turun', (periode_bulan, periode_tahun))
             anomalies['turun'] = {'count': turun[0] or 0}
             
             # 3. ZERO USAGE (volume = 0)
-            zero_query = """
-                SELECT COUNT(DISTINCT nomen) as count
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND volume = 0
-            """
-            zero = db.execute(zero_query, (periode_bulan, periode_tahun)).fetchone()
+            zero = fetch_one(db, 'anomaly_zero', (periode_bulan, periode_tahun))
             anomalies['zero'] = {'count': zero[0] or 0}
             
             # 4. STAND NEGATIF (volume < 0)
-            negatif_query = """
-                SELECT COUNT(DISTINCT nomen) as count,
-                       SUM(volume) as total_negatif
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND volume < 0
-            """
-            negatif = db.execute(negatif_query, (periode_bulan, periode_tahun)).fetchone()
+            negatif = fetch_one(db, 'anomaly_negatif', (periode_bulan, periode_tahun))
             anomalies['negatif'] = {
                 'count': negatif[0] or 0,
                 'total': negatif[1] or 0
             }
             
             # 5. SALAH CATAT (stand_akhir < stand_awal)
-            salah_query = """
-                SELECT COUNT(DISTINCT nomen) as count
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND stand_akhir < stand_awal
-            """
-            salah = db.execute(salah_query, (periode_bulan, periode_tahun)).fetchone()
+            salah = fetch_one(db, 'anomaly_salah_catat', (periode_bulan, periode_tahun))
             anomalies['salah_catat'] = {'count': salah[0] or 0}
             
             return jsonify({
@@ -127,26 +79,16 @@ def register_anomaly_routes(app, get_db):
         """Detail data untuk jenis anomali tertentu"""
         db = get_db()
         try:
-            periode_query = "SELECT periode_bulan, periode_tahun FROM sbrs_data ORDER BY periode_tahun DESC, periode_bulan DESC LIMIT 1"
-            periode_row = db.execute(periode_query).fetchone()
+            periode_row = fetch_one(db, 'latest_periode_sbrs')
             if not periode_row: 
                 return jsonify({'data': []})
             
             p_bulan, p_tahun = periode_row[0], periode_row[1]
             
-            if anomaly_type == 'zero':
-                query = "SELECT nomen, nama, alamat, volume FROM sbrs_data WHERE periode_bulan=? AND periode_tahun=? AND volume=0 LIMIT 100"
-            elif anomaly_type == 'negatif':
-                query = "SELECT nomen, nama, alamat, volume FROM sbrs_data WHERE periode_bulan=? AND periode_tahun=? AND volume < 0 LIMIT 100"
-            elif anomaly_type == 'extreme':
-                query = """
-                    SELECT nomen, nama, alamat, volume FROM sbrs_data 
-                    WHERE periode_bulan=? AND periode_tahun=? AND volume > 100 LIMIT 100
-                """
-            else:
+            if anomaly_type not in ('zero', 'negatif', 'extreme'):
                 return jsonify({'error': 'Jenis anomali tidak dikenal'}), 400
                 
-            rows = db.execute(query, (p_bulan, p_tahun)).fetchall()
+            rows = fetch_all(db, f'anomaly_detail_{anomaly_type}', (p_bulan, p_tahun))
             return jsonify({'data': [dict(row) for row in rows]})
             
         except Exception as e:
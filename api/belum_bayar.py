@@ -4,6 +4,8 @@ Handles unpaid customers data
 """
 
 from flask import jsonify, request
+from core.paidset import unpaid_rows
+from core.summary import get_kpi_summary, rollup_cube
 
 def register_belum_bayar_routes(app, get_db):
     """Register belum bayar routes"""
@@ -19,28 +21,9 @@ def register_belum_bayar_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
-            
-            # Get all customers from master_pelanggan
-            cursor.execute('''
-                SELECT 
-                    m.nomen,
-                    m.nama,
-                    m.alamat,
-                    m.rayon,
-                    m.target_mc as tagihan,
-                    m.tarif
-                FROM master_pelanggan m
-                WHERE m.periode_bulan = ? AND m.periode_tahun = ?
-                AND m.nomen NOT IN (
-                    SELECT DISTINCT nomen 
-                    FROM collection_harian 
-                    WHERE periode_bulan = ? AND periode_tahun = ?
-                )
-                ORDER BY m.rayon, m.nomen
-            ''', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
-            
-            rows = cursor.fetchall()
+            
+            # MC periode ini dikurangi paid set (tanpa anti-join ke collection)
+            rows = unpaid_rows(db, periode_bulan, periode_tahun)
             
             data = []
             for row in rows:
@@ -72,32 +55,15 @@ def register_belum_bayar_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
             
-            # Total customers
-            cursor.execute('''
-                SELECT COUNT(*) as total
-                FROM master_pelanggan
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            ''', (periode_bulan, periode_tahun))
+            summary = get_kpi_summary(db, periode_bulan, periode_tahun)
             
-            total_customers = cursor.fetchone()['total']
+            # Total customers
+            total_customers = summary['total_pelanggan']
             
             # Unpaid customers
-            cursor.execute('''
-                SELECT COUNT(*) as unpaid, SUM(target_mc) as unpaid_amount
-                FROM master_pelanggan m
-                WHERE m.periode_bulan = ? AND m.periode_tahun = ?
-                AND m.nomen NOT IN (
-                    SELECT DISTINCT nomen 
-                    FROM collection_harian 
-                    WHERE periode_bulan = ? AND periode_tahun = ?
-                )
-            ''', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
-            
-            unpaid_row = cursor.fetchone()
-            unpaid_count = unpaid_row['unpaid'] or 0
-            unpaid_amount = unpaid_row['unpaid_amount'] or 0
+            unpaid_count = summary['belum_bayar']
+            unpaid_amount = summary['unpaid_amount']
             
             # Calculate percentage
             unpaid_percentage = (unpaid_count / total_customers * 100) if total_customers > 0 else 0
@@ -127,32 +93,17 @@ def register_belum_bayar_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    m.rayon,
-                    COUNT(*) as count,
-                    SUM(m.target_mc) as total_amount
-                FROM master_pelanggan m
-                WHERE m.periode_bulan = ? AND m.periode_tahun = ?
-                AND m.nomen NOT IN (
-                    SELECT DISTINCT nomen 
-                    FROM collection_harian 
-                    WHERE periode_bulan = ? AND periode_tahun = ?
-                )
-                GROUP BY m.rayon
-                ORDER BY count DESC
-            ''', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
-            
-            rows = cursor.fetchall()
+            
+            rows = rollup_cube(db, 'cube_rayon', periode_bulan, periode_tahun)
             
             data = []
-            for row in rows:
+            for row in sorted(rows, key=lambda r: r['pelanggan_tidak_bayar'], reverse=True):
+                if row['pelanggan_tidak_bayar'] == 0:
+                    continue
                 data.append({
                     'rayon': row['rayon'],
-                    'count': row['count'],
-                    'total_amount': row['total_amount']
+                    'count': row['pelanggan_tidak_bayar'],
+                    'total_amount': row['unpaid_amount']
                 })
             
             return jsonify(data)
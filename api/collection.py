@@ -4,14 +4,32 @@ Handles collection analytics and reporting
 """
 
 from flask import jsonify, request
+from core.queries import fetch_all
+from core.analytics import fetch_analytics
+from core.summary import get_collection_daily, previous_periode, rollup_cube
 from datetime import datetime
 
 def register_collection_routes(app, get_db):
     """Register collection routes"""
     
+    def _daily_point(row):
+        return {
+            'date': row['tgl_bayar'],
+            'day': row['hari'],
+            'transactions': row['pelanggan_bayar'],
+            'current': row['current'],
+            'tunggakan': row['tunggakan'],
+            'total': row['total'],
+            'cum_current': row['cum_current'],
+            'cum_tunggakan': row['cum_tunggakan'],
+            'cum_total': row['cum_total'],
+            'cum_pelanggan': row['cum_pelanggan_bayar'],
+            'cum_percentage': round(row['cum_pct_target'], 2)
+        }
+    
     @app.route('/api/collection/daily')
     def collection_daily():
-        """Get daily collection data"""
+        """Get daily collection data (harian + kumulatif dari tabel collection_daily)"""
         try:
             periode_bulan = request.args.get('bulan', type=int)
             periode_tahun = request.args.get('tahun', type=int)
@@ -20,34 +38,60 @@ def register_collection_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    tgl_bayar,
-                    COUNT(DISTINCT nomen) as jumlah_transaksi,
-                    SUM(CASE WHEN tipe_bayar = 'current' THEN jumlah_bayar ELSE 0 END) as current,
-                    SUM(CASE WHEN tipe_bayar = 'tunggakan' THEN jumlah_bayar ELSE 0 END) as tunggakan,
-                    SUM(jumlah_bayar) as total
-                FROM collection_harian
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                GROUP BY tgl_bayar
-                ORDER BY tgl_bayar
-            ''', (periode_bulan, periode_tahun))
-            
-            rows = cursor.fetchall()
             
-            data = []
-            for row in rows:
-                data.append({
-                    'date': row['tgl_bayar'],
-                    'transactions': row['jumlah_transaksi'],
-                    'current': row['current'],
-                    'tunggakan': row['tunggakan'],
-                    'total': row['total']
-                })
+            rows = get_collection_daily(db, periode_bulan, periode_tahun)
             
-            return jsonify(data)
+            return jsonify([_daily_point(row) for row in rows])
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/collection/daily/compare')
+    def collection_daily_compare():
+        """
+        Overlay kumulatif harian beberapa periode (default: bulan ini vs bulan lalu)
+        
+        Query params:
+        - bulan, tahun (required)
+        - periodes: jumlah periode ke belakang, termasuk periode ini (default 2, max 12)
+        """
+        try:
+            periode_bulan = request.args.get('bulan', type=int)
+            periode_tahun = request.args.get('tahun', type=int)
+            count = min(max(request.args.get('periodes', 2, type=int), 1), 12)
+            
+            if not periode_bulan or not periode_tahun:
+                return jsonify({'error': 'Missing bulan or tahun'}), 400
+            
+            db = get_db()
+            
+            series = []
+            bulan, tahun = periode_bulan, periode_tahun
+            for _ in range(count):
+                rows = get_collection_daily(db, bulan, tahun)
+                series.append({
+                    'bulan': bulan,
+                    'tahun': tahun,
+                    'label': f"{bulan:02d}/{tahun}",
+                    'target': rows[0]['target'] if rows else 0,
+                    'data': [_daily_point(row) for row in rows]
+                })
+                bulan, tahun = previous_periode(bulan, tahun)
+            
+            # Baris per hari (1..31): kumulatif tiap periode, carry-forward di hari tanpa transaksi
+            days = []
+            last = [{'cum_total': 0, 'cum_percentage': 0} for _ in series]
+            points = [{p['day']: p for p in s['data']} for s in series]
+            for day in range(1, 32):
+                values = []
+                for i, by_day in enumerate(points):
+                    if day in by_day:
+                        last[i] = by_day[day]
+                    values.append({'cum_total': last[i]['cum_total'],
+                                   'cum_percentage': last[i]['cum_percentage']})
+                days.append({'day': day, 'values': values})
+            
+            return jsonify({'series': series, 'days': days})
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -63,33 +107,20 @@ def register_collection_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    m.rayon,
-                    COUNT(DISTINCT c.nomen) as jumlah_pelanggan,
-                    SUM(c.jumlah_bayar) as total_collection,
-                    SUM(m.target_mc) as total_target,
-                    ROUND(SUM(c.jumlah_bayar) * 100.0 / NULLIF(SUM(m.target_mc), 0), 2) as percentage
-                FROM collection_harian c
-                JOIN master_pelanggan m ON c.nomen = m.nomen
-                WHERE c.periode_bulan = ? AND c.periode_tahun = ?
-                AND m.periode_bulan = ? AND m.periode_tahun = ?
-                GROUP BY m.rayon
-                ORDER BY m.rayon
-            ''', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
-            
-            rows = cursor.fetchall()
+            
+            rows = rollup_cube(db, 'cube_rayon', periode_bulan, periode_tahun)
             
             data = []
             for row in rows:
+                if not row['pelanggan_bayar']:
+                    continue
+                target = row['total_target']
                 data.append({
                     'rayon': row['rayon'],
-                    'pelanggan': row['jumlah_pelanggan'],
-                    'collection': row['total_collection'],
-                    'target': row['total_target'],
-                    'percentage': row['percentage'] or 0
+                    'pelanggan': row['pelanggan_bayar'],
+                    'collection': row['total_realisasi'],
+                    'target': target,
+                    'percentage': round(row['total_realisasi'] * 100.0 / target, 2) if target else 0
                 })
             
             return jsonify(data)
@@ -109,24 +140,8 @@ def register_collection_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    c.nomen,
-                    m.nama,
-                    m.rayon,
-                    SUM(c.jumlah_bayar) as total_bayar,
-                    COUNT(*) as jumlah_transaksi
-                FROM collection_harian c
-                JOIN master_pelanggan m ON c.nomen = m.nomen
-                WHERE c.periode_bulan = ? AND c.periode_tahun = ?
-                GROUP BY c.nomen, m.nama, m.rayon
-                ORDER BY total_bayar DESC
-                LIMIT ?
-            ''', (periode_bulan, periode_tahun, limit))
-            
-            rows = cursor.fetchall()
+            
+            rows = fetch_analytics(db, 'collection_top_payers', (periode_bulan, periode_tahun, limit))
             
             data = []
             for row in rows:
@@ -0,0 +1,190 @@
+"""
+Customer API Endpoints
+Pencarian pelanggan (FTS5, core/search.py), profil per nomen
+(core/profile.py), series sparkline (core/series.py) dan per-nomen
+history (payments, MC, SBRS, ardebt)
+
+Tabel live hanya menyimpan hot window; jika parameter `dari` (YYYY-MM,
+atau 'all') meminta periode yang lebih lama, baris dari arsip Parquet
+(core.archive) digabung dengan hasil tabel live.
+"""
+
+from flask import jsonify, request
+from core.queries import fetch_all, fetch_one
+from core.archive import hot_window_start, needs_archive, periode_key, read_archive
+from core.profile import get_customer_profile
+from core.search import search_customers
+from core.series import SERIES_DEFAULT_PERIODES, get_customer_series
+
+PAYMENT_COLUMNS = ['tgl_bayar', 'jumlah_bayar', 'tipe_bayar', 'bill_period', 'sumber_file',
+                   'periode_bulan', 'periode_tahun']
+SBRS_COLUMNS = ['periode_bulan', 'periode_tahun', 'readmethod', 'skip_status', 'trouble_status',
+                'volume', 'analisa_tindak_lanjut']
+ARDEBT_COLUMNS = ['periode_bulan', 'periode_tahun', 'saldo_tunggakan', 'umur_piutang']
+
+
+def parse_dari(value):
+    """
+    'YYYY-MM' → (tahun, bulan), 'all' → None (semua periode),
+    kosong → awal hot window (hanya tabel live)
+    """
+    if not value:
+        return hot_window_start()
+    if value == 'all':
+        return None
+    tahun, bulan = value.split('-')
+    if not 1 <= int(bulan) <= 12:
+        raise ValueError(f'Invalid bulan: {value}')
+    return int(tahun), int(bulan)
+
+
+def _with_archive(db, query_name, table, columns, nomen, dari):
+    """Rows tabel live + rows arsip (jika `dari` menyentuh periode arsip)"""
+    since_key = periode_key(*dari) if dari else 0
+    rows = [dict(row) for row in fetch_all(db, query_name, (nomen, since_key))]
+    if needs_archive(table, dari):
+        rows.extend(read_archive(table, nomen, columns=columns, since=dari, db=db))
+    return rows
+
+
+def _periode_of(row):
+    return row['periode_tahun'], row['periode_bulan']
+
+
+def register_customer_routes(app, get_db):
+    """Register customer routes"""
+
+    @app.route('/api/customer/search')
+    def search_customer():
+        """
+        Cari pelanggan (nomen / nama / alamat), urut relevansi
+
+        Query params:
+        - q: teks bebas; setiap kata dicocokkan sebagai awalan (wajib)
+        - periode_bulan, periode_tahun: int (optional, default periode MC terbaru)
+        - limit: int (default 20, maks 100)
+        """
+        text = (request.args.get('q') or request.args.get('nomen') or '').strip()
+        if not text:
+            return jsonify({'error': 'Parameter q required'}), 400
+
+        try:
+            db = get_db()
+            periode_bulan = request.args.get('periode_bulan', type=int)
+            periode_tahun = request.args.get('periode_tahun', type=int)
+            if not periode_bulan or not periode_tahun:
+                latest = fetch_one(db, 'latest_periode_mc')
+                if not latest:
+                    return jsonify({'error': 'No data available'}), 404
+                periode_bulan = latest['periode_bulan']
+                periode_tahun = latest['periode_tahun']
+
+            rows = search_customers(db, text, periode_bulan, periode_tahun,
+                                    request.args.get('limit', 20, type=int))
+            return jsonify({
+                'query': text,
+                'data': [dict(row) for row in rows],
+                'count': len(rows),
+                'periode': {
+                    'bulan': periode_bulan,
+                    'tahun': periode_tahun,
+                    'label': f"{periode_bulan:02d}/{periode_tahun}"
+                }
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/history_pembayaran')
+    def get_history_pembayaran():
+        """History pembayaran per nomen"""
+        nomen = request.args.get('nomen')
+        if not nomen:
+            return jsonify({'error': 'Parameter nomen required'}), 400
+
+        try:
+            dari = parse_dari(request.args.get('dari'))
+        except ValueError:
+            return jsonify({'error': 'Parameter dari must be YYYY-MM or all'}), 400
+
+        try:
+            db = get_db()
+            rows = _with_archive(db, 'customer_payment_history', 'collection_harian',
+                                 PAYMENT_COLUMNS, nomen, dari)
+            rows.sort(key=lambda r: r['tgl_bayar'] or '', reverse=True)
+
+            return jsonify(rows)
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/customer/<nomen>/profile')
+    def get_customer_profile_route(nomen):
+        """
+        Profil lengkap satu pelanggan: MC, SBRS, pembayaran, ardebt, mainbill
+        dan analisa (menggantikan profil_pelanggan / profil_lengkap /
+        history_multi_periode / history_pembayaran / history_kubikasi)
+
+        Query params:
+        - dari: YYYY-MM atau 'all' (default: awal hot window)
+        """
+        try:
+            dari = parse_dari(request.args.get('dari'))
+        except ValueError:
+            return jsonify({'error': 'Parameter dari must be YYYY-MM or all'}), 400
+
+        try:
+            profile = get_customer_profile(get_db(), nomen, dari)
+            if profile is None:
+                return jsonify({'error': 'Nomen not found'}), 404
+            return jsonify(profile)
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/customer/<nomen>/series')
+    def get_customer_series_route(nomen):
+        """
+        Series per periode untuk sparkline / trend: kubikasi, target_mc,
+        sbrs_volume, bayar, transaksi, saldo_tunggakan, umur_piutang
+        (array sejajar dengan `periodes`, urut naik)
+
+        Query params:
+        - last: jumlah periode terakhir (default 24, maks 120)
+        """
+        try:
+            series = get_customer_series(get_db(), nomen,
+                                         request.args.get('last', SERIES_DEFAULT_PERIODES, type=int))
+            if series is None:
+                return jsonify({'error': 'Nomen not found'}), 404
+            return jsonify(series)
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/customer/<nomen>/history')
+    def get_customer_history(nomen):
+        """History multi periode: MC, SBRS dan ardebt"""
+        try:
+            dari = parse_dari(request.args.get('dari'))
+        except ValueError:
+            return jsonify({'error': 'Parameter dari must be YYYY-MM or all'}), 400
+
+        try:
+            db = get_db()
+            sbrs = _with_archive(db, 'customer_sbrs_history', 'sbrs_data', SBRS_COLUMNS, nomen, dari)
+            ardebt = _with_archive(db, 'customer_ardebt_history', 'ardebt', ARDEBT_COLUMNS, nomen, dari)
+            sbrs.sort(key=_periode_of, reverse=True)
+            ardebt.sort(key=_periode_of, reverse=True)
+
+            return jsonify({
+                'nomen': nomen,
+                'mc_history': [dict(row) for row in fetch_all(db, 'customer_mc_history', (nomen,))],
+                'sbrs_history': sbrs,
+                'ardebt_history': ardebt
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    print("✅ Customer routes registered")
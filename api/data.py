@@ -6,6 +6,35 @@ CRITICAL: Semua query HARUS include periode_bulan dan periode_tahun!
 """
 
 from flask import jsonify, request
+from core.queries import fetch_one, fetch_all
+from core.pagination import CursorError, decode_cursor, encode_cursor
+from core.paidset import fetch_unpaid_details, get_periode_frame, parse_frame_filters
+from core.summary import get_home_stats
+
+
+def _resolve_page(db, key_length):
+    """
+    (bulan, tahun, key) dari query params. Cursor membawa periode dan sort
+    key baris terakhir halaman sebelumnya; tanpa cursor key = None dan
+    periode kosong = periode terbaru.
+    """
+    periode_bulan = request.args.get('periode_bulan', type=int)
+    periode_tahun = request.args.get('periode_tahun', type=int)
+    token = request.args.get('cursor')
+
+    if token:
+        tahun, bulan, key = decode_cursor(token, key_length)
+        if (periode_bulan and periode_bulan != bulan) or (periode_tahun and periode_tahun != tahun):
+            raise CursorError('Cursor does not match periode')
+        return bulan, tahun, key
+
+    if not periode_bulan or not periode_tahun:
+        result = fetch_one(db, 'latest_periode_mc')
+        if not result:
+            return None, None, None
+        periode_bulan = result['periode_bulan']
+        periode_tahun = result['periode_tahun']
+    return periode_bulan, periode_tahun, None
 
 
 def register_data_routes(app, get_db):
@@ -28,118 +57,18 @@ def register_data_routes(app, get_db):
         """
         try:
             db = get_db()
-            cursor = db.cursor()
             
-            # Get periode from query params
+            # Get periode from query params (kosong = periode terbaru)
             periode_bulan = request.args.get('periode_bulan', type=int)
             periode_tahun = request.args.get('periode_tahun', type=int)
             
-            # Auto-get latest periode if not specified
-            if not periode_bulan or not periode_tahun:
-                cursor.execute("""
-                    SELECT periode_bulan, periode_tahun
-                    FROM master_pelanggan
-                    ORDER BY periode_tahun DESC, periode_bulan DESC
-                    LIMIT 1
-                """)
-                result = cursor.fetchone()
-                if not result:
-                    return jsonify({'error': 'No data available'}), 404
-                periode_bulan = result['periode_bulan']
-                periode_tahun = result['periode_tahun']
-            
-            print(f"📊 Getting Home stats for periode {periode_bulan:02d}/{periode_tahun}")
-            
-            # 1. Total Pelanggan
-            cursor.execute("""
-                SELECT COUNT(*) as total
-                FROM master_pelanggan
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            """, (periode_bulan, periode_tahun))
-            total_pelanggan = cursor.fetchone()['total']
-            
-            # 2. Total Target
-            cursor.execute("""
-                SELECT SUM(target_mc) as total_target
-                FROM master_pelanggan
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            """, (periode_bulan, periode_tahun))
-            total_target = cursor.fetchone()['total_target'] or 0
-            
-            # 3. Total Collection (pembayaran)
-            cursor.execute("""
-                SELECT 
-                    SUM(jumlah_bayar) as total_bayar,
-                    COUNT(DISTINCT nomen) as unique_bayar
-                FROM collection_harian
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            """, (periode_bulan, periode_tahun))
-            collection_data = cursor.fetchone()
-            total_bayar = collection_data['total_bayar'] or 0
-            unique_bayar = collection_data['unique_bayar'] or 0
+            # Kartu + by_rayon dari ringkasan kpi_periode / kpi_periode_rayon (satu query)
+            result = get_home_stats(db, periode_bulan, periode_tahun)
+            if result is None:
+                return jsonify({'error': 'No data available'}), 404
             
-            # 4. Belum Bayar (MC yang tidak ada di Collection)
-            cursor.execute("""
-                SELECT COUNT(DISTINCT m.nomen) as belum_bayar
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND m.periode_bulan = c.periode_bulan 
-                    AND m.periode_tahun = c.periode_tahun
-                WHERE m.periode_bulan = ? 
-                  AND m.periode_tahun = ?
-                  AND c.nomen IS NULL
-            """, (periode_bulan, periode_tahun))
-            belum_bayar = cursor.fetchone()['belum_bayar']
-            
-            # 5. Total Tunggakan (dari Ardebt)
-            cursor.execute("""
-                SELECT SUM(saldo_tunggakan) as total_tunggakan
-                FROM ardebt
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            """, (periode_bulan, periode_tahun))
-            total_tunggakan = cursor.fetchone()['total_tunggakan'] or 0
-            
-            # 6. By Rayon
-            cursor.execute("""
-                SELECT 
-                    m.rayon,
-                    COUNT(m.nomen) as total,
-                    COUNT(c.nomen) as sudah_bayar,
-                    SUM(m.target_mc) as target,
-                    SUM(c.jumlah_bayar) as realisasi
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND m.periode_bulan = c.periode_bulan 
-                    AND m.periode_tahun = c.periode_tahun
-                WHERE m.periode_bulan = ? 
-                  AND m.periode_tahun = ?
-                GROUP BY m.rayon
-                ORDER BY m.rayon
-            """, (periode_bulan, periode_tahun))
-            by_rayon = [dict(row) for row in cursor.fetchall()]
-            
-            # Calculate percentages
-            pct_bayar = (unique_bayar / total_pelanggan * 100) if total_pelanggan > 0 else 0
-            pct_realisasi = (total_bayar / total_target * 100) if total_target > 0 else 0
-            
-            result = {
-                'periode': f"{periode_bulan:02d}/{periode_tahun}",
-                'periode_bulan': periode_bulan,
-                'periode_tahun': periode_tahun,
-                'total_pelanggan': total_pelanggan,
-                'sudah_bayar': unique_bayar,
-                'belum_bayar': belum_bayar,
-                'pct_bayar': round(pct_bayar, 2),
-                'total_target': float(total_target),
-                'total_realisasi': float(total_bayar),
-                'pct_realisasi': round(pct_realisasi, 2),
-                'total_tunggakan': float(total_tunggakan),
-                'by_rayon': by_rayon
-            }
-            
-            print(f"✅ Total: {total_pelanggan:,} | Bayar: {unique_bayar:,} | Belum: {belum_bayar:,}")
+            print(f"📊 Home stats {result['periode']} | Total: {result['total_pelanggan']:,} | "
+                  f"Bayar: {result['sudah_bayar']:,} | Belum: {result['belum_bayar']:,}")
             
             return jsonify(result)
             
@@ -166,77 +95,45 @@ def register_data_routes(app, get_db):
         - periode_bulan: int (optional)
         - periode_tahun: int (optional)
         - limit: int (default: 100)
-        - offset: int (default: 0)
+        - cursor: str (optional) - pagination.next_cursor dari halaman sebelumnya
+        - offset: int (default: 0) - mode lama, dipakai jika tanpa cursor
+        
+        Summary hanya dikirim di halaman tanpa cursor.
         """
         try:
             db = get_db()
-            cursor = db.cursor()
             
-            periode_bulan = request.args.get('periode_bulan', type=int)
-            periode_tahun = request.args.get('periode_tahun', type=int)
             limit = request.args.get('limit', 100, type=int)
             offset = request.args.get('offset', 0, type=int)
             
-            # Auto-get latest periode if not specified
-            if not periode_bulan or not periode_tahun:
-                cursor.execute("""
-                    SELECT periode_bulan, periode_tahun
-                    FROM master_pelanggan
-                    ORDER BY periode_tahun DESC, periode_bulan DESC
-                    LIMIT 1
-                """)
-                result = cursor.fetchone()
-                if not result:
-                    return jsonify({'error': 'No data available'}), 404
-                periode_bulan = result['periode_bulan']
-                periode_tahun = result['periode_tahun']
+            try:
+                periode_bulan, periode_tahun, key = _resolve_page(db, 3)
+            except CursorError as e:
+                return jsonify({'error': str(e)}), 400
+            if periode_bulan is None:
+                return jsonify({'error': 'No data available'}), 404
             
             print(f"📋 Getting Collection for periode {periode_bulan:02d}/{periode_tahun}")
             
             # Query: Collection dengan JOIN ke MC (include periode!)
-            cursor.execute("""
-                SELECT 
-                    c.nomen,
-                    m.nama,
-                    m.alamat,
-                    m.rayon,
-                    m.pc,
-                    m.ez,
-                    c.tgl_bayar,
-                    c.jumlah_bayar,
-                    c.volume_air,
-                    c.tipe_bayar,
-                    m.target_mc,
-                    c.periode_bulan,
-                    c.periode_tahun
-                FROM collection_harian c
-                LEFT JOIN master_pelanggan m 
-                    ON c.nomen = m.nomen 
-                    AND c.periode_bulan = m.periode_bulan 
-                    AND c.periode_tahun = m.periode_tahun
-                WHERE c.periode_bulan = ? 
-                  AND c.periode_tahun = ?
-                ORDER BY c.tgl_bayar DESC, c.jumlah_bayar DESC
-                LIMIT ? OFFSET ?
-            """, (periode_bulan, periode_tahun, limit, offset))
-            
-            data = [dict(row) for row in cursor.fetchall()]
-            
-            # Get summary
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_transaksi,
-                    COUNT(DISTINCT c.nomen) as unique_pelanggan,
-                    SUM(c.jumlah_bayar) as total_bayar,
-                    SUM(c.volume_air) as total_volume,
-                    COUNT(CASE WHEN c.tipe_bayar = 'current' THEN 1 END) as current_count,
-                    COUNT(CASE WHEN c.tipe_bayar = 'tunggakan' THEN 1 END) as tunggakan_count,
-                    AVG(c.jumlah_bayar) as avg_bayar
-                FROM collection_harian c
-                WHERE c.periode_bulan = ? AND c.periode_tahun = ?
-            """, (periode_bulan, periode_tahun))
-            
-            summary = dict(cursor.fetchone())
+            if key is None:
+                rows = fetch_all(db, 'collection_list', (periode_bulan, periode_tahun, limit, offset))
+            else:
+                rows = fetch_all(db, 'collection_list_after', (periode_bulan, periode_tahun, *key, limit))
+            data = [dict(row) for row in rows]
+            
+            next_cursor = None
+            if data and len(data) == limit:
+                last = data[-1]
+                next_cursor = encode_cursor(periode_tahun, periode_bulan,
+                                            (last['tgl_bayar'], last['jumlah_bayar'], last['id']))
+            for item in data:
+                item.pop('id')
+            
+            # Summary cukup sekali (halaman pertama), bukan setiap scroll
+            summary = None
+            if key is None:
+                summary = dict(fetch_one(db, 'collection_list_summary', (periode_bulan, periode_tahun)))
             
             print(f"✅ Found {len(data)} records")
             
@@ -245,8 +142,9 @@ def register_data_routes(app, get_db):
                 'summary': summary,
                 'pagination': {
                     'limit': limit,
-                    'offset': offset,
-                    'count': len(data)
+                    'offset': offset if key is None else None,
+                    'count': len(data),
+                    'next_cursor': next_cursor
                 },
                 'periode': {
                     'bulan': periode_bulan,
@@ -277,117 +175,54 @@ def register_data_routes(app, get_db):
         - periode_bulan: int (optional)
         - periode_tahun: int (optional)
         - limit: int (default: 100)
-        - offset: int (default: 0)
+        - cursor: str (optional) - pagination.next_cursor dari halaman sebelumnya
+        - offset: int (default: 0) - mode lama, dipakai jika tanpa cursor
+        
+        Filter (optional):
+        - rayon, pc, ez, tarif: str
+        - min_target: float (target_mc >= nilai)
+        - umur: bucket umur piutang (0, 1-3, 4-6, 7-12, 13+)
+        - has_saldo: 0/1 (ada saldo tunggakan ARDEBT)
+        - q: awalan nomen atau bagian nama
+        - sort: rayon (default), target_mc, saldo_tunggakan, umur_piutang;
+          prefix '-' untuk urutan menurun
+        
+        Summary dan by_rayon (setelah filter) hanya dikirim di halaman tanpa cursor.
         """
         try:
             db = get_db()
-            cursor = db.cursor()
             
-            periode_bulan = request.args.get('periode_bulan', type=int)
-            periode_tahun = request.args.get('periode_tahun', type=int)
             limit = request.args.get('limit', 100, type=int)
             offset = request.args.get('offset', 0, type=int)
             
-            # Auto-get latest periode if not specified
-            if not periode_bulan or not periode_tahun:
-                cursor.execute("""
-                    SELECT periode_bulan, periode_tahun
-                    FROM master_pelanggan
-                    ORDER BY periode_tahun DESC, periode_bulan DESC
-                    LIMIT 1
-                """)
-                result = cursor.fetchone()
-                if not result:
-                    return jsonify({'error': 'No data available'}), 404
-                periode_bulan = result['periode_bulan']
-                periode_tahun = result['periode_tahun']
+            try:
+                filters, sort = parse_frame_filters(request.args)
+                periode_bulan, periode_tahun, key = _resolve_page(db, 2 if sort == 'rayon' else 3)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if periode_bulan is None:
+                return jsonify({'error': 'No data available'}), 404
             
             print(f"📋 Getting Belum Bayar for periode {periode_bulan:02d}/{periode_tahun}")
             
-            # Query: MC yang TIDAK ADA di Collection (LEFT JOIN dengan NULL check)
-            cursor.execute("""
-                SELECT 
-                    m.nomen,
-                    m.nama,
-                    m.alamat,
-                    m.rayon,
-                    m.pc,
-                    m.ez,
-                    m.tarif,
-                    m.target_mc,
-                    m.kubikasi,
-                    a.saldo_tunggakan,
-                    a.umur_piutang,
-                    mb.tgl_bayar as tgl_bayar_mb,
-                    mb.jumlah_bayar as bayar_mb
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND m.periode_bulan = c.periode_bulan 
-                    AND m.periode_tahun = c.periode_tahun
-                LEFT JOIN ardebt a
-                    ON m.nomen = a.nomen
-                    AND m.periode_bulan = a.periode_bulan
-                    AND m.periode_tahun = a.periode_tahun
-                LEFT JOIN master_bayar mb
-                    ON m.nomen = mb.nomen
-                    AND m.periode_bulan = mb.periode_bulan
-                    AND m.periode_tahun = mb.periode_tahun
-                WHERE m.periode_bulan = ? 
-                  AND m.periode_tahun = ?
-                  AND c.nomen IS NULL
-                ORDER BY m.rayon, m.nomen
-                LIMIT ? OFFSET ?
-            """, (periode_bulan, periode_tahun, limit, offset))
-            
-            data = [dict(row) for row in cursor.fetchall()]
-            
-            # Get summary
-            cursor.execute("""
-                SELECT 
-                    COUNT(m.nomen) as total_belum_bayar,
-                    SUM(m.target_mc) as total_target,
-                    SUM(a.saldo_tunggakan) as total_tunggakan
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND m.periode_bulan = c.periode_bulan 
-                    AND m.periode_tahun = c.periode_tahun
-                LEFT JOIN ardebt a
-                    ON m.nomen = a.nomen
-                    AND m.periode_bulan = a.periode_bulan
-                    AND m.periode_tahun = a.periode_tahun
-                WHERE m.periode_bulan = ? 
-                  AND m.periode_tahun = ?
-                  AND c.nomen IS NULL
-            """, (periode_bulan, periode_tahun))
-            
-            summary_row = cursor.fetchone()
-            summary = {
-                'total_belum_bayar': summary_row['total_belum_bayar'],
-                'total_target': float(summary_row['total_target'] or 0),
-                'total_tunggakan': float(summary_row['total_tunggakan'] or 0)
-            }
-            
-            # By rayon
-            cursor.execute("""
-                SELECT 
-                    m.rayon,
-                    COUNT(m.nomen) as total,
-                    SUM(m.target_mc) as total_target
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND m.periode_bulan = c.periode_bulan 
-                    AND m.periode_tahun = c.periode_tahun
-                WHERE m.periode_bulan = ? 
-                  AND m.periode_tahun = ?
-                  AND c.nomen IS NULL
-                GROUP BY m.rayon
-                ORDER BY m.rayon
-            """, (periode_bulan, periode_tahun))
-            
-            by_rayon = [dict(row) for row in cursor.fetchall()]
+            # MC periode ini minus paid set: filter, sort, halaman, summary dan
+            # by-rayon dari satu frame (view per kombinasi filter di-cache)
+            view = get_periode_frame(db, periode_bulan, periode_tahun).view(filters, sort)
+            
+            ids, last_key = view.page(limit, key, offset)
+            data = fetch_unpaid_details(db, periode_bulan, periode_tahun, ids)
+            next_cursor = encode_cursor(periode_tahun, periode_bulan, last_key) if last_key else None
+            
+            summary = None
+            by_rayon = None
+            if key is None:
+                unpaid = view.summary()
+                summary = {
+                    'total_belum_bayar': unpaid['total_belum_bayar'],
+                    'total_target': unpaid['total_target'],
+                    'total_tunggakan': unpaid['total_tunggakan']
+                }
+                by_rayon = view.by_rayon()
             
             print(f"✅ Found {len(data)} belum bayar records")
             
@@ -395,10 +230,13 @@ def register_data_routes(app, get_db):
                 'data': data,
                 'summary': summary,
                 'by_rayon': by_rayon,
+                'filters': filters,
+                'sort': sort,
                 'pagination': {
                     'limit': limit,
-                    'offset': offset,
-                    'count': len(data)
+                    'offset': offset if key is None else None,
+                    'count': len(data),
+                    'next_cursor': next_cursor
                 },
                 'periode': {
                     'bulan': periode_bulan,
@@ -425,13 +263,6 @@ def register_data_routes(app, get_db):
         """Get all available periodes for dropdown"""
         try:
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute("""
-                SELECT DISTINCT periode_bulan, periode_tahun
-                FROM master_pelanggan
-                ORDER BY periode_tahun DESC, periode_bulan DESC
-            """)
             
             periodes = [
                 {
@@ -439,7 +270,7 @@ def register_data_routes(app, get_db):
                     'tahun': row['periode_tahun'],
                     'label': f"{row['periode_bulan']:02d}/{row['periode_tahun']}"
                 }
-                for row in cursor.fetchall()
+                for row in fetch_all(db, 'periode_list_mc')
             ]
             
             return jsonify({'periodes': periodes})
@@ -0,0 +1,122 @@
+"""
+Export API Endpoints
+Download list belum bayar / collection per periode (dan rayon) sebagai CSV atau XLSX
+
+Rows dibaca per batch dari cursor dan langsung ditulis ke response
+streaming (core.export), jadi export 300k baris tidak menaikkan RSS worker.
+
+Query params (sama dengan /api/belum-bayar dan /api/collection):
+- periode_bulan, periode_tahun: int (optional, default periode terbaru)
+- rayon: str (optional)
+- format: csv (default) | xlsx
+"""
+
+import numpy as np
+from flask import Response, jsonify, request, stream_with_context
+
+from core.export import FORMATS, export_chunks, export_filename
+from core.paidset import PAID_SET_DTYPE, is_paid, load_paid_set
+from core.queries import fetch_one, iter_rows
+
+BELUM_BAYAR_COLUMNS = ['nomen', 'nama', 'alamat', 'rayon', 'pc', 'ez', 'tarif',
+                       'target_mc', 'saldo_tunggakan', 'umur_piutang']
+COLLECTION_COLUMNS = ['nomen', 'nama', 'alamat', 'rayon', 'pc', 'ez', 'tgl_bayar',
+                      'jumlah_bayar', 'volume_air', 'tipe_bayar', 'target_mc']
+
+
+def _unpaid_batches(batches, paid):
+    """Buang pelanggan yang ada di paid set (kolom pertama = nomen_id)"""
+    for rows in batches:
+        ids = np.fromiter((row[0] or 0 for row in rows), dtype=PAID_SET_DTYPE, count=len(rows))
+        mask = is_paid(paid, ids)
+        unpaid = [tuple(row)[1:] for row, p in zip(rows, mask) if not p]
+        if unpaid:
+            yield unpaid
+
+
+def register_export_routes(app, get_db):
+    """Register export routes"""
+
+    def _export_params(db):
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in FORMATS:
+            return None, jsonify({'error': f'Invalid format: {fmt} (csv/xlsx)'}), 400
+
+        periode_bulan = request.args.get('periode_bulan', type=int)
+        periode_tahun = request.args.get('periode_tahun', type=int)
+        if not periode_bulan or not periode_tahun:
+            result = fetch_one(db, 'latest_periode_mc')
+            if not result:
+                return None, jsonify({'error': 'No data available'}), 404
+            periode_bulan = result['periode_bulan']
+            periode_tahun = result['periode_tahun']
+
+        rayon = request.args.get('rayon') or None
+        return (fmt, periode_bulan, periode_tahun, rayon), None, None
+
+    def _stream(fmt, prefix, bulan, tahun, rayon, columns, batches):
+        # Koneksi request sudah dilepas (teardown) sebelum body dikirim;
+        # batches() memanggil get_db() lagi di dalam stream_with_context
+        # dan koneksi itu ditutup saat stream selesai.
+        filename = export_filename(prefix, bulan, tahun, fmt, rayon)
+        print(f"📤 Export {filename}")
+        return Response(
+            stream_with_context(export_chunks(fmt, columns, batches, title=prefix)),
+            mimetype=FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    @app.route('/api/export/belum-bayar', methods=['GET'])
+    def export_belum_bayar():
+        """Export semua pelanggan belum bayar (urut rayon, nomen)"""
+        try:
+            db = get_db()
+            params, error, status = _export_params(db)
+            if error is not None:
+                return error, status
+            fmt, bulan, tahun, rayon = params
+
+            def batches():
+                stream_db = get_db()
+                paid = load_paid_set(stream_db, bulan, tahun)
+                yield from _unpaid_batches(
+                    iter_rows(stream_db, 'export_belum_bayar', (bulan, tahun, rayon, rayon),
+                              size=app.config.get('EXPORT_BATCH_ROWS', 2000)),
+                    paid
+                )
+
+            return _stream(fmt, 'belum_bayar', bulan, tahun, rayon, BELUM_BAYAR_COLUMNS, batches())
+
+        except Exception as e:
+            import traceback
+            print(f"❌ Error: {e}")
+            return jsonify({
+                'error': str(e),
+                'traceback': traceback.format_exc()
+            }), 500
+
+    @app.route('/api/export/collection', methods=['GET'])
+    def export_collection():
+        """Export semua transaksi collection (urut tgl_bayar terbaru)"""
+        try:
+            db = get_db()
+            params, error, status = _export_params(db)
+            if error is not None:
+                return error, status
+            fmt, bulan, tahun, rayon = params
+
+            def batches():
+                yield from iter_rows(get_db(), 'export_collection', (bulan, tahun, rayon, rayon),
+                                     size=app.config.get('EXPORT_BATCH_ROWS', 2000))
+
+            return _stream(fmt, 'collection', bulan, tahun, rayon, COLLECTION_COLUMNS, batches())
+
+        except Exception as e:
+            import traceback
+            print(f"❌ Error: {e}")
+            return jsonify({
+                'error': str(e),
+                'traceback': traceback.format_exc()
+            }), 500
+
+    print("✅ Export routes registered")
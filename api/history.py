@@ -4,6 +4,8 @@ Handles upload history and data tracking
 """
 
 from flask import jsonify, request
+from datetime import datetime, timedelta
+from core.queries import fetch_one, fetch_all
 
 def register_history_routes(app, get_db):
     """Register history routes"""
@@ -54,20 +56,9 @@ def register_history_routes(app, get_db):
         """Get upload statistics"""
         try:
             db = get_db()
-            cursor = db.cursor()
             
             # Total uploads by type
-            cursor.execute('''
-                SELECT 
-                    file_type,
-                    COUNT(*) as total_uploads,
-                    SUM(row_count) as total_rows,
-                    MAX(upload_date) as last_upload
-                FROM upload_metadata
-                GROUP BY file_type
-            ''')
-            
-            rows = cursor.fetchall()
+            rows = fetch_all(db, 'history_stats_by_type')
             
             by_type = {}
             for row in rows:
@@ -78,17 +69,8 @@ def register_history_routes(app, get_db):
                 }
             
             # Recent activity
-            cursor.execute('''
-                SELECT 
-                    DATE(upload_date) as date,
-                    COUNT(*) as uploads
-                FROM upload_metadata
-                WHERE upload_date >= date('now', '-30 days')
-                GROUP BY DATE(upload_date)
-                ORDER BY date DESC
-            ''')
-            
-            recent_rows = cursor.fetchall()
+            since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            recent_rows = fetch_all(db, 'history_recent_activity', (since,))
             recent_activity = []
             for row in recent_rows:
                 recent_activity.append({
@@ -97,15 +79,7 @@ def register_history_routes(app, get_db):
                 })
             
             # Success rate
-            cursor.execute('''
-                SELECT 
-                    status,
-                    COUNT(*) as count
-                FROM upload_metadata
-                GROUP BY status
-            ''')
-            
-            status_rows = cursor.fetchall()
+            status_rows = fetch_all(db, 'history_status_counts')
             status_stats = {}
             total = 0
             for row in status_rows:
@@ -130,18 +104,7 @@ def register_history_routes(app, get_db):
         """Get list of available periods"""
         try:
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT DISTINCT 
-                    periode_bulan,
-                    periode_tahun
-                FROM upload_metadata
-                WHERE status = 'success'
-                ORDER BY periode_tahun DESC, periode_bulan DESC
-            ''')
-            
-            rows = cursor.fetchall()
+            rows = fetch_all(db, 'history_periods')
             
             periods = []
             for row in rows:
@@ -161,14 +124,7 @@ def register_history_routes(app, get_db):
         """Get detailed info for specific upload"""
         try:
             db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM upload_metadata
-                WHERE id = ?
-            ''', (upload_id,))
-            
-            row = cursor.fetchone()
+            row = fetch_one(db, 'history_upload_detail', (upload_id,))
             
             if not row:
                 return jsonify({'error': 'Upload not found'}), 404
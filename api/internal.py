@@ -0,0 +1,168 @@
+"""
+Internal API Endpoints
+Operational stats for maintainers (query timing, etc)
+
+Semua /api/internal/* butuh header Authorization: Bearer <INTERNAL_API_TOKEN>.
+Tanpa INTERNAL_API_TOKEN di config endpoint ini nonaktif (404). Aksi yang
+mengubah state (reset stats, clear cache) hanya lewat POST.
+"""
+
+import hmac
+
+from flask import jsonify, request
+from core.queries import query_stats
+from core.analytics import engine, compare_stats
+from core import maintenance
+from core.writer import writer_status
+from core.cache import get_response_cache
+from core.profile import profile_cache_status
+
+def register_internal_routes(app, get_db):
+    """Register internal routes"""
+
+    @app.before_request
+    def _internal_auth():
+        if not request.path.startswith('/api/internal/'):
+            return None
+        expected = app.config.get('INTERNAL_API_TOKEN')
+        if not expected:
+            return jsonify({'error': 'Not found'}), 404
+        header = request.headers.get('Authorization', '')
+        token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode('utf-8'), str(expected).encode('utf-8')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return None
+
+    @app.route('/api/internal/query-stats')
+    def internal_query_stats():
+        """Per-query stats dari query registry"""
+        try:
+            stats = query_stats.snapshot()
+
+            return jsonify({
+                'queries': stats,
+                'total_calls': sum(s['calls'] for s in stats),
+                'total_ms': round(sum(s['total_ms'] for s in stats), 2)
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/internal/query-stats/reset', methods=['POST'])
+    def internal_query_stats_reset():
+        """Reset counter query registry"""
+        query_stats.reset()
+        return jsonify({'success': True})
+
+    @app.route('/api/internal/analytics')
+    def internal_analytics():
+        """Status analytics engine (DuckDB) dan hasil compare vs SQLite"""
+        try:
+            return jsonify({
+                'backend': app.config.get('ANALYTICS_BACKEND', 'sqlite'),
+                'compare': app.config.get('ANALYTICS_COMPARE', False),
+                'engine': engine.status(),
+                'compare_stats': compare_stats
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/internal/slow-queries')
+    def internal_slow_queries():
+        """
+        Slow queries terbaru (dengan EXPLAIN QUERY PLAN)
+
+        Query params:
+        - limit: default 50
+        - endpoint: filter per endpoint Flask
+        """
+        try:
+            limit = request.args.get('limit', 50, type=int)
+            endpoint = request.args.get('endpoint')
+            
+            db = get_db()
+            
+            query = 'SELECT * FROM slow_queries WHERE 1=1'
+            params = []
+            
+            if endpoint:
+                query += ' AND endpoint = ?'
+                params.append(endpoint)
+            
+            query += ' ORDER BY id DESC LIMIT ?'
+            params.append(limit)
+            
+            rows = db.execute(query, params).fetchall()
+            return jsonify([dict(row) for row in rows])
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/internal/maintenance')
+    def internal_maintenance():
+        """
+        Status scheduler maintenance + riwayat task terbaru
+
+        Query params:
+        - limit: default 50
+        - task: analyze / checkpoint / vacuum / vacuum_full
+        """
+        try:
+            limit = request.args.get('limit', 50, type=int)
+            task = request.args.get('task')
+            
+            db = get_db()
+            
+            query = 'SELECT * FROM maintenance_log WHERE 1=1'
+            params = []
+            
+            if task:
+                query += ' AND task = ?'
+                params.append(task)
+            
+            query += ' ORDER BY id DESC LIMIT ?'
+            params.append(limit)
+            
+            rows = db.execute(query, params).fetchall()
+            scheduler = maintenance.scheduler
+            
+            return jsonify({
+                'scheduler': scheduler.status() if scheduler else {'running': False},
+                'log': [dict(row) for row in rows]
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/internal/writer')
+    def internal_writer():
+        """Status write coordinator (antrian, jumlah batch, ukuran batch terbesar)"""
+        return jsonify(writer_status())
+
+    @app.route('/api/internal/cache')
+    def internal_cache():
+        """Status response cache (hit/miss, ukuran LRU & disk) + cache profil pelanggan"""
+        try:
+            cache = get_response_cache(app)
+            if cache is None:
+                return jsonify({'enabled': False, 'profile': profile_cache_status()})
+
+            return jsonify(dict(cache.status(), enabled=True, profile=profile_cache_status()))
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/internal/cache/clear', methods=['POST'])
+    def internal_cache_clear():
+        """Kosongkan response cache (memori + disk)"""
+        try:
+            cache = get_response_cache(app)
+            if cache is not None:
+                cache.clear()
+            return jsonify({'success': True, 'enabled': cache is not None})
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    print("✅ Internal routes registered")
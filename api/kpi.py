@@ -4,6 +4,19 @@ Handles KPI calculation and retrieval
 """
 
 from flask import jsonify, request
+from core.summary import get_kpi_summary, load_kpi_trend
+
+
+def _parse_periode(value):
+    """'YYYY-MM' → (tahun, bulan); None jika kosong"""
+    if not value:
+        return None
+    tahun, bulan = value.split('-')
+    tahun, bulan = int(tahun), int(bulan)
+    if not 1 <= bulan <= 12:
+        raise ValueError(value)
+    return tahun, bulan
+
 
 def register_kpi_routes(app, get_db):
     """Register KPI routes"""
@@ -19,29 +32,14 @@ def register_kpi_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
+            summary = get_kpi_summary(db, periode_bulan, periode_tahun)
             
             # Target MC
-            cursor.execute('''
-                SELECT COALESCE(SUM(target_mc), 0) as target_mc
-                FROM master_pelanggan
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            ''', (periode_bulan, periode_tahun))
-            
-            target_mc = cursor.fetchone()['target_mc']
+            target_mc = summary['target_mc']
             
             # Collection (current + tunggakan)
-            cursor.execute('''
-                SELECT 
-                    COALESCE(SUM(CASE WHEN tipe_bayar = 'current' THEN jumlah_bayar ELSE 0 END), 0) as collection_current,
-                    COALESCE(SUM(CASE WHEN tipe_bayar = 'tunggakan' THEN jumlah_bayar ELSE 0 END), 0) as collection_tunggakan
-                FROM collection_harian
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            ''', (periode_bulan, periode_tahun))
-            
-            row = cursor.fetchone()
-            collection_current = row['collection_current']
-            collection_tunggakan = row['collection_tunggakan']
+            collection_current = summary['collection_current']
+            collection_tunggakan = summary['collection_tunggakan']
             collection_total = collection_current + collection_tunggakan
             
             # Collection %
@@ -51,13 +49,7 @@ def register_kpi_routes(app, get_db):
             tunggakan_pct = (collection_tunggakan / collection_total * 100) if collection_total > 0 else 0
             
             # Jumlah pelanggan
-            cursor.execute('''
-                SELECT COUNT(DISTINCT nomen) as jumlah_pelanggan
-                FROM master_pelanggan
-                WHERE periode_bulan = ? AND periode_tahun = ?
-            ''', (periode_bulan, periode_tahun))
-            
-            jumlah_pelanggan = cursor.fetchone()['jumlah_pelanggan']
+            jumlah_pelanggan = summary['jumlah_pelanggan']
             
             # Average payment
             avg_payment = collection_total / jumlah_pelanggan if jumlah_pelanggan > 0 else 0
@@ -78,42 +70,23 @@ def register_kpi_routes(app, get_db):
     
     @app.route('/api/kpi/trend')
     def get_kpi_trend():
-        """Get KPI trend over time"""
+        """
+        Get KPI trend over time
+        
+        Query params (optional):
+        - last: N periode terakhir
+        - from / to: YYYY-MM (inklusif)
+        """
         try:
-            db = get_db()
-            cursor = db.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    periode_bulan,
-                    periode_tahun,
-                    SUM(target_mc) as target_mc,
-                    (SELECT COALESCE(SUM(jumlah_bayar), 0) 
-                     FROM collection_harian c 
-                     WHERE c.periode_bulan = m.periode_bulan 
-                     AND c.periode_tahun = m.periode_tahun
-                     AND c.tipe_bayar = 'current') as collection
-                FROM master_pelanggan m
-                GROUP BY periode_bulan, periode_tahun
-                ORDER BY periode_tahun, periode_bulan
-            ''')
-            
-            rows = cursor.fetchall()
+            last = request.args.get('last', type=int)
+            try:
+                start = _parse_periode(request.args.get('from'))
+                end = _parse_periode(request.args.get('to'))
+            except ValueError:
+                return jsonify({'error': 'from / to harus YYYY-MM'}), 400
             
-            trend = []
-            for row in rows:
-                target = row['target_mc']
-                collection = row['collection']
-                pct = (collection / target * 100) if target > 0 else 0
-                
-                trend.append({
-                    'periode': f"{row['periode_bulan']}/{row['periode_tahun']}",
-                    'target_mc': target,
-                    'collection': collection,
-                    'percentage': round(pct, 2)
-                })
-            
-            return jsonify(trend)
+            db = get_db()
+            return jsonify(load_kpi_trend(db, last=last, start=start, end=end))
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
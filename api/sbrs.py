@@ -4,6 +4,7 @@ Handles SBRS (Summary By Rayon Status) data
 """
 
 from flask import jsonify, request
+from core.summary import get_kpi_summary_rayon
 
 def register_sbrs_routes(app, get_db):
     """Register SBRS routes"""
@@ -19,31 +20,13 @@ def register_sbrs_routes(app, get_db):
                 return jsonify({'error': 'Missing bulan or tahun'}), 400
             
             db = get_db()
-            cursor = db.cursor()
             
-            # Get summary by rayon
-            cursor.execute("""
-                SELECT 
-                    m.rayon,
-                    COUNT(DISTINCT m.nomen) as total_pelanggan,
-                    COUNT(DISTINCT c.nomen) as sudah_bayar,
-                    SUM(m.target_mc) as total_tagihan,
-                    COALESCE(SUM(c.total), 0) as total_collection
-                FROM master_pelanggan m
-                LEFT JOIN collection_harian c 
-                    ON m.nomen = c.nomen 
-                    AND c.periode_bulan = m.periode_bulan 
-                    AND c.periode_tahun = m.periode_tahun
-                WHERE m.periode_bulan = ? AND m.periode_tahun = ?
-                GROUP BY m.rayon
-                ORDER BY m.rayon
-            """, (periode_bulan, periode_tahun))
-            
-            rows = cursor.fetchall()
+            # Get summary by rayon (ringkasan kpi_periode_rayon)
+            rows = get_kpi_summary_rayon(db, periode_bulan, periode_tahun)
             
             data = []
             for row in rows:
-                total_pelanggan = row['total_pelanggan']
+                total_pelanggan = row['jumlah_pelanggan']
                 sudah_bayar = row['sudah_bayar'] or 0
                 belum_bayar = total_pelanggan - sudah_bayar
                 
@@ -53,9 +36,9 @@ def register_sbrs_routes(app, get_db):
                     'sudah_bayar': sudah_bayar,
                     'belum_bayar': belum_bayar,
                     'persen_bayar': round((sudah_bayar / total_pelanggan * 100) if total_pelanggan > 0 else 0, 2),
-                    'total_tagihan': row['total_tagihan'] or 0,
-                    'total_collection': row['total_collection'] or 0,
-                    'achievement': round((row['total_collection'] / row['total_tagihan'] * 100) if row['total_tagihan'] > 0 else 0, 2)
+                    'total_tagihan': row['target_mc'] or 0,
+                    'total_collection': row['realisasi'] or 0,
+                    'achievement': round((row['realisasi'] / row['target_mc'] * 100) if row['target_mc'] > 0 else 0, 2)
                 })
             
             return jsonify(data)
@@ -13,6 +13,7 @@ File: api/upload.py
 """
 
 import os
+import uuid
 import pandas as pd
 from flask import jsonify, request, current_app
 from datetime import datetime
@@ -20,6 +21,26 @@ import re
 
 # Import auto-detect functions
 from processors.auto_detect import auto_detect_periode
+from core.database import refresh_snapshot_async, bulk_insert, map_nomen_ids
+from core.maintenance import schedule_analyze
+from core.writer import run_write
+from core.backup import backup_async
+from core.archive import ARCHIVE_TABLES, drop_archived_periodes
+from core.search import sync_customer_fts
+from core.series import refresh_customer_series
+from core.summary import KPI_FILE_TYPES, refresh_kpi_periode
+from core.versioning import bump_data_version, touch_periode_nomens
+from core.queries import fetch_one, fetch_all
+
+# Tabel tujuan per jenis file (untuk ANALYZE setelah upload)
+UPLOAD_TABLES = {
+    'mc': 'master_pelanggan',
+    'mb': 'master_bayar',
+    'collection': 'collection_harian',
+    'mainbill': 'mainbill',
+    'sbrs': 'sbrs_data',
+    'ardebt': 'ardebt',
+}
 
 
 # ========================================
@@ -242,14 +263,7 @@ def find_header_row(filepath):
 
 def validate_mc_exists(db, bulan, tahun):
     """Check if MC exists for the given periode"""
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT COUNT(*) as cnt 
-        FROM master_pelanggan 
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (bulan, tahun))
-    
-    result = cursor.fetchone()
+    result = fetch_one(db, 'mc_count_periode', (bulan, tahun))
     count = result['cnt'] if result else 0
     
     print(f"🔍 MC validation for {bulan:02d}/{tahun}: {count:,} records")
@@ -258,14 +272,7 @@ def validate_mc_exists(db, bulan, tahun):
 
 def get_available_periodes(db):
     """Get all available periodes from master_pelanggan"""
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT DISTINCT periode_bulan, periode_tahun
-        FROM master_pelanggan
-        ORDER BY periode_tahun DESC, periode_bulan DESC
-    """)
-    
-    periodes = cursor.fetchall()
+    periodes = fetch_all(db, 'periode_list_mc')
     return [f"{p['periode_bulan']:02d}/{p['periode_tahun']}" for p in periodes]
 
 
@@ -363,28 +370,28 @@ def register_upload_routes(app, get_db):
             # Process based on type
             print(f"\n🔄 Processing {file_type.upper()}...")
             
-            if file_type == 'mc':
-                rows = process_mc(df, bulan, tahun, db)
-                stats = get_mc_stats(db, bulan, tahun)
-            elif file_type == 'mb':
-                rows = process_mb(df, bulan, tahun, db)
-                stats = get_mb_stats(db, bulan, tahun)
-            elif file_type == 'collection':
-                rows = process_collection(df, bulan, tahun, db)
-                stats = get_collection_stats(db, bulan, tahun)
-            elif file_type == 'mainbill':
-                rows = process_mainbill(df, bulan, tahun, db)
-                stats = get_mainbill_stats(db, bulan, tahun)
-            elif file_type == 'sbrs':
-                rows = process_sbrs(df, bulan, tahun, db)
-                stats = get_sbrs_stats(db, bulan, tahun)
-            elif file_type == 'ardebt':
-                rows = process_ardebt(df, bulan, tahun, db)
-                stats = get_ardebt_stats(db, bulan, tahun)
-            else:
+            loaders = {
+                'mc': (prepare_mc, get_mc_stats),
+                'mb': (prepare_mb, get_mb_stats),
+                'collection': (prepare_collection, get_collection_stats),
+                'mainbill': (prepare_mainbill, get_mainbill_stats),
+                'sbrs': (prepare_sbrs, get_sbrs_stats),
+                'ardebt': (prepare_ardebt, get_ardebt_stats),
+            }
+            if file_type not in loaders:
                 return jsonify({'error': f'Unknown file type: {file_type}'}), 400
+            prepare, get_stats = loaders[file_type]
+            
+            # Parse & normalisasi di thread request; writer thread hanya menerima job pendek
+            frame = prepare(df, bulan, tahun, db)
+            rows = load_frame(frame, file_type, bulan, tahun)
+            stats = get_stats(db, bulan, tahun)
             
-            db.commit()
+            # Refresh snapshot read-only (background) supaya dashboard melihat data baru
+            app_obj = current_app._get_current_object()
+            refresh_snapshot_async(app_obj)
+            schedule_analyze([UPLOAD_TABLES[file_type]])
+            backup_async(app_obj)
             
             print(f"\n✅ UPLOAD COMPLETE: {rows:,} rows processed")
             print(f"{'='*70}\n")
@@ -425,15 +432,110 @@ def register_upload_routes(app, get_db):
 
 
 # ========================================
-# PROCESS FUNCTIONS
+# LOAD (WRITER JOBS)
 # ========================================
 
-def process_mc(df, month, year, db):
+def load_frame(frame, file_type, bulan, tahun):
     """
-    Process MC (Master Cetak) file
+    Tulis frame hasil prepare_*() ke tabel fakta lewat writer thread dalam
+    beberapa job pendek, bukan satu job selama seluruh upload:
+
+    1. stage: per UPLOAD_CHUNK_ROWS baris → map nomen_id + insert ke tabel TEMP
+    2. swap : satu transaksi → bump data_version, DELETE setiap periode yang
+              ditulis + INSERT ... SELECT dari stage, lalu refresh ringkasan
+              KPI, FTS dan customer_series per periode (ARDEBT: periode
+              PERIODE_BILL)
+    3. arsip: partisi arsip Parquet periode yang di-upload ulang di-drop
+
+    Pembaca tidak pernah melihat baris fakta baru dengan ringkasan lama, dan
+    refresh yang gagal ikut me-rollback swap (data lama tetap utuh).
+    Pelanggan di periode lama & baru ditandai (nomen_dict.data_version)
+    untuk cache profil. Return jumlah baris yang dimasukkan.
     """
-    cursor = db.cursor()
+    table = UPLOAD_TABLES[file_type]
+    chunk_rows = current_app.config.get('UPLOAD_CHUNK_ROWS', 50000)
+    stage = f"upload_stage_{uuid.uuid4().hex[:12]}"
+    columns = ['nomen', 'nomen_id'] + [c for c in frame.columns if c != 'nomen']
+    periodes = sorted({(bulan, tahun)} | {
+        (int(b), int(t)) for b, t in frame[['periode_bulan', 'periode_tahun']].drop_duplicates().itertuples(index=False)
+    }, key=lambda p: (p[1], p[0]))
+    source = f'upload:{table}:{tahun:04d}-{bulan:02d}'
+    
+    run_write(lambda conn: conn.execute(
+        f"CREATE TEMP TABLE {stage} AS SELECT {', '.join(columns)} FROM {table} LIMIT 0"
+    ))
+    try:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            run_write(lambda conn, chunk=chunk: _stage_chunk(conn, stage, columns, chunk))
+        inserted = run_write(lambda conn: _swap_stage(conn, stage, file_type, columns, periodes, source))
+    finally:
+        run_write(lambda conn: conn.execute(f'DROP TABLE IF EXISTS {stage}'))
+    
+    # Periode yang sudah diarsip lalu di-upload ulang: data live yang berlaku
+    if table in ARCHIVE_TABLES:
+        run_write(lambda conn: drop_archived_periodes(conn, table, [(t, b) for b, t in periodes]))
+    
+    print(f"✅ Inserted: {inserted:,} records ({len(periodes)} periode)")
+    return inserted
+
+
+def _stage_chunk(conn, stage, columns, chunk):
+    """Satu job: map nomen → nomen_id lalu insert chunk ke tabel stage"""
+    nomen_ids = map_nomen_ids(conn, chunk['nomen'])
+    rest = chunk.drop(columns='nomen')
+    values = rest.astype(object).where(rest.notna(), None).itertuples(index=False, name=None)
+    return bulk_insert(conn, stage, columns, (
+        (nomen, nomen_id, *row) for nomen, nomen_id, row in zip(chunk['nomen'], nomen_ids, values)
+    ))
+
+
+def _swap_stage(conn, stage, file_type, columns, periodes, source):
+    """
+    Satu job: ganti isi setiap periode yang ditulis (periode upload + periode
+    PERIODE_BILL ARDEBT) dengan isi stage, supaya upload ulang file yang sama
+    tidak menggandakan baris di periode lain, lalu refresh periode tersebut
+    """
+    table = UPLOAD_TABLES[file_type]
+    version = bump_data_version(conn, source)
+    deleted = 0
+    for periode_bulan, periode_tahun in periodes:
+        # Pelanggan yang hilang dari periode ini ikut ditandai sebelum DELETE
+        touch_periode_nomens(conn, version, table, periode_bulan, periode_tahun)
+        deleted += conn.execute(
+            f'DELETE FROM {table} WHERE periode_bulan = ? AND periode_tahun = ?', (periode_bulan, periode_tahun)
+        ).rowcount
+    print(f"🗑️  Deleted {deleted:,} existing records")
+    
+    # INSERT biasa (SQLite & PostgreSQL): unique key collection memuat bill_period
+    # yang selalu NULL saat upload, jadi INSERT OR REPLACE lama tidak pernah menimpa
+    cols = ', '.join(columns)
+    inserted = conn.execute(f'INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage}').rowcount
     
+    for periode_bulan, periode_tahun in periodes:
+        _refresh_periode(conn, file_type, periode_bulan, periode_tahun, version)
+    return inserted
+
+
+def _refresh_periode(conn, file_type, bulan, tahun, version):
+    """Ringkasan KPI, FTS, customer_series untuk satu periode yang ditulis"""
+    table = UPLOAD_TABLES[file_type]
+    if file_type in KPI_FILE_TYPES:
+        refresh_kpi_periode(conn, bulan, tahun)
+    if file_type == 'mc':
+        sync_customer_fts(conn, bulan, tahun)
+    refresh_customer_series(conn, file_type, bulan, tahun)
+    touch_periode_nomens(conn, version, table, bulan, tahun)
+
+
+# ========================================
+# PREPARE FUNCTIONS (PARSE & NORMALISASI, TANPA TULIS)
+# ========================================
+
+def prepare_mc(df, month, year, db):
+    """
+    Prepare MC (Master Cetak) file
+    """
     # COLUMN DETECTION
     df = quick_column_fix(df, 'mc')
     
@@ -484,35 +586,13 @@ def process_mc(df, month, year, db):
     print(f"{'='*70}")
     print(f"📊 Total records: {len(df):,}")
     
-    # Delete existing data for this periode
-    cursor.execute("""
-        DELETE FROM master_pelanggan 
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records")
-    
-    # Insert new data
-    inserted = 0
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO master_pelanggan 
-            (nomen, nama, alamat, rayon, tarif, target_mc, kubikasi, periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row['nomen'], row['nama'], row['alamat'], row['rayon'], 
-            row['tarif'], row['target_mc'], row['kubikasi'],
-            month, year
-        ))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
-    return inserted
+    return df[['nomen', 'nama', 'alamat', 'rayon', 'tarif', 'target_mc', 'kubikasi',
+               'periode_bulan', 'periode_tahun']]
 
 
-def process_mb(df, month, year, db):
+def prepare_mb(df, month, year, db):
     """
-    Process MB (Manual Bayar) file
+    Prepare MB (Manual Bayar) file
     FIXED: Removed volume_air column that doesn't exist in master_bayar table
     """
     cursor = db.cursor()
@@ -559,52 +639,26 @@ def process_mb(df, month, year, db):
     else:
         print(f"⚠️  WARNING: No MC data for {month:02d}/{year}")
     
-    # Delete existing MB data for this periode
+    # Check nomen exists in MC (satu query, bukan per baris)
     cursor.execute("""
-        DELETE FROM master_bayar
+        SELECT nomen FROM master_pelanggan
         WHERE periode_bulan = ? AND periode_tahun = ?
     """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records")
+    mc_nomens = {r['nomen'] for r in cursor.fetchall()}
+    linked = int(df['nomen'].isin(mc_nomens).sum())
+    unlinked = len(df) - linked
     
-    # Insert new data - FIXED: removed volume_air column
-    inserted = 0
-    linked = 0
-    unlinked = 0
-    
-    for _, row in df.iterrows():
-        # Check if nomen exists in MC
-        cursor.execute("""
-            SELECT 1 FROM master_pelanggan
-            WHERE nomen = ? AND periode_bulan = ? AND periode_tahun = ?
-        """, (row['nomen'], month, year))
-        
-        if cursor.fetchone():
-            linked += 1
-        else:
-            unlinked += 1
-        
-        cursor.execute("""
-            INSERT INTO master_bayar
-            (nomen, tgl_bayar, jumlah_bayar, periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            row['nomen'], row['tgl_bayar'], row['jumlah_bayar'],
-            month, year
-        ))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
     print(f"🔗 Linked to MC: {linked:,}")
     if unlinked > 0:
         print(f"⚠️  Unlinked: {unlinked:,}")
     
-    return inserted
+    # FIXED: removed volume_air column
+    return df[['nomen', 'tgl_bayar', 'jumlah_bayar', 'periode_bulan', 'periode_tahun']]
 
 
-def process_collection(df, month, year, db):
+def prepare_collection(df, month, year, db):
     """
-    Process Collection (Bayar Harian) file
+    Prepare Collection (Bayar Harian) file
     SPECIAL: jumlah_bayar diambil dari MC.target_mc (bukan dari file Collection)
     """
     cursor = db.cursor()
@@ -705,50 +759,22 @@ def process_collection(df, month, year, db):
     if unmatched > 0:
         print(f"⚠️  Unmatched (no MC): {unmatched:,}")
     
-    # Delete existing collection for this periode
-    cursor.execute("""
-        DELETE FROM collection_harian
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records")
-    
-    # Insert new data
-    inserted = 0
-    linked = 0
-    unlinked = 0
+    # Check if nomen exists in MC
+    linked = int(df['nomen'].isin(mc_lookup.keys()).sum())
+    unlinked = len(df) - linked
     
-    for idx, row in df.iterrows():
-        # Check if nomen exists in MC
-        if row['nomen'] in mc_lookup:
-            linked += 1
-        else:
-            unlinked += 1
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO collection_harian
-            (nomen, tgl_bayar, jumlah_bayar, volume_air, tipe_bayar, periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row['nomen'], row['tgl_bayar'], row['jumlah_bayar'],
-            row['volume_air'], row['tipe_bayar'], month, year
-        ))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
     print(f"🔗 Linked to MC: {linked:,}")
     if unlinked > 0:
         print(f"⚠️  Unlinked: {unlinked:,}")
     
-    return inserted
+    return df[['nomen', 'tgl_bayar', 'jumlah_bayar', 'volume_air', 'tipe_bayar',
+               'periode_bulan', 'periode_tahun']]
 
 
-def process_mainbill(df, month, year, db):
+def prepare_mainbill(df, month, year, db):
     """
-    Process Mainbill file
+    Prepare Mainbill file
     """
-    cursor = db.cursor()
-    
     # COLUMN DETECTION
     df = quick_column_fix(df, 'mainbill')
     
@@ -776,34 +802,13 @@ def process_mainbill(df, month, year, db):
     print(f"{'='*70}")
     print(f"📊 Total records: {len(df):,}")
     
-    # Delete existing
-    cursor.execute("""
-        DELETE FROM mainbill
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records")
-    
-    # Insert
-    inserted = 0
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO mainbill
-            (nomen, total_tagihan, tarif, periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?, ?)
-        """, (row['nomen'], row['total_tagihan'], row['tarif'], month, year))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
-    return inserted
+    return df[['nomen', 'total_tagihan', 'tarif', 'periode_bulan', 'periode_tahun']]
 
 
-def process_sbrs(df, month, year, db):
+def prepare_sbrs(df, month, year, db):
     """
-    Process SBRS file
+    Prepare SBRS file
     """
-    cursor = db.cursor()
-    
     # COLUMN DETECTION
     df = quick_column_fix(df, 'sbrs')
     
@@ -826,39 +831,18 @@ def process_sbrs(df, month, year, db):
     print(f"{'='*70}")
     print(f"📊 Total records: {len(df):,}")
     
-    # Delete existing
-    cursor.execute("""
-        DELETE FROM sbrs_data
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records")
-    
-    # Insert
-    inserted = 0
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO sbrs_data
-            (nomen, volume, periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?)
-        """, (row['nomen'], row['volume'], month, year))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
-    return inserted
+    return df[['nomen', 'volume', 'periode_bulan', 'periode_tahun']]
 
 
-def process_ardebt(df, month, year, db):
+def prepare_ardebt(df, month, year, db):
     """
-    Process ARDEBT (Tunggakan) file
+    Prepare ARDEBT (Tunggakan) file
     
     Special handling:
     - PCEZ split: "151/10" → pc=151, ez=10
-    - Multiple periodes per customer
-    - NO DELETE (keep historical data)
+    - Multiple periodes per customer (periode baris = PERIODE_BILL)
+    - DELETE hanya periode upload (keep historical data)
     """
-    cursor = db.cursor()
-    
     # COLUMN DETECTION
     df = quick_column_fix(df, 'ardebt')
     
@@ -904,7 +888,6 @@ def process_ardebt(df, month, year, db):
         df['bill_year'] = year
     
     # Calculate umur piutang (age)
-    from datetime import datetime
     current_date = datetime(year, month, 1)
     
     def calc_umur(row):
@@ -922,31 +905,10 @@ def process_ardebt(df, month, year, db):
     print(f"{'='*70}")
     print(f"📊 Total records: {len(df):,}")
     
-    # DELETE only for same periode_bill
-    cursor.execute("""
-        DELETE FROM ardebt
-        WHERE periode_bulan = ? AND periode_tahun = ?
-    """, (month, year))
-    deleted = cursor.rowcount
-    print(f"🗑️  Deleted {deleted:,} existing records for this periode")
-    
-    # Insert
-    inserted = 0
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO ardebt
-            (nomen, saldo_tunggakan, pc, ez, umur_piutang, 
-             periode_bulan, periode_tahun)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row['nomen'], row['saldo_tunggakan'],
-            row.get('pc'), row.get('ez'), row['umur_piutang'],
-            int(row['bill_month']), int(row['bill_year'])
-        ))
-        inserted += 1
-    
-    print(f"✅ Inserted: {inserted:,} records")
-    return inserted
+    # Baris masuk ke periode PERIODE_BILL, bukan hanya periode upload
+    df['periode_bulan'] = df['bill_month'].astype(int)
+    df['periode_tahun'] = df['bill_year'].astype(int)
+    return df[['nomen', 'saldo_tunggakan', 'pc', 'ez', 'umur_piutang', 'periode_bulan', 'periode_tahun']]
 
 
 # ========================================
@@ -11,11 +11,19 @@ from werkzeug.utils import secure_filename
 from config import get_config
 
 # Core imports
-from core.database import init_db, get_db, close_db
+from core.database import init_db, get_db, get_read_db, close_db, start_snapshot_refresher
 from core.helpers import register_helpers
+from core.analytics import init_analytics
+from core.archive import init_archive
+from core.summary import init_summary
+from core.maintenance import start_maintenance
+from core.backup import init_backup
+from core.cache import init_cache
+from core.http_cache import init_http_cache
 
 # API module imports
 from api.kpi import register_kpi_routes
+from api.data import register_data_routes
 from api.collection import register_collection_routes
 from api.anomaly import register_anomaly_routes
 from api.analisa import register_analisa_routes
@@ -24,6 +32,9 @@ from api.history import register_history_routes
 from api.sbrs import register_sbrs_routes
 from api.belum_bayar import register_belum_bayar_routes
 from api.pcez_performance import register_pcez_performance_routes
+from api.internal import register_internal_routes
+from api.customer import register_customer_routes
+from api.export import register_export_routes
 
 # Get configuration
 config_class = get_config()
@@ -41,16 +52,46 @@ app.teardown_appcontext(close_db)
 # Register template helpers (formatRupiah, etc)
 register_helpers(app)
 
+# Optional DuckDB analytics backend
+init_analytics(app)
+
+# Cold-periode archival CLI (flask archive-cold)
+init_archive(app)
+
+# Ringkasan KPI per periode (flask kpi-summary rebuild|check)
+init_summary(app)
+
+# ETag/304 + kompresi gzip/brotli untuk /api/* (harus sebelum init_cache)
+init_http_cache(app)
+
+# Cache response GET dashboard, invalid otomatis saat data_version naik
+init_cache(app)
+
 # Register API blueprints/routes
-register_kpi_routes(app, get_db)
-register_collection_routes(app, get_db)
-register_anomaly_routes(app, get_db)
+# Read-only dashboard endpoints pakai get_read_db (pool mode=ro / snapshot),
+# endpoint yang menulis (upload, analisa) tetap pakai get_db
+register_kpi_routes(app, get_read_db)
+register_data_routes(app, get_read_db)
+register_collection_routes(app, get_read_db)
+register_anomaly_routes(app, get_read_db)
 register_analisa_routes(app, get_db)
 register_upload_routes(app, get_db)
-register_history_routes(app, get_db)
-register_sbrs_routes(app, get_db)
-register_belum_bayar_routes(app, get_db)
-register_pcez_performance_routes(app, get_db)
+register_history_routes(app, get_read_db)
+register_sbrs_routes(app, get_read_db)
+register_belum_bayar_routes(app, get_read_db)
+register_pcez_performance_routes(app, get_read_db)
+register_customer_routes(app, get_read_db)
+register_export_routes(app, get_read_db)
+register_internal_routes(app, get_db)
+
+# Background refresh snapshot read-only (jika READ_SNAPSHOT_ENABLED)
+start_snapshot_refresher(app)
+
+# ANALYZE setelah upload, WAL checkpoint & incremental vacuum saat idle
+start_maintenance(app)
+
+# Backup online berkala + CLI flask db-backup / db-restore
+init_backup(app)
 
 # ==========================================
 # MAIN ROUTES (UI) - Mobile First
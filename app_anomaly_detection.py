@@ -13,6 +13,7 @@ FIXED:
 
 from flask import jsonify
 import traceback
+from core.queries import fetch_one
 
 def register_anomaly_routes(app, get_db):
     """Register semua route untuk anomaly detection"""
@@ -24,14 +25,7 @@ def register_anomaly_routes(app, get_db):
         
         try:
             # Ambil periode terakhir dari SBRS
-            periode_query = """
-                SELECT periode_bulan, periode_tahun 
-                FROM sbrs_data 
-                WHERE periode_bulan IS NOT NULL AND periode_tahun IS NOT NULL
-                ORDER BY periode_tahun DESC, periode_bulan DESC 
-                LIMIT 1
-            """
-            periode_row = db.execute(periode_query).fetchone()
+            periode_row = fetch_one(db, 'latest_periode_sbrs')
             
             if not periode_row:
                 return jsonify({
@@ -51,18 +45,7 @@ def register_anomaly_routes(app, get_db):
             anomalies = {}
             
             # 1. PEMAKAIAN EXTREME (>100 m3 atau >3x avg)
-            extreme_query = """
-                SELECT COUNT(DISTINCT nomen) as count,
-                       SUM(volume) as total_kubikasi,
-                       AVG(volume) as avg_kubikasi
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND (volume > 100 OR volume > (
-                    SELECT AVG(volume) * 3 FROM sbrs_data 
-                    WHERE periode_bulan = ? AND periode_tahun = ?
-                ))
-            """
-            extreme = db.execute(extreme_query, (periode_bulan, periode_tahun, periode_bulan, periode_tahun)).fetchone()
+            extreme = fetch_one(db, 'anomaly_extreme', (periode_bulan, periode_tahun, periode_bulan, periode_tahun))
             anomalies['extreme'] = {
                 'count': extreme[0] or 0,
                 'total_kubikasi': extreme[1] or 0,
@@ -70,53 +53,22 @@ def register_anomaly_routes(app, get_db):
             }
             
             # 2. PEMAKAIAN TURUN (turun >50% dari periode sebelumnya)
-            turun_query = """
-                SELECT COUNT(*) as count
-                FROM sbrs_data s1
-                LEFT JOIN sbrs_data s2 ON s1.nomen = s2.nomen 
-                WHERE s1.periode_bulan = ? AND s1.periode_tahun = ?
-                AND (
-                    (s1.periode_bulan = 1 AND s2.periode_bulan = 12 AND s2.periode_tahun = s1.periode_tahun - 1)
-                    OR (s1.periode_bulan > 1 AND s2.periode_bulan = s1.periode_bulan - 1 AND s2.periode_tahun = s1.periode_tahun)
-                )
-                AND s2.volume > 0
-                AND s1.volume < (s2.volume * 0.5)
-            """
-            turun = db.execute(turun_query, (periode_bulan, periode_tahun)).fetchone()
+            turun = fetch_one(db, 'anomaly_turun', (periode_bulan, periode_tahun))
             anomalies['turun'] = {'count': turun[0] or 0}
             
             # 3. ZERO USAGE (volume = 0)
-            zero_query = """
-                SELECT COUNT(DISTINCT nomen) as count
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND volume = 0
-            """
-            zero = db.execute(zero_query, (periode_bulan, periode_tahun)).fetchone()
+            zero = fetch_one(db, 'anomaly_zero', (periode_bulan, periode_tahun))
             anomalies['zero'] = {'count': zero[0] or 0}
             
             # 4. STAND NEGATIF (volume < 0)
-            negatif_query = """
-                SELECT COUNT(DISTINCT nomen) as count,
-                       SUM(volume) as total_negatif
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND volume < 0
-            """
-            negatif = db.execute(negatif_query, (periode_bulan, periode_tahun)).fetchone()
+            negatif = fetch_one(db, 'anomaly_negatif', (periode_bulan, periode_tahun))
             anomalies['negatif'] = {
                 'count': negatif[0] or 0,
                 'total': negatif[1] or 0
             }
             
             # 5. SALAH CATAT (stand_akhir < stand_awal)
-            salah_query = """
-                SELECT COUNT(DISTINCT nomen) as count
-                FROM sbrs_data
-                WHERE periode_bulan = ? AND periode_tahun = ?
-                AND stand_akhir < stand_awal
-            """
-            salah = db.execute(salah_query, (periode_bulan, periode_tahun)).fetchone()
+            salah = fetch_one(db, 'anomaly_salah_catat', (periode_bulan, periode_tahun))
             anomalies['salah_catat'] = {'count': salah[0] or 0}
             
             # 6. REBILL (ada flag rebill di spm_status)
@@ -165,14 +117,7 @@ def register_anomaly_routes(app, get_db):
         
         try:
             # Ambil periode terakhir
-            periode_query = """
-                SELECT periode_bulan, periode_tahun 
-                FROM sbrs_data 
-                WHERE periode_bulan IS NOT NULL AND periode_tahun IS NOT NULL
-                ORDER BY periode_tahun DESC, periode_bulan DESC 
-                LIMIT 1
-            """
-            periode_row = db.execute(periode_query).fetchone()
+            periode_row = fetch_one(db, 'latest_periode_sbrs')
             
             if not periode_row:
                 return jsonify({'data': []})
@@ -0,0 +1,201 @@
+"""
+Analytics Engine Module
+Optional embedded DuckDB backend for heavy aggregate queries
+
+Query agregasi di ANALYTIC_QUERIES (join + GROUP BY satu periode penuh
+langsung dari tabel fakta, belum ada ringkasannya) bisa dijalankan di
+DuckDB (vectorized, multi-core) alih-alih SQLite. DuckDB meng-ATTACH file
+database baca (snapshot / database utama) lewat extension sqlite, jadi SQL
+registry dipakai apa adanya dan tidak ada export terpisah.
+
+Nonaktif kecuali ANALYTICS_BACKEND=duckdb. Jika duckdb tidak ter-install,
+extension tidak tersedia, atau query gagal, fetch_analytics() otomatis
+fallback ke SQLite. ANALYTICS_COMPARE=1 menjalankan keduanya, mencatat
+selisih (GET /api/internal/analytics), dan tetap mengembalikan hasil SQLite.
+"""
+
+import os
+import threading
+import time
+from flask import current_app
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from core.database import get_read_path
+from core.queries import QUERIES, fetch_all, query_stats
+
+# Query yang boleh dijalankan di DuckDB (SQL-nya kompatibel dengan kedua engine)
+ANALYTIC_QUERIES = {
+    'collection_top_payers',
+    'pcez_detail_rayon',
+    'pcez_detail_ardebt',
+}
+
+FACT_TABLES = ['master_pelanggan', 'collection_harian', 'master_bayar', 'mainbill', 'ardebt', 'sbrs_data']
+
+
+def _config(key, default=None):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+def _quote(path):
+    """Escape path untuk literal string SQL DuckDB"""
+    return str(path).replace("'", "''")
+
+
+# ==========================================
+# ENGINE
+# ==========================================
+
+class AnalyticsEngine:
+    """
+    Satu instance DuckDB in-memory per proses. Tabel fakta diekspos sebagai
+    VIEW di catalog utama, jadi SQL di QUERIES bisa dipakai apa adanya.
+    Setiap thread memakai cursor() sendiri.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._source_key = None
+        self._failed_key = None
+        self._lock = threading.Lock()
+        self.last_error = None
+
+    def _open(self, location):
+        conn = duckdb.connect(':memory:')
+        threads = _config('ANALYTICS_THREADS')
+        if threads:
+            conn.execute(f"SET threads = {int(threads)}")
+        conn.execute("INSTALL sqlite")
+        conn.execute("LOAD sqlite")
+        conn.execute(f"ATTACH '{_quote(location)}' AS src (TYPE sqlite, READ_ONLY)")
+        for table in FACT_TABLES:
+            conn.execute(f"CREATE VIEW {table} AS SELECT * FROM src.{table}")
+        return conn
+
+    def cursor(self):
+        """
+        Cursor DuckDB untuk thread ini. Engine dibuka ulang jika file sumber
+        berubah (snapshot baru di-rename menggantikan yang lama).
+        """
+        if duckdb is None:
+            raise RuntimeError('duckdb not installed')
+
+        location = get_read_path()
+        if not os.path.exists(location):
+            raise RuntimeError(f'analytics source not found: {location}')
+
+        key = (location, os.path.getmtime(location))
+        with self._lock:
+            if self._failed_key == key:
+                raise RuntimeError(self.last_error)
+            if self._source_key != key:
+                old = self._conn
+                try:
+                    self._conn = self._open(location)
+                except Exception as e:
+                    # Jangan coba buka ulang sampai sumber data berubah
+                    self._conn, self._failed_key, self.last_error = old, key, str(e)
+                    raise
+                self._source_key = key
+                if old is not None:
+                    old.close()
+                print(f"🦆 Analytics engine opened ({location})")
+            return self._conn.cursor()
+
+    def fetch_all(self, name, params=()):
+        """Execute named query di DuckDB, return list of dict"""
+        cur = self.cursor()
+        try:
+            cur.execute(QUERIES[name], list(params))
+            columns = [d[0] for d in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+    def status(self):
+        return {
+            'installed': duckdb is not None,
+            'open': self._conn is not None,
+            'location': self._source_key[0] if self._source_key else None,
+            'last_error': self.last_error,
+        }
+
+
+engine = AnalyticsEngine()
+
+compare_stats = {'match': 0, 'mismatch': 0, 'last_mismatch': None}
+_compare_lock = threading.Lock()
+
+
+def _normalize(rows):
+    """Row → tuple yang bisa dibandingkan lintas engine (float dibulatkan)"""
+    result = []
+    for row in rows:
+        values = []
+        for key in sorted(dict(row).keys()):
+            value = row[key]
+            if isinstance(value, float) or type(value).__name__ == 'Decimal':
+                value = round(float(value), 4)
+            values.append((key, value))
+        result.append(tuple(values))
+    return sorted(result, key=repr)
+
+
+def _compare(name, duck_rows, sqlite_rows):
+    same = _normalize(duck_rows) == _normalize(sqlite_rows)
+    with _compare_lock:
+        if same:
+            compare_stats['match'] += 1
+        else:
+            compare_stats['mismatch'] += 1
+            compare_stats['last_mismatch'] = {
+                'query': name,
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'duckdb_rows': len(duck_rows),
+                'sqlite_rows': len(sqlite_rows),
+            }
+    if not same:
+        print(f"⚠️  Analytics mismatch on {name}: duckdb={len(duck_rows)} rows, sqlite={len(sqlite_rows)} rows")
+    return same
+
+
+def fetch_analytics(db, name, params=()):
+    """
+    Jalankan query agregasi berat di backend analytics (jika aktif),
+    fallback ke SQLite lewat fetch_all().
+    """
+    if (_config('ANALYTICS_BACKEND', 'sqlite') != 'duckdb'
+            or name not in ANALYTIC_QUERIES or duckdb is None):
+        return fetch_all(db, name, params)
+
+    try:
+        started = time.perf_counter()
+        rows = engine.fetch_all(name, params)
+        query_stats.record(f"{name}@duckdb", (time.perf_counter() - started) * 1000, len(rows))
+    except Exception as e:
+        engine.last_error = str(e)
+        print(f"⚠️  Analytics fallback to SQLite for {name}: {e}")
+        return fetch_all(db, name, params)
+
+    if _config('ANALYTICS_COMPARE', False):
+        sqlite_rows = fetch_all(db, name, params)
+        _compare(name, rows, sqlite_rows)
+        return sqlite_rows
+
+    return rows
+
+
+def init_analytics(app):
+    """Log backend analytics yang aktif saat startup"""
+    if app.config.get('ANALYTICS_BACKEND') == 'duckdb':
+        if duckdb is None:
+            print("⚠️  ANALYTICS_BACKEND=duckdb but duckdb is not installed, using SQLite")
+        else:
+            print("✅ Analytics backend: duckdb (sqlite attach)")
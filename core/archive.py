@@ -0,0 +1,384 @@
+"""
+Cold Archive Module
+Memindahkan periode lama dari tabel fakta besar ke file Parquet (zstd)
+
+Tabel collection_harian, sbrs_data dan ardebt hanya menyimpan "hot window"
+(ARCHIVE_HOT_MONTHS bulan terakhir). Periode yang lebih lama ditulis ke
+<ARCHIVE_DIR>/<table>/<tahun>-<bulan>.parquet lalu dihapus dari tabel live.
+
+File diurutkan per nomen dengan row group kecil, sehingga read_archive()
+lewat pyarrow.dataset bisa melewati row group yang tidak memuat nomen yang
+dicari (predicate pushdown pada statistik min/max).
+
+_manifest.json mencatat periode yang sudah diarsip beserta jumlah barisnya.
+Periode yang di-upload ulang setelah diarsip ada di tabel live dan di arsip
+sampai partisi arsipnya di-drop (drop_archived_periodes); selama itu
+pembaca memakai data live dan melewati partisi arsip periode tersebut.
+"""
+
+import json
+import os
+import threading
+import time
+
+from flask import current_app
+
+from core.paidset import touch_paid_set
+from core.versioning import bump_data_version, touch_periode_nomens
+from core.writer import write_lock
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARCHIVE_TABLES = ['collection_harian', 'sbrs_data', 'ardebt']
+
+ROW_GROUP_SIZE = 16_384
+FETCH_ROWS = 50_000
+
+_TYPES = {
+    'INTEGER': 'int64',
+    'REAL': 'float64',
+}
+
+_manifest_lock = threading.Lock()
+_totals_cache = {'version': None, 'totals': {}}
+
+
+def _config(key, default=None):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+def get_archive_dir():
+    return str(_config('ARCHIVE_DIR') or os.path.join('database', 'archive'))
+
+
+def periode_key(tahun, bulan):
+    """(tahun, bulan) → integer yang bisa dibandingkan (tahun * 12 + bulan)"""
+    return int(tahun) * 12 + int(bulan)
+
+
+def hot_window_start(months=None, today=None):
+    """Periode (tahun, bulan) tertua yang masih disimpan di tabel live"""
+    months = int(months if months is not None else _config('ARCHIVE_HOT_MONTHS', 24))
+    today = today or time.localtime()
+    key = periode_key(today.tm_year, today.tm_mon) - months + 1
+    return (key - 1) // 12, (key - 1) % 12 + 1
+
+
+# ==========================================
+# MANIFEST
+# ==========================================
+
+def _manifest_path(archive_dir=None):
+    return os.path.join(archive_dir or get_archive_dir(), '_manifest.json')
+
+
+def load_manifest(archive_dir=None):
+    """{table: {'YYYY-MM': row_count}}"""
+    path = _manifest_path(archive_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def archive_version(archive_dir=None):
+    """Penanda isi arsip (mtime manifest, 0 jika belum ada arsip) untuk kunci cache"""
+    try:
+        return os.stat(_manifest_path(archive_dir)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _save_manifest(manifest, archive_dir):
+    path = _manifest_path(archive_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def archived_periodes(table, archive_dir=None):
+    """List (tahun, bulan) yang sudah diarsip untuk table, urut naik"""
+    periodes = load_manifest(archive_dir).get(table, {})
+    return sorted(tuple(int(x) for x in key.split('-')) for key in periodes)
+
+
+def live_periodes(db, table, periodes):
+    """Periode (tahun, bulan) dari `periodes` yang masih punya baris di tabel live"""
+    return {
+        (tahun, bulan) for tahun, bulan in periodes
+        if db.execute(
+            f'SELECT 1 FROM {table} WHERE periode_tahun = ? AND periode_bulan = ? LIMIT 1', (tahun, bulan)
+        ).fetchone()
+    }
+
+
+def drop_archived_periodes(db, table, periodes, archive_dir=None):
+    """
+    Hapus partisi arsip (manifest + file) untuk periode yang sudah ada lagi
+    di tabel live (upload ulang). Dijalankan sebagai job writer setelah
+    swap upload di-commit: lock writer yang sama dengan archive_cold_periodes(),
+    jadi periode yang baru saja diarsip ulang (tidak live lagi) tidak ikut
+    terhapus. Return list periode yang di-drop.
+    """
+    archive_dir = archive_dir or get_archive_dir()
+    archived = set(archived_periodes(table, archive_dir)) & {(int(t), int(b)) for t, b in periodes}
+    dropped = sorted(live_periodes(db, table, archived))
+    if not dropped:
+        return []
+
+    with _manifest_lock:
+        manifest = load_manifest(archive_dir)
+        for tahun, bulan in dropped:
+            manifest.get(table, {}).pop(f"{tahun:04d}-{bulan:02d}", None)
+        _save_manifest(manifest, archive_dir)
+    for tahun, bulan in dropped:
+        path = os.path.join(archive_dir, table, f"{tahun:04d}-{bulan:02d}.parquet")
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"🧊 Dropped archived {table} {tahun:04d}-{bulan:02d} (re-uploaded)")
+    return dropped
+
+
+# ==========================================
+# ARCHIVE (WRITE)
+# ==========================================
+
+def _arrow_schema(db, table):
+    """Schema Arrow dari tipe kolom SQLite (TEXT / TIMESTAMP → string)"""
+    fields = []
+    for row in db.execute(f'PRAGMA table_info({table})').fetchall():
+        declared = (row['type'] or '').upper()
+        fields.append(pa.field(row['name'], pa.type_for_alias(_TYPES.get(declared, 'string'))))
+    return pa.schema(fields)
+
+
+def _to_batch(rows, schema):
+    columns = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _archive_periode(db, table, tahun, bulan, schema, archive_dir):
+    """Tulis satu periode ke Parquet, return jumlah baris yang ditulis"""
+    target_dir = os.path.join(archive_dir, table)
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, f"{tahun:04d}-{bulan:02d}.parquet")
+    tmp = f"{target}.tmp"
+
+    columns = ', '.join(schema.names)
+    cursor = db.execute(f'''
+        SELECT {columns} FROM {table}
+        WHERE periode_tahun = ? AND periode_bulan = ?
+        ORDER BY nomen
+    ''', (tahun, bulan))
+
+    written = 0
+    with pq.ParquetWriter(tmp, schema, compression='zstd') as writer:
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            writer.write_batch(_to_batch(rows, schema), row_group_size=ROW_GROUP_SIZE)
+            written += len(rows)
+
+    if pq.ParquetFile(tmp).metadata.num_rows != written:
+        os.remove(tmp)
+        raise RuntimeError(f'archive verification failed for {table} {tahun}-{bulan:02d}')
+
+    # Periode yang di-upload ulang setelah diarsip: file lama diganti
+    os.replace(tmp, target)
+    return written
+
+
+def archive_cold_periodes(db, months=None, tables=None, archive_dir=None, dry_run=False, before=None):
+    """
+    Pindahkan periode yang lebih tua dari hot window (atau dari periode
+    `before` = (tahun, bulan) jika diberikan) ke Parquet.
+
+    Per (table, periode), seluruhnya di bawah write_lock() supaya upload
+    periode yang sama tidak bisa masuk di tengah jalan: baca & tulis file,
+    verifikasi jumlah baris, update manifest, DELETE dari tabel live dan
+    commit. Return {table: {'YYYY-MM': rows}} untuk periode yang diproses.
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow not installed')
+
+    archive_dir = archive_dir or get_archive_dir()
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = periode_key(*(before or hot_window_start(months)))
+
+    result = {}
+    for table in tables or ARCHIVE_TABLES:
+        cold = db.execute(f'''
+            SELECT DISTINCT periode_tahun, periode_bulan FROM {table}
+            WHERE periode_tahun * 12 + periode_bulan < ?
+            ORDER BY periode_tahun, periode_bulan
+        ''', (cutoff,)).fetchall()
+        if not cold:
+            continue
+
+        schema = _arrow_schema(db, table)
+        for row in cold:
+            tahun, bulan = int(row[0]), int(row[1])
+            key = f"{tahun:04d}-{bulan:02d}"
+            if dry_run:
+                count = db.execute(
+                    f'SELECT COUNT(*) FROM {table} WHERE periode_tahun = ? AND periode_bulan = ?',
+                    (tahun, bulan)
+                ).fetchone()[0]
+                result.setdefault(table, {})[key] = count
+                continue
+
+            # Koneksi sendiri (bukan writer thread): ambil file lock writer sebelum
+            # membaca periode, sampai DELETE di-commit
+            with write_lock():
+                count = _archive_periode(db, table, tahun, bulan, schema, archive_dir)
+                with _manifest_lock:
+                    manifest = load_manifest(archive_dir)
+                    manifest.setdefault(table, {})[key] = count
+                    _save_manifest(manifest, archive_dir)
+
+                version = bump_data_version(db, f'archive:{table}')
+                touch_periode_nomens(db, version, table, bulan, tahun)
+                db.execute(f'DELETE FROM {table} WHERE periode_tahun = ? AND periode_bulan = ?', (tahun, bulan))
+                touch_paid_set(db, bulan, tahun)
+                db.commit()
+            result.setdefault(table, {})[key] = count
+            print(f"🧊 Archived {table} {key}: {count:,} rows")
+
+    return result
+
+
+# ==========================================
+# READ
+# ==========================================
+
+def _periode_files(table, since, until, archive_dir, db=None):
+    """
+    File Parquet untuk periode di rentang [since, until] (tuple tahun, bulan / None).
+    Dengan db, periode yang juga ada di tabel live dilewati.
+    """
+    periodes = [
+        (tahun, bulan) for tahun, bulan in archived_periodes(table, archive_dir)
+        if not (since and periode_key(tahun, bulan) < periode_key(*since))
+        and not (until and periode_key(tahun, bulan) > periode_key(*until))
+    ]
+    live = live_periodes(db, table, periodes) if db is not None else set()
+
+    files = []
+    for tahun, bulan in periodes:
+        if (tahun, bulan) in live:
+            continue
+        path = os.path.join(archive_dir, table, f"{tahun:04d}-{bulan:02d}.parquet")
+        if os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def needs_archive(table, since, archive_dir=None):
+    """True jika periode `since` (atau None = semua) menyentuh data arsip"""
+    periodes = archived_periodes(table, archive_dir)
+    if not periodes:
+        return False
+    return since is None or periode_key(*since) <= periode_key(*periodes[-1])
+
+
+def read_archive(table, nomen, columns=None, since=None, until=None, archive_dir=None, db=None):
+    """
+    Baca baris arsip untuk satu nomen (list of dict).
+    Periode dipilih per file (satu file = satu periode), filter nomen
+    di-push down ke scanner Parquet. Dengan db, periode yang sudah
+    di-upload ulang ke tabel live dilewati (baris live yang berlaku).
+    """
+    if pa is None:
+        print("⚠️  pyarrow not installed, archived periodes skipped")
+        return []
+
+    archive_dir = archive_dir or get_archive_dir()
+    files = _periode_files(table, since, until, archive_dir, db)
+    if not files:
+        return []
+
+    dataset = ds.dataset(files, format='parquet')
+    return dataset.to_table(columns=columns, filter=ds.field('nomen') == str(nomen)).to_pylist()
+
+
+def archived_collection_totals(archive_dir=None):
+    """
+    {(tahun, bulan): SUM(jumlah_bayar) tipe current} dari arsip collection,
+    dipakai KPI trend untuk periode yang sudah tidak ada di tabel live.
+    Di-cache sampai manifest berubah.
+    """
+    archive_dir = archive_dir or get_archive_dir()
+    path = _manifest_path(archive_dir)
+    if pa is None or not os.path.exists(path):
+        return {}
+
+    version = (path, os.path.getmtime(path))
+    if _totals_cache['version'] == version:
+        return _totals_cache['totals']
+
+    totals = {}
+    for file in _periode_files('collection_harian', None, None, archive_dir):
+        table = pq.read_table(file, columns=['periode_tahun', 'periode_bulan', 'jumlah_bayar'],
+                              filters=[('tipe_bayar', '=', 'current')])
+        if table.num_rows == 0:
+            continue
+        tahun = table['periode_tahun'][0].as_py()
+        bulan = table['periode_bulan'][0].as_py()
+        totals[(tahun, bulan)] = pc.sum(table['jumlah_bayar']).as_py() or 0
+
+    _totals_cache.update(version=version, totals=totals)
+    return totals
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def init_archive(app):
+    """Register CLI command `flask archive-cold`"""
+    import click
+
+    @app.cli.command('archive-cold')
+    @click.option('--months', type=int, default=None, help='Hot window (bulan), default ARCHIVE_HOT_MONTHS')
+    @click.option('--before', default=None, help='Arsipkan periode sebelum YYYY-MM (override hot window)')
+    @click.option('--table', 'tables', multiple=True, type=click.Choice(ARCHIVE_TABLES))
+    @click.option('--dry-run', is_flag=True, help='Tampilkan periode yang akan diarsip tanpa mengubah data')
+    @click.option('--vacuum', is_flag=True, help='VACUUM database setelah arsip (SQLite)')
+    def archive_cold_command(months, before, tables, dry_run, vacuum):
+        """Arsipkan periode lama collection/sbrs/ardebt ke Parquet"""
+        from core.database import get_db, is_sqlite
+
+        if before:
+            tahun, bulan = before.split('-')
+            before = (int(tahun), int(bulan))
+
+        db = get_db()
+        result = archive_cold_periodes(db, months=months, tables=list(tables) or None,
+                                       dry_run=dry_run, before=before)
+
+        for table, periodes in result.items():
+            for key, count in periodes.items():
+                print(f"{'[dry-run] ' if dry_run else ''}{table} {key}: {count:,} rows")
+        if not result:
+            print("Nothing to archive")
+
+        if vacuum and result and not dry_run and is_sqlite():
+            with write_lock():
+                db.execute('VACUUM')
+            print("🧹 VACUUM done")
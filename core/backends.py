@@ -0,0 +1,248 @@
+"""
+Database Backend Module
+Small adapter so core.database can run on SQLite (default) or PostgreSQL
+
+Backend menyediakan API yang dipakai kode lain (koneksi bergaya sqlite3:
+execute / cursor / commit, row bisa diakses via index maupun nama kolom)
+plus bulk_insert() untuk loader upload:
+- SQLiteBackend   : sqlite3 + TimedConnection (slow query log), executemany
+- PostgresBackend : psycopg2 ThreadedConnectionPool, COPY FROM STDIN
+
+SQL tetap ditulis dengan placeholder `?`; PostgresBackend menerjemahkannya
+ke `%s`, PRAGMA table_info ke information_schema, PRAGMA lain menjadi
+no-op dan INSERT OR IGNORE ke INSERT ... ON CONFLICT DO NOTHING. Sintaks
+khusus SQLite lain (INSERT OR REPLACE, date('now', ...)) tidak
+diterjemahkan dan tidak boleh dipakai di jalur yang juga jalan di PostgreSQL.
+"""
+
+import csv
+import io
+import re
+import sqlite3
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+except ImportError:
+    psycopg2 = None
+
+from core.slow_query import TimedConnection
+
+
+# ==========================================
+# SQL TRANSLATION (SQLite → PostgreSQL)
+# ==========================================
+
+_TOKEN = re.compile(r"""('(?:[^']|'')*')|("(?:[^"]|"")*")|(--[^\n]*)|(\?)|(%)""")
+_PRAGMA_TABLE_INFO = re.compile(r'^\s*PRAGMA\s+table_info\(\s*(\w+)\s*\)\s*;?\s*$', re.IGNORECASE)
+_PRAGMA = re.compile(r'^\s*PRAGMA\b', re.IGNORECASE)
+_INSERT_OR_IGNORE = re.compile(r'^(\s*)INSERT\s+OR\s+IGNORE\s+INTO\b', re.IGNORECASE)
+
+# psycopg2.extensions.TRANSACTION_STATUS_IDLE
+_PG_TRANSACTION_IDLE = 0
+
+
+def translate_placeholders(sql):
+    """
+    Ganti placeholder `?` dengan `%s` dan escape `%` menjadi `%%`
+    (psycopg2 memakai %-formatting, termasuk di dalam string literal).
+    `?` di dalam string literal / identifier / komentar tidak diubah.
+    """
+    def _replace(match):
+        if match.group(4):
+            return '%s'
+        if match.group(5):
+            return '%%'
+        if match.group(3):
+            return match.group(3)
+        return match.group(0).replace('%', '%%')
+
+    return _TOKEN.sub(_replace, sql)
+
+
+def translate_sql(sql):
+    """Terjemahkan SQL bergaya SQLite ke PostgreSQL"""
+    match = _PRAGMA_TABLE_INFO.match(sql)
+    if match:
+        return (
+            "SELECT ordinal_position - 1 AS cid, column_name AS name, data_type AS type "
+            "FROM information_schema.columns "
+            f"WHERE table_schema = current_schema() AND table_name = '{match.group(1)}' "
+            "ORDER BY ordinal_position"
+        )
+    if _PRAGMA.match(sql):
+        # PRAGMA lain (foreign_keys, optimize, ...) hanya berarti di SQLite
+        return 'SELECT NULL WHERE FALSE'
+    if _INSERT_OR_IGNORE.match(sql):
+        sql = _INSERT_OR_IGNORE.sub(r'\1INSERT INTO', sql, count=1).rstrip().rstrip(';')
+        sql += '\nON CONFLICT DO NOTHING'
+    return translate_placeholders(sql)
+
+
+# ==========================================
+# SQLITE
+# ==========================================
+
+class SQLiteBackend:
+    """Backend default: satu file SQLite"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, cached_statements=256):
+        self.path = path
+        self.cached_statements = cached_statements
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, factory=TimedConnection,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+    def bulk_insert(self, conn, table, columns, rows, replace=False):
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        placeholders = ', '.join('?' for _ in columns)
+        cursor = conn.executemany(
+            f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+        return cursor.rowcount
+
+    def close(self):
+        pass
+
+
+# ==========================================
+# POSTGRESQL
+# ==========================================
+
+class PgCursor:
+    """Cursor psycopg2 dengan API sqlite3 (placeholder `?`, lastrowid)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = conn.raw.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+    def execute(self, sql, parameters=()):
+        self._cursor.execute(translate_sql(sql), tuple(parameters))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._cursor.executemany(translate_sql(sql), [tuple(p) for p in seq_of_parameters])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        """Nilai sequence terakhir di sesi ini (setara sqlite3 lastrowid)"""
+        with self._conn.raw.cursor() as cur:
+            cur.execute('SELECT lastval()')
+            return cur.fetchone()[0]
+
+    def close(self):
+        self._cursor.close()
+
+
+class PgConnection:
+    """Koneksi pinjaman dari pool dengan API bergaya sqlite3"""
+
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.row_factory = None  # kompatibilitas; row selalu DictRow
+
+    def cursor(self):
+        return PgCursor(self)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    @property
+    def in_transaction(self):
+        """True jika ada transaksi terbuka (setara sqlite3 Connection.in_transaction)"""
+        return self.raw.get_transaction_status() != _PG_TRANSACTION_IDLE
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        """Kembalikan koneksi ke pool (transaksi yang belum di-commit dibatalkan)"""
+        if self.raw is not None:
+            self.backend.release(self)
+
+
+class PostgresBackend:
+    """PostgreSQL dengan connection pool, untuk multi-worker write concurrency"""
+
+    name = 'postgres'
+
+    def __init__(self, dsn, minconn=1, maxconn=10):
+        if psycopg2 is None:
+            raise RuntimeError('DATABASE_BACKEND=postgres requires psycopg2')
+        self.dsn = dsn
+        self.pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, dsn)
+
+    def connect(self):
+        return PgConnection(self, self.pool.getconn())
+
+    def release(self, conn):
+        raw, conn.raw = conn.raw, None
+        if raw.closed:
+            self.pool.putconn(raw, close=True)
+            return
+        raw.rollback()
+        self.pool.putconn(raw)
+
+    def bulk_insert(self, conn, table, columns, rows, replace=False):
+        """
+        Bulk load via COPY FROM STDIN (CSV, NULL = \\N).
+
+        replace diabaikan: unique key tabel fakta memuat kolom yang selalu
+        NULL saat upload (bill_period), jadi tidak pernah konflik - sama
+        seperti perilaku INSERT OR REPLACE di SQLite.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow(['\\N' if value is None else value for value in row])
+            count += 1
+        buffer.seek(0)
+
+        with conn.raw.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        return count
+
+    def close(self):
+        self.pool.closeall()
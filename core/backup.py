@@ -0,0 +1,297 @@
+"""
+Online Backup Module
+Backup database SQLite yang sedang dipakai memakai sqlite3 backup API
+
+Menyalin file database saat app berjalan tidak aman (halaman setengah
+ditulis, WAL belum di-checkpoint). Connection.backup() menyalin
+konsisten per `pages` halaman dan tidur sebentar di antara step, jadi
+writer dan reader tidak tertahan selama backup database besar.
+
+Hasil backup dikompres gzip ke <BACKUP_DIR>/sunter-YYYYmmdd-HHMMSS[-label].db.gz
+dan hanya BACKUP_KEEP file terbaru yang disimpan. Backup dijalankan:
+- berkala (BACKUP_INTERVAL detik, satu worker saja lewat file lock)
+- di background setelah upload berhasil
+- manual: `flask db-backup`, restore: `flask db-restore [FILE|latest]`
+"""
+
+import glob
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from core.database import _config, _read_pool, get_db_path, is_sqlite
+from core.versioning import bump_data_version
+
+BACKUP_PREFIX = 'sunter-'
+BACKUP_SUFFIX = '.db.gz'
+
+# Interval cek thread scheduler (detik)
+TICK_SECONDS = 60
+
+_NAME = re.compile(r'^sunter-(\d{8}-\d{6})(?:-([\w.-]+))?\.db\.gz$')
+_backup_lock = threading.Lock()
+
+
+def get_backup_dir():
+    return str(_config('BACKUP_DIR') or os.path.join('database', 'backups'))
+
+
+def list_backups(backup_dir=None):
+    """Backup yang ada, terbaru dulu: [{name, path, size, created, label}]"""
+    backup_dir = backup_dir or get_backup_dir()
+    backups = []
+    for path in glob.glob(os.path.join(backup_dir, f'{BACKUP_PREFIX}*{BACKUP_SUFFIX}')):
+        match = _NAME.match(os.path.basename(path))
+        if not match:
+            continue
+        backups.append({
+            'name': os.path.basename(path),
+            'path': path,
+            'size': os.path.getsize(path),
+            'created': match.group(1),
+            'label': match.group(2),
+        })
+    return sorted(backups, key=lambda b: (b['created'], b['name']), reverse=True)
+
+
+def rotate_backups(backup_dir=None, keep=None):
+    """Hapus backup lama, sisakan `keep` terbaru. Return nama file yang dihapus"""
+    keep = int(keep if keep is not None else _config('BACKUP_KEEP', 7))
+    removed = []
+    for backup in list_backups(backup_dir)[keep:]:
+        os.remove(backup['path'])
+        removed.append(backup['name'])
+    return removed
+
+
+# ==========================================
+# BACKUP
+# ==========================================
+
+def create_backup(db_path=None, backup_dir=None, label=None, pages=None, sleep=0.005, keep=None):
+    """
+    Backup online db_path → file .db.gz di backup_dir, lalu rotasi.
+    Return {path, size, db_size, duration_s}.
+    """
+    db_path = db_path or get_db_path()
+    backup_dir = backup_dir or get_backup_dir()
+    pages = int(pages or _config('BACKUP_PAGES', 1024))
+    os.makedirs(backup_dir, exist_ok=True)
+
+    started = time.time()
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    name = f"{BACKUP_PREFIX}{stamp}{'-' + label if label else ''}{BACKUP_SUFFIX}"
+    target = os.path.join(backup_dir, name)
+    raw_tmp = f"{target}.{os.getpid()}.db.tmp"
+    gz_tmp = f"{target}.{os.getpid()}.tmp"
+
+    try:
+        src = sqlite3.connect(db_path, timeout=30)
+        dst = sqlite3.connect(raw_tmp)
+        try:
+            src.backup(dst, pages=pages, sleep=sleep)
+            # File backup mandiri (tanpa -wal) supaya bisa langsung di-restore
+            dst.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            dst.close()
+            src.close()
+
+        with open(raw_tmp, 'rb') as f_in, gzip.open(gz_tmp, 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+        db_size = os.path.getsize(raw_tmp)
+        os.replace(gz_tmp, target)
+    finally:
+        for tmp in (raw_tmp, gz_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    removed = rotate_backups(backup_dir, keep)
+    result = {
+        'path': target,
+        'size': os.path.getsize(target),
+        'db_size': db_size,
+        'duration_s': round(time.time() - started, 2),
+        'rotated': removed,
+    }
+    print(f"💾 Backup {name}: {result['db_size']:,} → {result['size']:,} bytes "
+          f"in {result['duration_s']}s")
+    return result
+
+
+def _locked_backup(label=None, **kwargs):
+    """
+    create_backup() dengan lock thread + file lock (non-blocking) supaya
+    worker lain tidak membuat backup yang sama bersamaan. Return None jika dilewati.
+    """
+    if not _backup_lock.acquire(blocking=False):
+        return None
+    lock_file = None
+    try:
+        backup_dir = kwargs.get('backup_dir') or get_backup_dir()
+        os.makedirs(backup_dir, exist_ok=True)
+        if fcntl is not None:
+            lock_file = open(os.path.join(backup_dir, '.backup.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return None
+        return create_backup(label=label, **kwargs)
+    finally:
+        if lock_file is not None:
+            lock_file.close()
+        _backup_lock.release()
+
+
+def backup_async(app, label='upload'):
+    """Dipanggil setelah upload: backup di background (SQLite, BACKUP_AFTER_UPLOAD)"""
+    if not app.config.get('BACKUP_AFTER_UPLOAD', False):
+        return None
+    if app.config.get('DATABASE_BACKEND', 'sqlite') == 'postgres':
+        return None
+
+    def _run():
+        try:
+            with app.app_context():
+                _locked_backup(label=label)
+        except Exception as e:
+            print(f"⚠️  Backup failed: {e}")
+
+    thread = threading.Thread(target=_run, name='db-backup', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_backup_scheduler(app):
+    """
+    Thread background yang membuat backup jika backup terbaru lebih tua
+    dari BACKUP_INTERVAL detik (0 = nonaktif)
+    """
+    interval = app.config.get('BACKUP_INTERVAL', 0)
+    if not interval or app.config.get('DATABASE_BACKEND', 'sqlite') == 'postgres':
+        return None
+
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    if not os.path.exists(get_db_path()):
+                        time.sleep(TICK_SECONDS)
+                        continue
+                    backups = list_backups()
+                    latest = os.path.getmtime(backups[0]['path']) if backups else 0
+                    if time.time() - latest >= interval:
+                        _locked_backup(label='scheduled')
+            except Exception as e:
+                print(f"⚠️  Scheduled backup failed: {e}")
+            time.sleep(min(interval, TICK_SECONDS))
+
+    thread = threading.Thread(target=_loop, name='backup-scheduler', daemon=True)
+    thread.start()
+    print(f"✅ Backup scheduler started (every {interval}s)")
+    return thread
+
+
+# ==========================================
+# RESTORE
+# ==========================================
+
+def resolve_backup(name, backup_dir=None):
+    """'latest' / nama file / path → path backup"""
+    if name in (None, 'latest'):
+        backups = list_backups(backup_dir)
+        if not backups:
+            raise FileNotFoundError('no backups found')
+        return backups[0]['path']
+    if os.path.exists(name):
+        return name
+    path = os.path.join(backup_dir or get_backup_dir(), name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return path
+
+
+def restore_backup(backup_path, db_path=None):
+    """
+    Restore backup .db.gz ke database live.
+
+    File di-decompress ke file sementara, dicek PRAGMA integrity_check,
+    lalu disalin ke database live lewat backup API dalam satu step
+    (koneksi lain yang terbuka tetap valid, tidak ada file yang diganti
+    di bawahnya). Return {path, pages, duration_s}.
+    """
+    db_path = db_path or get_db_path()
+    started = time.time()
+    tmp = f"{db_path}.restore.{os.getpid()}.tmp"
+
+    try:
+        with gzip.open(backup_path, 'rb') as f_in, open(tmp, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+        src = sqlite3.connect(tmp)
+        dst = sqlite3.connect(db_path, timeout=60)
+        try:
+            check = src.execute('PRAGMA integrity_check').fetchone()[0]
+            if check != 'ok':
+                raise RuntimeError(f'backup integrity check failed: {check}')
+            src.backup(dst)
+            # Isi berubah total: cache yang dikunci versi lama tidak boleh dipakai lagi
+            # (backup dari sebelum ada tabel data_version dilewati; init_db membuatnya)
+            if dst.execute("SELECT 1 FROM sqlite_master WHERE name = 'data_version'").fetchone():
+                bump_data_version(dst, 'restore')
+                dst.commit()
+            pages = dst.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            dst.close()
+            src.close()
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    _read_pool.invalidate()
+    result = {'path': backup_path, 'pages': pages, 'duration_s': round(time.time() - started, 2)}
+    print(f"♻️  Restored {os.path.basename(backup_path)} → {db_path} in {result['duration_s']}s")
+    return result
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def init_backup(app):
+    """Register CLI `flask db-backup` / `flask db-restore` dan start scheduler"""
+    import click
+
+    @app.cli.command('db-backup')
+    @click.option('--label', default='manual')
+    @click.option('--list', 'list_only', is_flag=True, help='Tampilkan backup yang ada')
+    def db_backup_command(label, list_only):
+        """Backup online database ke BACKUP_DIR (gzip + rotasi)"""
+        if list_only:
+            for backup in list_backups():
+                print(f"{backup['name']}  {backup['size']:,} bytes")
+            return
+        if not is_sqlite():
+            print("❌ db-backup hanya untuk SQLite (pakai pg_dump untuk PostgreSQL)")
+            return
+        create_backup(label=label)
+
+    @app.cli.command('db-restore')
+    @click.argument('name', default='latest')
+    @click.option('--yes', is_flag=True, help='Tanpa konfirmasi')
+    def db_restore_command(name, yes):
+        """Restore backup (nama file / path / 'latest') ke database live"""
+        path = resolve_backup(name)
+        if not yes:
+            click.confirm(f'Restore {os.path.basename(path)} → {get_db_path()}?', abort=True)
+        restore_backup(path)
+
+    return start_backup_scheduler(app)
@@ -0,0 +1,311 @@
+"""
+Response Cache Module
+Cache response GET endpoint dashboard, dikunci data_version
+
+Data dashboard hanya berubah saat upload / arsip / restore (semuanya
+menaikkan data_version, lihat core/versioning.py). Response JSON endpoint
+baca di RESPONSE_CACHE_PREFIXES disimpan dengan kunci
+(path, query args yang dinormalisasi, data_version); setelah upload
+berikutnya versi naik, kunci lama tidak pernah cocok lagi dan terbuang
+dari LRU dengan sendirinya. Tidak ada invalidasi eksplisit.
+
+Dua lapis:
+- memori (per proses): LRU dengan batas jumlah entry dan total byte
+- disk (opsional, RESPONSE_CACHE_DIR): file SQLite bersama, jadi worker
+  gunicorn lain ikut memakai hasil yang sudah dihitung
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+
+from core.database import get_db_path, get_read_db
+from core.versioning import current_data_version
+
+DEFAULT_PREFIXES = (
+    '/api/kpi',
+    '/api/home',
+    '/api/collection',
+    '/api/belum-bayar',
+    '/api/anomaly',
+    '/api/history',
+    '/api/sbrs',
+)
+
+
+class LRUCache:
+    """LRU thread-safe: value = (status, mimetype, body bytes)"""
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        size = len(value[2])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[2])
+            self._items[key] = value
+            self._bytes += size
+            while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted[2])
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._items), bytes=self._bytes,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes)
+
+
+class DiskCache:
+    """
+    Cache bersama antar proses di satu file SQLite (WAL). Entry versi lama
+    dan entry yang paling lama tidak dibaca dibuang saat ukuran lewat batas.
+    Total ukuran disimpan di response_cache_size dan dijaga trigger, jadi
+    set() tidak menghitung SUM(size) lagi dan total tetap benar antar proses.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'response_cache.db')
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                mimetype TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache(accessed)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_version ON response_cache(version)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO response_cache_size (id, total)
+            SELECT 1, COALESCE(SUM(size), 0) FROM response_cache
+        ''')
+        for name, event, delta in (
+            ('insert', 'INSERT', 'new.size'),
+            ('delete', 'DELETE', '- old.size'),
+            ('update', 'UPDATE OF size', 'new.size - old.size'),
+        ):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS response_cache_size_{name} AFTER {event} ON response_cache
+                BEGIN UPDATE response_cache_size SET total = total + {delta} WHERE id = 1; END
+            ''')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute('SELECT status, mimetype, body FROM response_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE response_cache SET accessed = ? WHERE key = ?', (time.time(), key))
+        return row[0], row[1], bytes(row[2])
+
+    def set(self, key, version, value):
+        conn = self._conn()
+        # Upsert (bukan REPLACE) supaya trigger ukuran melihat baris lama
+        conn.execute('''
+            INSERT INTO response_cache (key, version, status, mimetype, body, size, accessed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                version = excluded.version, status = excluded.status, mimetype = excluded.mimetype,
+                body = excluded.body, size = excluded.size, accessed = excluded.accessed
+        ''', (key, version, value[0], value[1], value[2], len(value[2]), time.time()))
+        self.prune(version)
+
+    def prune(self, version):
+        """Hapus versi lama, lalu entry LRU sampai total <= max_bytes"""
+        conn = self._conn()
+        conn.execute('DELETE FROM response_cache WHERE version < ?', (version,))
+        total = self._total(conn)
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in conn.execute('SELECT key, size FROM response_cache ORDER BY accessed').fetchall():
+            conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+    @staticmethod
+    def _total(conn):
+        return conn.execute('SELECT total FROM response_cache_size WHERE id = 1').fetchone()[0]
+
+    def clear(self):
+        self._conn().execute('DELETE FROM response_cache')
+
+    def status(self):
+        conn = self._conn()
+        entries = conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+        size = self._total(conn)
+        return {'path': self.path, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+
+class ResponseCache:
+    """LRU memori + disk opsional"""
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, max_item_bytes=4 * 1024 * 1024,
+                 directory=None, disk_max_bytes=512 * 1024 * 1024):
+        self.memory = LRUCache(max_entries, max_bytes)
+        self.disk = DiskCache(directory, disk_max_bytes) if directory else None
+        self.max_item_bytes = max_item_bytes
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️  Disk cache read failed: {e}")
+                return None
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, version, value):
+        if len(value[2]) > self.max_item_bytes:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, version, value)
+            except sqlite3.Error as e:
+                print(f"⚠️  Disk cache write failed: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def status(self):
+        return {
+            'memory': self.memory.status(),
+            'disk': self.disk.status() if self.disk is not None else None,
+        }
+
+
+def cache_key(path, args, version, db_path=''):
+    """Kunci cache: path + args terurut (nilai kosong dibuang) + versi data"""
+    items = sorted((k, v) for k, v in args.items(multi=True) if v != '')
+    raw = f"{db_path}|{path}?{urlencode(items)}|{version}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def request_data_version():
+    """
+    data_version untuk request ini, dibaca sekali lalu dipakai bersama
+    (ETag dan cache response). None jika tabel belum ada / DB belum siap.
+    """
+    if '_data_version' not in g:
+        try:
+            g._data_version = current_data_version(get_read_db())
+        except Exception:
+            g._data_version = None
+    return g._data_version
+
+
+def get_response_cache(app=None):
+    app = app or current_app
+    return app.extensions.get('response_cache')
+
+
+def init_cache(app):
+    """
+    Pasang cache response untuk GET di RESPONSE_CACHE_PREFIXES
+    (before_request: lookup, after_request: simpan response 200 JSON)
+    """
+    if not app.config.get('RESPONSE_CACHE_ENABLED', False):
+        return None
+
+    cache = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 512),
+        max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        max_item_bytes=app.config.get('RESPONSE_CACHE_MAX_ITEM_BYTES', 4 * 1024 * 1024),
+        directory=app.config.get('RESPONSE_CACHE_DIR'),
+        disk_max_bytes=app.config.get('RESPONSE_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024),
+    )
+    app.extensions['response_cache'] = cache
+    prefixes = tuple(app.config.get('RESPONSE_CACHE_PREFIXES') or DEFAULT_PREFIXES)
+
+    @app.before_request
+    def _response_cache_lookup():
+        if request.method != 'GET' or not request.path.startswith(prefixes):
+            return None
+        version = request_data_version()
+        if version is None:
+            return None  # tabel data_version belum ada / DB belum siap: tanpa cache
+
+        key = cache_key(request.path, request.args, version, get_db_path())
+        hit = cache.get(key)
+        if hit is None:
+            g._response_cache = (key, version)
+            return None
+
+        status, mimetype, body = hit
+        response = current_app.response_class(body, status=status, mimetype=mimetype)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    @app.after_request
+    def _response_cache_store(response):
+        pending = g.pop('_response_cache', None)
+        if pending is None:
+            return response
+        if response.status_code == 200 and response.is_json and not response.is_streamed:
+            key, version = pending
+            cache.set(key, version, (response.status_code, response.mimetype, response.get_data()))
+            response.headers['X-Cache'] = 'MISS'
+        return response
+
+    print(f"✅ Response cache enabled ({len(prefixes)} prefixes"
+          f"{', disk: ' + str(app.config['RESPONSE_CACHE_DIR']) if cache.disk else ''})")
+    return cache
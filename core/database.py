@@ -5,129 +5,527 @@ Handles database connection, initialization, and schema
 
 import sqlite3
 import os
-from flask import g
+import queue
+import threading
+import time
+from pathlib import Path
+from flask import g, current_app
+from core.slow_query import TimedConnection, flush_slow_queries
+from core.backends import SQLiteBackend, PostgresBackend
 
 DB_PATH = os.path.join('database', 'sunter.db')
+SNAPSHOT_PATH = os.path.join('database', 'sunter_snapshot.db')
+
+
+def _config(key, default=None):
+    """Read app config value (fallback ke default di luar app context)"""
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+def get_db_path():
+    """Path database utama (read-write)"""
+    return str(_config('DATABASE_PATH') or DB_PATH)
+
+
+# ==========================================
+# BACKEND (SQLITE DEFAULT / POSTGRESQL)
+# ==========================================
+
+_backend = None
+_backend_key = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Backend aktif sesuai config DATABASE_BACKEND ('sqlite' atau 'postgres').
+    Dibuat ulang jika config berubah (mis. DATABASE_PATH di test).
+    """
+    global _backend, _backend_key
+    
+    name = _config('DATABASE_BACKEND', 'sqlite')
+    if name == 'postgres':
+        key = (name, _config('DATABASE_URL'), _config('DATABASE_POOL_SIZE', 10))
+    else:
+        key = (name, get_db_path(), _config('STATEMENT_CACHE_SIZE', 256))
+    
+    with _backend_lock:
+        if _backend_key != key:
+            if _backend is not None:
+                _backend.close()
+            if name == 'postgres':
+                _backend = PostgresBackend(key[1], maxconn=key[2])
+            else:
+                _backend = SQLiteBackend(key[1], cached_statements=key[2])
+            _backend_key = key
+        return _backend
+
+
+def is_sqlite():
+    return _config('DATABASE_BACKEND', 'sqlite') != 'postgres'
+
 
 def get_db():
     """Get database connection"""
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DB_PATH)
-        db.row_factory = sqlite3.Row
-        db.execute("PRAGMA foreign_keys = ON")
+        db = g._database = get_backend().connect()
     return db
 
+
+def bulk_insert(db, table, columns, rows, replace=False):
+    """
+    Bulk insert rows (iterable of tuple) ke table.
+    SQLite: executemany, PostgreSQL: COPY. Return jumlah baris.
+    """
+    return get_backend().bulk_insert(db, table, columns, rows, replace=replace)
+
+
+def map_nomen_ids(db, nomens):
+    """
+    Map nomen (text) → nomen_dict.id secara bulk; nomen baru didaftarkan.
+    Return list id dengan urutan yang sama seperti input.
+    """
+    nomens = [str(n) for n in nomens]
+    
+    db.execute('CREATE TEMP TABLE IF NOT EXISTS nomen_stage (nomen TEXT PRIMARY KEY)')
+    db.execute('DELETE FROM nomen_stage')
+    bulk_insert(db, 'nomen_stage', ['nomen'], ((n,) for n in sorted(set(nomens))))
+    
+    db.execute('''
+        INSERT INTO nomen_dict (nomen)
+        SELECT s.nomen FROM nomen_stage s
+        LEFT JOIN nomen_dict d ON d.nomen = s.nomen
+        WHERE d.id IS NULL
+    ''')
+    ids = dict(db.execute('''
+        SELECT d.nomen, d.id FROM nomen_stage s
+        JOIN nomen_dict d ON d.nomen = s.nomen
+    ''').fetchall())
+    return [ids[n] for n in nomens]
+
+
+# ==========================================
+# READ-ONLY CONNECTIONS (DASHBOARD)
+# ==========================================
+
+class _ReadOnlyConnection(TimedConnection):
+    """TimedConnection yang menyimpan path & generation asalnya (untuk pool)"""
+    _pool_path = None
+    _pool_generation = 0
+
+
+class ReadOnlyPool:
+    """
+    Pool koneksi read-only untuk endpoint dashboard.
+
+    Koneksi dibuka dengan URI mode=ro dan PRAGMA query_only, tanpa
+    PRAGMA foreign_keys (reader tidak pernah menulis). Setiap kali
+    snapshot di-refresh, generation naik dan koneksi lama dibuang
+    saat dikembalikan ke pool.
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _connect(self, path):
+        uri = Path(path).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               factory=_ReadOnlyConnection,
+                               cached_statements=_config('STATEMENT_CACHE_SIZE', 256))
+        conn._pool_path = path
+        conn._pool_generation = self._generation
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def acquire(self, path):
+        """Ambil koneksi idle untuk path ini, atau buka koneksi baru"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn._pool_generation == self._generation and conn._pool_path == path:
+                return conn
+            conn.close()
+        
+        return self._connect(path)
+
+    def release(self, conn):
+        """Kembalikan koneksi ke pool (atau tutup jika pool penuh / basi)"""
+        with self._lock:
+            keep = (conn._pool_generation == self._generation
+                    and self._idle.qsize() < self.size)
+        if keep:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def invalidate(self):
+        """Tandai semua koneksi idle sebagai basi (dipanggil setelah refresh snapshot)"""
+        with self._lock:
+            self._generation += 1
+
+
+_read_pool = ReadOnlyPool()
+
+
+def get_read_path():
+    """Path yang dibaca oleh reader: snapshot jika aktif, selain itu DB utama"""
+    if _config('READ_SNAPSHOT_ENABLED', False):
+        snapshot = str(_config('READ_SNAPSHOT_PATH') or SNAPSHOT_PATH)
+        if os.path.exists(snapshot):
+            return snapshot
+    return get_db_path()
+
+
+def get_read_db():
+    """Get read-only database connection (dashboard endpoints)"""
+    if not is_sqlite():
+        return get_db()  # PostgreSQL: MVCC, reader tidak butuh snapshot/pool terpisah
+    
+    db = getattr(g, '_read_database', None)
+    if db is None:
+        _read_pool.size = _config('READ_POOL_SIZE', _read_pool.size)
+        db = g._read_database = _read_pool.acquire(get_read_path())
+    return db
+
+
 def close_db(exception):
     """Close database connection"""
-    db = getattr(g, '_database', None)
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        flush_slow_queries(db, get_db_path())
+        get_backend().release(db)
+    
+    read_db = g.pop('_read_database', None)
+    if read_db is not None:
+        flush_slow_queries(read_db, get_db_path())
+        _read_pool.release(read_db)
+
+
+# ==========================================
+# SNAPSHOT (SQLITE ONLINE BACKUP API)
+# ==========================================
+
+_snapshot_lock = threading.Lock()
+
+
+def refresh_snapshot(force=False, wait=False):
+    """
+    Salin DB utama ke file snapshot memakai sqlite3 online backup API.
+
+    Snapshot ditulis ke file sementara lalu di-rename secara atomik,
+    jadi reader yang sedang berjalan tetap membaca snapshot lama; file
+    sementara dihapus jika salinan gagal. wait=True menunggu refresh lain
+    yang sedang berjalan (default: dilewati). Return True jika snapshot
+    diperbarui.
+    """
+    if not is_sqlite():
+        return False
+    if not _config('READ_SNAPSHOT_ENABLED', False) and not force:
+        return False
+    
+    src_path = get_db_path()
+    dst_path = str(_config('READ_SNAPSHOT_PATH') or SNAPSHOT_PATH)
+    
+    if not os.path.exists(src_path):
+        return False
+    
+    if not _snapshot_lock.acquire(blocking=wait):
+        return False  # Refresh lain sedang berjalan
+    
+    try:
+        tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+        started = time.time()
+        
+        try:
+            src = sqlite3.connect(src_path)
+            dst = sqlite3.connect(tmp_path)
+            try:
+                # Salin per 1024 page supaya writer tidak tertahan lama
+                src.backup(dst, pages=1024, sleep=0.005)
+            finally:
+                dst.close()
+                src.close()
+            os.replace(tmp_path, dst_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        _read_pool.invalidate()
+        
+        print(f"📸 Snapshot refreshed in {time.time() - started:.2f}s → {dst_path}")
+        return True
+    finally:
+        _snapshot_lock.release()
+
+
+def refresh_snapshot_async(app):
+    """
+    Dipanggil setelah upload: refresh snapshot di background (seperti
+    backup_async), supaya response upload tidak menunggu salinan DB
+    """
+    if not app.config.get('READ_SNAPSHOT_ENABLED', False):
+        return None
+    if app.config.get('DATABASE_BACKEND', 'sqlite') == 'postgres':
+        return None
+    
+    def _run():
+        try:
+            with app.app_context():
+                # Menunggu refresh yang sedang berjalan: salinannya mungkin belum memuat upload ini
+                refresh_snapshot(wait=True)
+        except Exception as e:
+            print(f"⚠️  Snapshot refresh failed: {e}")
+    
+    thread = threading.Thread(target=_run, name='snapshot-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+def snapshot_is_stale():
+    """True jika DB utama (atau WAL-nya) lebih baru dari snapshot"""
+    dst_path = str(_config('READ_SNAPSHOT_PATH') or SNAPSHOT_PATH)
+    if not os.path.exists(dst_path):
+        return True
+    
+    snapshot_mtime = os.path.getmtime(dst_path)
+    src_path = get_db_path()
+    for path in (src_path, src_path + '-wal'):
+        if os.path.exists(path) and os.path.getmtime(path) > snapshot_mtime:
+            return True
+    return False
+
+
+def start_snapshot_refresher(app):
+    """
+    Jalankan thread background yang me-refresh snapshot secara berkala.
+    Hanya refresh jika DB utama berubah sejak snapshot terakhir.
+    """
+    if not app.config.get('READ_SNAPSHOT_ENABLED', False):
+        return None
+    if app.config.get('DATABASE_BACKEND', 'sqlite') == 'postgres':
+        return None
+    
+    interval = app.config.get('READ_SNAPSHOT_INTERVAL', 300)
+    
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    if snapshot_is_stale():
+                        refresh_snapshot()
+            except Exception as e:
+                print(f"⚠️  Snapshot refresh failed: {e}")
+            time.sleep(interval)
+    
+    thread = threading.Thread(target=_loop, name='snapshot-refresher', daemon=True)
+    thread.start()
+    print(f"✅ Snapshot refresher started (every {interval}s)")
+    return thread
+
+# ==========================================
+# SCHEMA
+# ==========================================
+
+def _table_sql(cursor, table):
+    row = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def create_fact_tables(cursor):
+    """
+    CREATE TABLE tabel fakta MC / collection / master bayar / mainbill /
+    ARDEBT (juga dipakai core/migrations.py saat rebuild skema lama)
+    """
+    # Master Pelanggan (satu baris per nomen per periode)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS master_pelanggan (
+            nomen TEXT NOT NULL,
+            nomen_id INTEGER,
+            nama TEXT,
+            alamat TEXT,
+            rayon TEXT,
+            pc TEXT,
+            ez TEXT,
+            pcez TEXT,
+            block TEXT,
+            zona_novak TEXT,
+            tarif TEXT,
+            target_mc REAL DEFAULT 0,
+            kubikasi REAL DEFAULT 0,
+            periode TEXT,
+            periode_bulan INTEGER NOT NULL,
+            periode_tahun INTEGER NOT NULL,
+            upload_id INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (periode_tahun, periode_bulan, nomen)
+        )
+    ''')
+    
+    # Collection Harian
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS collection_harian (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nomen TEXT,
+            nomen_id INTEGER,
+            tgl_bayar TEXT,
+            jumlah_bayar REAL DEFAULT 0,
+            volume_air REAL DEFAULT 0,
+            tipe_bayar TEXT DEFAULT 'current',
+            bill_period TEXT,
+            periode_bulan INTEGER,
+            periode_tahun INTEGER,
+            upload_id INTEGER,
+            sumber_file TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(nomen, tgl_bayar, jumlah_bayar, bill_period)
+        )
+    ''')
+    
+    # Master Bayar
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS master_bayar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nomen TEXT,
+            nomen_id INTEGER,
+            tgl_bayar TEXT,
+            jumlah_bayar REAL DEFAULT 0,
+            periode_bulan INTEGER,
+            periode_tahun INTEGER,
+            upload_id INTEGER,
+            periode TEXT,
+            sumber_file TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # MainBill
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mainbill (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nomen TEXT,
+            nomen_id INTEGER,
+            tgl_tagihan TEXT,
+            total_tagihan REAL DEFAULT 0,
+            pcezbk TEXT,
+            tarif TEXT,
+            periode_bulan INTEGER,
+            periode_tahun INTEGER,
+            upload_id INTEGER,
+            periode TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Ardebt
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ardebt (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nomen TEXT,
+            nomen_id INTEGER,
+            saldo_tunggakan REAL DEFAULT 0,
+            pc TEXT,
+            ez TEXT,
+            umur_piutang INTEGER,
+            periode_bulan INTEGER,
+            periode_tahun INTEGER,
+            upload_id INTEGER,
+            periode TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _add_missing_columns(cursor, table, columns):
+    """ALTER TABLE ADD COLUMN untuk kolom yang belum ada, return nama kolom yang ditambah"""
+    existing = {r[1] for r in cursor.execute(f"PRAGMA table_info({table})")}
+    added = []
+    for name, decl in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+            added.append(name)
+    return added
+
+
+# Tabel fakta yang menyimpan nomen_id (integer surrogate dari nomen_dict)
+_NOMEN_TABLES = ['master_pelanggan', 'collection_harian', 'master_bayar', 'mainbill', 'ardebt', 'sbrs_data']
+
+# Index lama berbasis nomen TEXT, diganti index nomen_id
+_TEXT_NOMEN_INDEXES = [
+    'idx_coll_nomen', 'idx_mb_nomen', 'idx_sbrs_nomen', 'idx_master_nomen', 'idx_ardebt_nomen',
+    'idx_coll_periode', 'idx_mb_periode', 'idx_mainbill_periode', 'idx_ardebt_periode',
+    'idx_sbrs_periode_nomen',
+]
+
+
+def _backfill_nomen_ids(cursor, table):
+    """Daftarkan nomen ke nomen_dict dan isi nomen_id yang masih kosong"""
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO nomen_dict (nomen)
+        SELECT DISTINCT nomen FROM {table} WHERE nomen IS NOT NULL ORDER BY nomen
+    ''')
+    cursor.execute(f'''
+        UPDATE {table}
+        SET nomen_id = (SELECT d.id FROM nomen_dict d WHERE d.nomen = {table}.nomen)
+        WHERE nomen_id IS NULL AND nomen IS NOT NULL
+    ''')
+    print(f"🔧 Backfilled nomen_id on {table} ({cursor.rowcount:,} rows)")
+
+
+def _init_postgres(db):
+    """Buat schema PostgreSQL dari core/schema_postgres.sql"""
+    schema_path = os.path.join(os.path.dirname(__file__), 'schema_postgres.sql')
+    with open(schema_path, encoding='utf-8') as f:
+        statements = [s.strip() for s in f.read().split(';') if s.strip()]
+    
+    with db.raw.cursor() as cur:
+        for statement in statements:
+            cur.execute(statement)
+    db.commit()
+    print("✅ Database schema initialized (PostgreSQL)")
+
 
 def init_db(app):
     """Initialize database schema"""
     with app.app_context():
         db = get_db()
-        cursor = db.cursor()
         
-        # Master Pelanggan
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS master_pelanggan (
-                nomen TEXT PRIMARY KEY,
-                nama TEXT,
-                alamat TEXT,
-                rayon TEXT,
-                pc TEXT,
-                ez TEXT,
-                pcez TEXT,
-                block TEXT,
-                zona_novak TEXT,
-                tarif TEXT,
-                target_mc REAL DEFAULT 0,
-                kubikasi REAL DEFAULT 0,
-                periode TEXT,
-                periode_bulan INTEGER,
-                periode_tahun INTEGER,
-                upload_id INTEGER,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        if not is_sqlite():
+            _init_postgres(db)
+            return
         
-        # Collection Harian
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS collection_harian (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nomen TEXT,
-                tgl_bayar TEXT,
-                jumlah_bayar REAL DEFAULT 0,
-                volume_air REAL DEFAULT 0,
-                tipe_bayar TEXT DEFAULT 'current',
-                bill_period TEXT,
-                periode_bulan INTEGER,
-                periode_tahun INTEGER,
-                upload_id INTEGER,
-                sumber_file TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(nomen) REFERENCES master_pelanggan(nomen),
-                UNIQUE(nomen, tgl_bayar, jumlah_bayar, bill_period)
-            )
-        ''')
+        cursor = db.cursor()
         
-        # Master Bayar
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS master_bayar (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nomen TEXT,
-                tgl_bayar TEXT,
-                jumlah_bayar REAL DEFAULT 0,
-                periode_bulan INTEGER,
-                periode_tahun INTEGER,
-                upload_id INTEGER,
-                periode TEXT,
-                sumber_file TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(nomen) REFERENCES master_pelanggan(nomen)
-            )
-        ''')
+        # WAL: reader tidak memblokir writer. auto_vacuum INCREMENTAL hanya
+        # berlaku untuk database baru (database lama: flask db-maintenance vacuum-full)
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("PRAGMA journal_mode = WAL")
         
-        # MainBill
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mainbill (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nomen TEXT,
-                tgl_tagihan TEXT,
-                total_tagihan REAL DEFAULT 0,
-                pcezbk TEXT,
-                tarif TEXT,
-                periode_bulan INTEGER,
-                periode_tahun INTEGER,
-                upload_id INTEGER,
-                periode TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(nomen) REFERENCES master_pelanggan(nomen)
-            )
-        ''')
+        # Migrasi skema lama (core/migrations.py): satu transaksi BEGIN IMMEDIATE,
+        # dilewati jika PRAGMA user_version sudah terbaru
+        from core.migrations import migrate_legacy_schema
+        legacy = migrate_legacy_schema(db)
         
-        # Ardebt
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ardebt (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nomen TEXT,
-                saldo_tunggakan REAL DEFAULT 0,
-                periode_bulan INTEGER,
-                periode_tahun INTEGER,
-                upload_id INTEGER,
-                periode TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(nomen) REFERENCES master_pelanggan(nomen)
-            )
-        ''')
+        create_fact_tables(cursor)
         
         # SBRS Data
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sbrs_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 nomen TEXT NOT NULL,
+                nomen_id INTEGER,
                 nama TEXT,
                 alamat TEXT,
                 rayon TEXT,
@@ -204,13 +602,215 @@ def init_db(app):
             )
         ''')
         
+        # Nomen Dictionary: nomen TEXT → id INTEGER untuk join antar tabel fakta
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS nomen_dict (
+                id INTEGER PRIMARY KEY,
+                nomen TEXT NOT NULL UNIQUE,
+                data_version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        # data_version per pelanggan: versi upload/arsip/analisa terakhir yang menyentuhnya
+        _add_missing_columns(cursor, 'nomen_dict', [('data_version', 'INTEGER NOT NULL DEFAULT 0')])
+        
+        _add_missing_columns(cursor, 'ardebt', [
+            ('pc', 'TEXT'), ('ez', 'TEXT'), ('umur_piutang', 'INTEGER')
+        ])
+        
+        # nomen_id untuk database lama: kolom baru / tabel hasil migrasi di-backfill sekali
+        for table in _NOMEN_TABLES:
+            if _add_missing_columns(cursor, table, [('nomen_id', 'INTEGER')]) or table in legacy:
+                _backfill_nomen_ids(cursor, table)
+        
+        # Ringkasan KPI per periode / per rayon + cube (core/summary.py), di-refresh saat upload
+        summary_created = any(_table_sql(cursor, t) is None for t in ('kpi_periode', 'agg_cube', 'collection_daily', 'paid_set'))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS kpi_periode (
+                periode_tahun INTEGER NOT NULL,
+                periode_bulan INTEGER NOT NULL,
+                total_pelanggan INTEGER NOT NULL DEFAULT 0,
+                jumlah_pelanggan INTEGER NOT NULL DEFAULT 0,
+                target_mc REAL NOT NULL DEFAULT 0,
+                collection_current REAL NOT NULL DEFAULT 0,
+                collection_tunggakan REAL NOT NULL DEFAULT 0,
+                collection_total REAL NOT NULL DEFAULT 0,
+                sudah_bayar INTEGER NOT NULL DEFAULT 0,
+                belum_bayar INTEGER NOT NULL DEFAULT 0,
+                unpaid_amount REAL NOT NULL DEFAULT 0,
+                total_tunggakan REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (periode_tahun, periode_bulan)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS kpi_periode_rayon (
+                periode_tahun INTEGER NOT NULL,
+                periode_bulan INTEGER NOT NULL,
+                rayon TEXT,
+                total_pelanggan INTEGER NOT NULL DEFAULT 0,
+                jumlah_pelanggan INTEGER NOT NULL DEFAULT 0,
+                target_mc REAL NOT NULL DEFAULT 0,
+                sudah_bayar INTEGER NOT NULL DEFAULT 0,
+                realisasi REAL NOT NULL DEFAULT 0,
+                belum_bayar INTEGER NOT NULL DEFAULT 0,
+                unpaid_amount REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Cube agregasi di grain (periode, rayon, pc, ez, tarif)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agg_cube (
+                periode_tahun INTEGER NOT NULL,
+                periode_bulan INTEGER NOT NULL,
+                rayon TEXT,
+                pc TEXT,
+                ez TEXT,
+                tarif TEXT,
+                total_pelanggan INTEGER NOT NULL DEFAULT 0,
+                target REAL NOT NULL DEFAULT 0,
+                realisasi REAL NOT NULL DEFAULT 0,
+                realisasi_current REAL NOT NULL DEFAULT 0,
+                realisasi_tunggakan REAL NOT NULL DEFAULT 0,
+                volume REAL NOT NULL DEFAULT 0,
+                outstanding REAL NOT NULL DEFAULT 0,
+                pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+                pelanggan_tidak_bayar INTEGER NOT NULL DEFAULT 0,
+                unpaid_amount REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        # Seri collection harian + kumulatif per periode
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collection_daily (
+                periode_tahun INTEGER NOT NULL,
+                periode_bulan INTEGER NOT NULL,
+                tgl_bayar TEXT NOT NULL,
+                hari INTEGER,
+                transaksi INTEGER NOT NULL DEFAULT 0,
+                pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+                current REAL NOT NULL DEFAULT 0,
+                tunggakan REAL NOT NULL DEFAULT 0,
+                total REAL NOT NULL DEFAULT 0,
+                cum_current REAL NOT NULL DEFAULT 0,
+                cum_tunggakan REAL NOT NULL DEFAULT 0,
+                cum_total REAL NOT NULL DEFAULT 0,
+                cum_pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+                target REAL NOT NULL DEFAULT 0,
+                cum_pct_target REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (periode_tahun, periode_bulan, tgl_bayar)
+            )
+        ''')
+        
+        # nomen_id yang sudah bayar per periode (int64 terurut, lihat core/paidset.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS paid_set (
+                periode_tahun INTEGER NOT NULL,
+                periode_bulan INTEGER NOT NULL,
+                pelanggan INTEGER NOT NULL DEFAULT 0,
+                nomen_ids BLOB NOT NULL,
+                data_version INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (periode_tahun, periode_bulan)
+            )
+        ''')
+        _add_missing_columns(cursor, 'paid_set', [('data_version', 'INTEGER NOT NULL DEFAULT 0')])
+        
+        # Versi data (naik setiap upload / arsip / restore), kunci cache
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                source TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Index pencarian pelanggan (FTS5, lihat core/search.py)
+        from core.search import create_customer_fts
+        fts_created = create_customer_fts(cursor)
+        
+        # Time-series per pelanggan untuk sparkline / trend (lihat core/series.py)
+        from core.series import create_customer_series
+        series_created = create_customer_series(cursor)
+        
+        # Slow Query Log
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                logged_at TEXT NOT NULL,
+                endpoint TEXT,
+                duration_ms REAL NOT NULL,
+                sql TEXT NOT NULL,
+                params TEXT,
+                query_plan TEXT
+            )
+        ''')
+        
+        # Maintenance Log (core/maintenance.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS maintenance_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                run_at TEXT NOT NULL,
+                duration_ms REAL NOT NULL,
+                page_count_before INTEGER,
+                page_count_after INTEGER,
+                freelist_before INTEGER,
+                freelist_after INTEGER,
+                detail TEXT
+            )
+        ''')
+        
         # Indexes
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_coll_tgl ON collection_harian(tgl_bayar)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_coll_nomen ON collection_harian(nomen)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_master_rayon ON master_pelanggan(rayon)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mb_nomen ON master_bayar(nomen)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sbrs_nomen ON sbrs_data(nomen)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sbrs_periode ON sbrs_data(periode_bulan, periode_tahun)')
+        cursor.execute('DROP INDEX IF EXISTS idx_sbrs_periode')
+        for index_name in _TEXT_NOMEN_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+        
+        # Index periode di setiap tabel fakta: (tahun, bulan, nomen_id) melayani
+        # filter periode, ORDER BY periode terbaru, dan join/anti-join per periode
+        cursor.execute('DROP INDEX IF EXISTS idx_master_periode')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_master_periode_rayon ON master_pelanggan(periode_tahun, periode_bulan, rayon, nomen)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_master_periode_nid ON master_pelanggan(periode_tahun, periode_bulan, nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_coll_periode_nid ON collection_harian(periode_tahun, periode_bulan, nomen_id)')
+        # Urutan list collection/belum bayar (keyset pagination, lihat core/pagination.py)
+        # (sort key NULL-safe: COALESCE sama persis dengan ORDER BY di core/queries.py)
+        cursor.execute('DROP INDEX IF EXISTS idx_coll_periode_tgl')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_coll_periode_sort ON collection_harian(periode_tahun, periode_bulan, COALESCE(tgl_bayar, ''), COALESCE(jumlah_bayar, 0), id)")
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mb_periode_nid ON master_bayar(periode_tahun, periode_bulan, nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mainbill_periode_nid ON mainbill(periode_tahun, periode_bulan, nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ardebt_periode_nid ON ardebt(periode_tahun, periode_bulan, nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sbrs_periode_nid ON sbrs_data(periode_tahun, periode_bulan, nomen_id)')
+        
+        # Lookup per pelanggan (history) lewat nomen_id
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_master_nid ON master_pelanggan(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_coll_nid ON collection_harian(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mb_nid ON master_bayar(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ardebt_nid ON ardebt(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sbrs_nid ON sbrs_data(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_mainbill_nid ON mainbill(nomen_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analisa_nomen ON analisa_manual(nomen, updated_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_slow_queries_duration ON slow_queries(duration_ms)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_kpi_rayon_periode ON kpi_periode_rayon(periode_tahun, periode_bulan, rayon)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cube_periode ON agg_cube(periode_tahun, periode_bulan, pc, ez)')
+        
+        # Database lama: isi ringkasan KPI sekali dari tabel fakta
+        if summary_created:
+            from core.summary import rebuild_kpi_summary
+            rebuilt = rebuild_kpi_summary(db)
+            if rebuilt:
+                print(f"🔧 Built KPI summary for {len(rebuilt)} periode(s)")
+        
+        if fts_created:
+            from core.search import rebuild_customer_fts
+            indexed = rebuild_customer_fts(db)
+            if indexed:
+                print(f"🔧 Built customer search index ({indexed:,} pelanggan)")
+        
+        if series_created:
+            from core.series import rebuild_customer_series
+            rows = rebuild_customer_series(db)
+            if rows:
+                print(f"🔧 Built customer series ({rows:,} baris)")
         
         db.commit()
         print("✅ Database schema initialized")
@@ -0,0 +1,79 @@
+"""
+Export Module
+Tulis rows query ke CSV / XLSX secara streaming
+
+Export list penuh (ratusan ribu baris) tidak boleh lewat jsonify: setiap
+baris jadi dict dan seluruh body ditampung di memori worker. Writer di
+sini menerima iterator batch rows (core.queries.iter_rows) dan
+menghasilkan potongan bytes untuk Response streaming (chunked transfer):
+
+- CSV: satu potongan per batch, memori konstan.
+- XLSX: workbook openpyxl write_only — baris langsung ditulis ke file
+  sementara worksheet (bukan objek cell di memori). Format zip baru
+  lengkap setelah save, jadi file .xlsx disusun di file sementara lalu
+  dikirim per STREAM_BYTES.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from openpyxl import Workbook
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+STREAM_BYTES = 64 * 1024
+
+
+def csv_chunks(columns, batches):
+    """Yield bytes CSV (header + satu potongan per batch rows)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM supaya Excel membaca UTF-8 dengan benar
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def xlsx_chunks(columns, batches, title='Data', chunk_size=STREAM_BYTES):
+    """Yield bytes file XLSX (workbook write_only, disusun di file sementara)"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(columns)
+    for rows in batches:
+        for row in rows:
+            sheet.append(list(row))
+
+    with tempfile.TemporaryFile() as out:
+        workbook.save(out)
+        out.seek(0)
+        while True:
+            chunk = out.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_chunks(fmt, columns, batches, title='Data'):
+    if fmt == 'xlsx':
+        return xlsx_chunks(columns, batches, title=title)
+    return csv_chunks(columns, batches)
+
+
+def export_filename(prefix, bulan, tahun, fmt, rayon=None):
+    parts = [prefix, f'{tahun:04d}{bulan:02d}']
+    if rayon:
+        parts.append(f'rayon{rayon}')
+    parts.append(datetime.now().strftime('%Y%m%d%H%M'))
+    return '_'.join(parts) + '.' + fmt
@@ -0,0 +1,148 @@
+"""
+HTTP Conditional GET & Compression Module
+ETag / Last-Modified dari data_version + gzip/brotli untuk response JSON
+
+Dashboard mobile polling endpoint yang sama berulang kali lewat koneksi
+seluler. Semua GET /api/* (kecuali HTTP_ETAG_EXCLUDE) mendapat:
+- ETag lemah = hash(path, args, data_version) dan Last-Modified = waktu
+  data_version terakhir naik. If-None-Match / If-Modified-Since yang
+  cocok langsung dijawab 304 di before_request — handler tidak
+  dijalankan, satu-satunya query adalah lookup data_version (PK).
+- Cache-Control: no-cache, jadi browser selalu revalidasi (murah, 304).
+
+Tulis analisa tidak menaikkan data_version (hanya nomen_dict.data_version
+lewat touch_nomen), jadi /api/analisa dikecualikan dan ETag profil
+pelanggan (/api/customer/<nomen>/profile, memuat analisa) ikut versi per
+nomen.
+
+Response JSON >= COMPRESS_MIN_BYTES dikompres brotli (jika modul brotli
+terpasang dan diminta client) atau gzip.
+"""
+
+import gzip
+import re
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+
+from core.cache import cache_key, request_data_version
+from core.database import get_db, get_db_path
+from core.queries import fetch_one
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_EXCLUDE = ('/api/internal', '/api/upload', '/api/analisa')
+
+_PROFILE_PATH = re.compile(r'^/api/customer/([^/]+)/profile$')
+
+
+def _last_modified(version):
+    # Versi >= epoch milidetik setelah bump pertama (lihat core/versioning.py)
+    if not version:
+        return None
+    return datetime.fromtimestamp(version // 1000, tz=timezone.utc)
+
+
+def _nomen_version():
+    """nomen_dict.data_version untuk request profil pelanggan (None untuk path lain)"""
+    match = _PROFILE_PATH.match(request.path)
+    if match is None:
+        return None
+    # Profil dibaca dari get_db() (bukan snapshot), versi nomen juga
+    row = fetch_one(get_db(), 'profile_nomen', (match.group(1),))
+    return int(row['data_version'] or 0) if row else 0
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified and last_modified <= since)
+
+
+def _choose_encoding(app):
+    accept = request.accept_encodings
+    if brotli is not None and app.config.get('COMPRESS_BROTLI', True) and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_body(data, encoding, level=5, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=level)
+
+
+def init_http_cache(app):
+    """
+    Pasang ETag/304 dan kompresi untuk /api/*. Dipanggil sebelum
+    init_cache() supaya after_request kompresi jalan setelah cache
+    response menyimpan body asli.
+    """
+    exclude = tuple(app.config.get('HTTP_ETAG_EXCLUDE') or DEFAULT_EXCLUDE)
+
+    def _conditional():
+        return (app.config.get('HTTP_ETAG_ENABLED', True) and request.method == 'GET'
+                and request.path.startswith('/api/') and not request.path.startswith(exclude))
+
+    @app.before_request
+    def _http_conditional_get():
+        if not _conditional():
+            return None
+        version = request_data_version()
+        if version is None:
+            return None
+
+        nomen_version = _nomen_version()
+        if nomen_version is not None:
+            etag = cache_key(request.path, request.args, (version, nomen_version), get_db_path())[:20]
+            last_modified = _last_modified(max(version, nomen_version))
+        else:
+            etag = cache_key(request.path, request.args, version, get_db_path())[:20]
+            last_modified = _last_modified(version)
+        g._http_validators = (etag, last_modified)
+
+        if not _not_modified(etag, last_modified):
+            return None
+        response = current_app.response_class(status=304)
+        _set_validators(response, etag, last_modified)
+        return response
+
+    def _set_validators(response, etag, last_modified):
+        response.set_etag(etag, weak=True)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = 'no-cache'
+
+    @app.after_request
+    def _http_finalize(response):
+        validators = g.pop('_http_validators', None)
+        if validators is not None and response.status_code == 200:
+            _set_validators(response, *validators)
+
+        if not app.config.get('COMPRESS_ENABLED', True) or not request.path.startswith('/api/'):
+            return response
+        if (response.status_code != 200 or not response.is_json or response.is_streamed
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < app.config.get('COMPRESS_MIN_BYTES', 1024):
+            return response
+        encoding = _choose_encoding(app)
+        if encoding is None:
+            return response
+
+        response.set_data(compress_body(data, encoding,
+                                        level=app.config.get('COMPRESS_LEVEL', 5),
+                                        brotli_quality=app.config.get('COMPRESS_BROTLI_QUALITY', 4)))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return app
@@ -0,0 +1,311 @@
+"""
+Database Maintenance Module
+In-process scheduler untuk ANALYZE / PRAGMA optimize, incremental vacuum
+dan WAL checkpoint (SQLite saja)
+
+Loader mengganti satu periode penuh (DELETE + INSERT) setiap upload, jadi
+statistik planner cepat basi dan file database terfragmentasi. Satu
+thread background per proses menjalankan:
+- analyze     : setelah upload (ANALYZE tabel yang di-upload + PRAGMA optimize)
+- checkpoint  : berkala (PASSIVE), TRUNCATE saat idle
+- vacuum      : PRAGMA incremental_vacuum(N) saat idle dan freelist besar
+
+Setiap task dicatat di tabel maintenance_log (page_count & freelist
+sebelum/sesudah, durasi). Dengan beberapa worker gunicorn hanya satu
+proses yang menjalankan task (file lock non-blocking).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from core.database import get_db_path, is_sqlite
+from core.writer import write_lock
+
+# Thread scheduler bangun setiap TICK detik untuk cek jadwal
+TICK_SECONDS = 5
+
+
+def _page_stats(conn):
+    return (
+        conn.execute('PRAGMA page_count').fetchone()[0],
+        conn.execute('PRAGMA freelist_count').fetchone()[0],
+    )
+
+
+def _log(conn, task, started, before, after, detail=None):
+    duration_ms = (time.perf_counter() - started) * 1000
+    conn.execute('''
+        INSERT INTO maintenance_log
+        (task, run_at, duration_ms, page_count_before, page_count_after,
+         freelist_before, freelist_after, detail)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (task, time.strftime('%Y-%m-%d %H:%M:%S'), round(duration_ms, 2),
+          before[0], after[0], before[1], after[1], detail))
+    conn.commit()
+    return {
+        'task': task,
+        'duration_ms': round(duration_ms, 2),
+        'page_count': after[0],
+        'freelist': after[1],
+        'detail': detail
+    }
+
+
+# ==========================================
+# TASKS
+# ==========================================
+
+def run_analyze(conn, tables=None, analysis_limit=1000):
+    """
+    ANALYZE tabel yang baru di-upload (semua tabel jika tables kosong)
+    dengan analysis_limit supaya tetap cepat di tabel besar, lalu
+    PRAGMA optimize untuk sisanya.
+    """
+    started = time.perf_counter()
+    before = _page_stats(conn)
+
+    conn.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+    if tables:
+        for table in tables:
+            conn.execute(f'ANALYZE {table}')
+    else:
+        conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    conn.commit()
+
+    return _log(conn, 'analyze', started, before, _page_stats(conn),
+                ','.join(tables) if tables else None)
+
+
+def run_incremental_vacuum(conn, pages=2000):
+    """Kembalikan maksimal `pages` page kosong ke filesystem"""
+    started = time.perf_counter()
+    before = _page_stats(conn)
+
+    mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    if mode != 2:
+        return _log(conn, 'vacuum', started, before, before,
+                    'skipped: auto_vacuum != INCREMENTAL (run flask db-maintenance vacuum-full once)')
+
+    # executescript menjalankan statement sampai selesai; execute() di
+    # sqlite3 hanya satu step (= satu page) untuk PRAGMA tanpa hasil
+    conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+    return _log(conn, 'vacuum', started, before, _page_stats(conn), f'pages={pages}')
+
+
+def run_checkpoint(conn, mode='PASSIVE'):
+    """WAL checkpoint; detail = busy/log/checkpointed frames"""
+    started = time.perf_counter()
+    before = _page_stats(conn)
+
+    busy, log_frames, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    return _log(conn, 'checkpoint', started, before, _page_stats(conn),
+                f'{mode} busy={busy} log={log_frames} checkpointed={checkpointed}')
+
+
+def run_vacuum_full(conn):
+    """
+    VACUUM penuh + aktifkan auto_vacuum=INCREMENTAL (sekali saja untuk
+    database lama; memblokir writer selama berjalan)
+    """
+    started = time.perf_counter()
+    before = _page_stats(conn)
+
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    return _log(conn, 'vacuum_full', started, before, _page_stats(conn))
+
+
+# ==========================================
+# SCHEDULER
+# ==========================================
+
+class MaintenanceScheduler:
+    """
+    Scheduler sederhana di thread daemon. Endpoint mencatat aktivitas
+    lewat note_activity(); task berat hanya jalan jika tidak ada request
+    selama idle_seconds.
+    """
+
+    def __init__(self, db_path, checkpoint_interval=300, idle_seconds=120,
+                 vacuum_pages=2000, vacuum_min_free_pages=1000, lock_path=None):
+        self.db_path = db_path
+        self.checkpoint_interval = checkpoint_interval
+        self.idle_seconds = idle_seconds
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_min_free_pages = vacuum_min_free_pages
+        self.lock_path = lock_path or f"{db_path}.maintenance.lock"
+
+        self._pending_tables = set()
+        self._analyze_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.last_activity = time.time()
+        self.last_checkpoint = time.time()
+        self.last_results = {}
+
+    # ---- dipanggil dari request / upload ----
+
+    def note_activity(self):
+        self.last_activity = time.time()
+
+    def request_analyze(self, tables):
+        with self._lock:
+            self._pending_tables.update(tables)
+        self._analyze_requested.set()
+
+    # ---- loop ----
+
+    def is_idle(self):
+        return time.time() - self.last_activity >= self.idle_seconds
+
+    def _acquire_process_lock(self):
+        """Hanya satu worker per database yang menjalankan maintenance"""
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'w')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def run_pending(self, periodic=True):
+        """
+        Jalankan task yang jatuh tempo (satu putaran scheduler).
+        Analyze selalu dijalankan di worker yang menerima upload;
+        checkpoint & vacuum (periodic) hanya di worker pemegang lock.
+        """
+        if not os.path.exists(self.db_path):
+            return []
+        if not periodic and not self._analyze_requested.is_set():
+            return []
+
+        conn = self._connect()
+        try:
+            with write_lock(self.db_path):
+                results = self._run_tasks(conn, periodic)
+        finally:
+            conn.close()
+
+        for result in results:
+            self.last_results[result['task']] = result
+            print(f"🧹 Maintenance {result['task']}: {result['duration_ms']}ms "
+                  f"(pages={result['page_count']}, free={result['freelist']})")
+        return results
+
+    def _run_tasks(self, conn, periodic):
+        """Task yang jatuh tempo (dipanggil di bawah write_lock)"""
+        results = []
+        if self._analyze_requested.is_set():
+            self._analyze_requested.clear()
+            with self._lock:
+                tables, self._pending_tables = sorted(self._pending_tables), set()
+            results.append(run_analyze(conn, tables))
+
+        idle = self.is_idle()
+        if periodic and time.time() - self.last_checkpoint >= self.checkpoint_interval:
+            results.append(run_checkpoint(conn, 'TRUNCATE' if idle else 'PASSIVE'))
+            self.last_checkpoint = time.time()
+
+        incremental = conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+        if (periodic and idle and incremental
+                and _page_stats(conn)[1] >= self.vacuum_min_free_pages):
+            results.append(run_incremental_vacuum(conn, self.vacuum_pages))
+        return results
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._analyze_requested.wait(TICK_SECONDS)
+            if self._stop.is_set():
+                break
+            try:
+                self.run_pending(periodic=self._acquire_process_lock())
+            except Exception as e:
+                print(f"⚠️  Maintenance failed: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._analyze_requested.set()
+
+    def status(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'idle': self.is_idle(),
+            'pending_analyze': sorted(self._pending_tables),
+            'last_results': self.last_results,
+        }
+
+
+scheduler = None
+
+
+def schedule_analyze(tables):
+    """Dipanggil setelah upload: ANALYZE tabel yang berubah di background"""
+    if scheduler is not None:
+        scheduler.request_analyze(tables)
+
+
+def start_maintenance(app):
+    """Start scheduler (SQLite, MAINTENANCE_ENABLED) dan register CLI `flask db-maintenance`"""
+    global scheduler
+    import click
+
+    @app.cli.command('db-maintenance')
+    @click.argument('task', type=click.Choice(['analyze', 'vacuum', 'checkpoint', 'vacuum-full']))
+    def db_maintenance_command(task):
+        """Jalankan satu task maintenance sekarang"""
+        conn = sqlite3.connect(get_db_path(), timeout=30)
+        try:
+            # Koneksi sendiri: tahan batch writer selama task berjalan
+            with write_lock():
+                if task == 'analyze':
+                    result = run_analyze(conn, analysis_limit=0)
+                elif task == 'vacuum':
+                    result = run_incremental_vacuum(conn, app.config.get('MAINTENANCE_VACUUM_PAGES', 2000))
+                elif task == 'checkpoint':
+                    result = run_checkpoint(conn, 'TRUNCATE')
+                else:
+                    result = run_vacuum_full(conn)
+        finally:
+            conn.close()
+        print(result)
+
+    if not app.config.get('MAINTENANCE_ENABLED', False):
+        return None
+    with app.app_context():
+        if not is_sqlite():
+            return None  # PostgreSQL punya autovacuum sendiri
+        db_path = get_db_path()
+
+    scheduler = MaintenanceScheduler(
+        db_path,
+        checkpoint_interval=app.config.get('MAINTENANCE_CHECKPOINT_INTERVAL', 300),
+        idle_seconds=app.config.get('MAINTENANCE_IDLE_SECONDS', 120),
+        vacuum_pages=app.config.get('MAINTENANCE_VACUUM_PAGES', 2000),
+        vacuum_min_free_pages=app.config.get('MAINTENANCE_VACUUM_MIN_FREE_PAGES', 1000),
+    )
+    app.before_request(scheduler.note_activity)
+    scheduler.start()
+    print("✅ Maintenance scheduler started")
+    return scheduler
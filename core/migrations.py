@@ -0,0 +1,100 @@
+"""
+Schema Migration Module
+Migrasi skema lama SQLite (master_pelanggan dengan nomen sebagai PK tunggal,
+FK tabel anak ke master_pelanggan(nomen)) ke skema per periode.
+
+Rename, copy dan drop berjalan dalam satu transaksi BEGIN IMMEDIATE: jika
+proses mati di tengah jalan, SQLite me-rollback semuanya dan start
+berikutnya mengulang migrasi dari awal (tidak ada tabel *_legacy yatim
+atau data setengah tersalin). Versi skema disimpan di PRAGMA user_version
+dan dicek lebih dulu, jadi database yang sudah termigrasi tidak dipindai.
+"""
+
+from core.database import _table_sql, create_fact_tables
+
+# Naikkan setiap kali ada migrasi baru
+SCHEMA_VERSION = 1
+
+# Tabel fakta yang di-rebuild dari skema lama
+REBUILD_TABLES = ['master_pelanggan', 'collection_harian', 'master_bayar', 'mainbill', 'ardebt']
+
+
+def schema_version(db):
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _is_legacy_table(cursor, table):
+    """True jika tabel masih memakai skema lama"""
+    sql = _table_sql(cursor, table)
+    if sql is None:
+        return False
+    if table == 'master_pelanggan':
+        pk = [r[1] for r in cursor.execute("PRAGMA table_info(master_pelanggan)") if r[5]]
+        return pk == ['nomen']
+    return 'REFERENCES master_pelanggan' in sql
+
+
+def _legacy_tables(cursor):
+    return [t for t in REBUILD_TABLES if _is_legacy_table(cursor, t)]
+
+
+def _rebuild_tables(cursor, legacy):
+    """Rename tabel lama ke <table>_legacy, buat tabel baru, salin isi, drop tabel lama"""
+    for table in legacy:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}_legacy')
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_legacy')
+        # Index ikut pindah ke tabel _legacy; drop supaya namanya bisa dibuat ulang
+        for (index_name,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (f'{table}_legacy',)
+        ).fetchall():
+            cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+    create_fact_tables(cursor)
+
+    for table in legacy:
+        new_cols = [r[1] for r in cursor.execute(f"PRAGMA table_info({table})")]
+        old_cols = {r[1] for r in cursor.execute(f"PRAGMA table_info({table}_legacy)")}
+        cols = ', '.join(c for c in new_cols if c in old_cols)
+        cursor.execute(f'INSERT OR IGNORE INTO {table} ({cols}) SELECT {cols} FROM {table}_legacy')
+
+    for table in legacy:
+        cursor.execute(f'DROP TABLE {table}_legacy')
+
+
+def migrate_legacy_schema(db):
+    """
+    Jalankan migrasi skema lama jika user_version < SCHEMA_VERSION.
+    Return list tabel yang dimigrasi (kosong jika tidak ada).
+    """
+    if db.in_transaction:
+        db.commit()
+    if schema_version(db) >= SCHEMA_VERSION:
+        return []
+
+    cursor = db.cursor()
+    legacy = _legacy_tables(cursor)
+    if not legacy:
+        db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        return []
+
+    # foreign_keys tidak bisa diubah di dalam transaksi
+    db.execute('PRAGMA foreign_keys = OFF')
+    try:
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            # Dicek ulang setelah lock didapat: proses lain mungkin sudah selesai migrasi
+            legacy = _legacy_tables(cursor) if schema_version(db) < SCHEMA_VERSION else []
+            if legacy:
+                _rebuild_tables(cursor, legacy)
+            db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    finally:
+        db.execute('PRAGMA foreign_keys = ON')
+
+    for table in legacy:
+        print(f"🔧 Migrated {table} to new schema")
+    return legacy
@@ -0,0 +1,40 @@
+"""
+Pagination Module
+Cursor keyset (opaque) untuk list endpoint yang panjang
+
+LIMIT/OFFSET membuat SQLite membaca lalu membuang semua baris sebelum
+offset, jadi halaman ke-2000 jauh lebih lambat dari halaman pertama.
+Cursor menyimpan periode + sort key baris terakhir halaman sebelumnya;
+halaman berikutnya mulai tepat setelah key itu lewat index
+(WHERE (key...) < (?...)), biayanya konstan berapapun dalamnya. Sort
+key yang bisa NULL dibungkus COALESCE di query dan index-nya.
+
+Cursor = base64 url-safe dari JSON {"p": [tahun, bulan], "k": [...]}.
+Client tidak perlu (dan tidak boleh) membaca isinya.
+"""
+
+import base64
+import json
+
+
+class CursorError(ValueError):
+    """Cursor tidak valid (rusak, atau bukan untuk endpoint/periode ini)"""
+
+
+def encode_cursor(tahun, bulan, key):
+    payload = json.dumps({'p': [tahun, bulan], 'k': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, key_length):
+    """Kembalikan (tahun, bulan, key); CursorError jika token tidak valid"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        tahun, bulan = (int(v) for v in payload['p'])
+        key = payload['k']
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise CursorError('Invalid cursor')
+    if not isinstance(key, list) or len(key) != key_length:
+        raise CursorError('Invalid cursor')
+    return tahun, bulan, key
@@ -0,0 +1,433 @@
+"""
+Paid Set Module
+Himpunan nomen_id yang sudah bayar per periode (array int64 terurut)
+
+Endpoint belum bayar dulu menghitung anti-join MC vs collection
+(NOT IN / LEFT JOIN ... IS NULL) di setiap request, tiga kali untuk satu
+layar (list, summary, by-rayon). Sekarang:
+
+- paid_set: satu baris per periode berisi nomen_id distinct yang bayar
+  (BLOB int64 little-endian, terurut). Dibangun ulang bersama ringkasan
+  KPI di transaksi upload (refresh_kpi_periode).
+- frame MC per periode (nomen_id, kode rayon, target, saldo ARDEBT;
+  urut rayon, nomen) dimuat sekali per versi periode dan di-cache.
+  paid_set.data_version naik hanya saat periode itu di-rebuild (upload
+  MC / collection / ARDEBT periode itu) atau diarsip, jadi upload periode
+  lain dan tulis analisa tidak membuang frame.
+- Status bayar = np.searchsorted ke paid set; list, jumlah, total dan
+  breakdown per rayon diturunkan dari mask ~paid tanpa query tambahan.
+- Filter (rayon/pc/ez/tarif, target minimum, bucket umur piutang, ada
+  saldo, cari nomen/nama) dan sort whitelist dihitung sebagai mask/argsort
+  numpy di frame; hasilnya (view) di-cache per kombinasi.
+- Halaman keyset: cursor berisi sort key baris terakhir (nilai sort +
+  rayon, nomen), posisinya dicari dengan bisect/searchsorted (O(log n)).
+"""
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+from core.database import get_db_path
+from core.queries import fetch_all, fetch_one
+from core.versioning import current_data_version
+
+PAID_SET_DTYPE = np.dtype('<i8')
+
+# Jumlah frame periode yang disimpan per proses
+FRAME_CACHE_SIZE = 6
+
+# Maks nomen_id per query detail (IN (...))
+DETAIL_CHUNK = 500
+
+
+# ==========================================
+# BUILD / LOAD
+# ==========================================
+
+def _collection_ids(db, bulan, tahun):
+    rows = fetch_all(db, 'paid_set_source', (bulan, tahun))
+    return np.fromiter((row[0] for row in rows), dtype=PAID_SET_DTYPE, count=len(rows))
+
+
+def _next_periode_version(db, bulan, tahun):
+    """Versi baru periode: >= data_version global dan selalu naik dari versi periode sebelumnya"""
+    row = fetch_one(db, 'paid_set_version', (bulan, tahun))
+    previous = int(row[0]) if row else 0
+    return max(current_data_version(db), previous + 1)
+
+
+def build_paid_set(db, bulan, tahun):
+    """Bangun ulang paid_set satu periode dari collection_harian (tanpa commit)"""
+    ids = _collection_ids(db, bulan, tahun)
+    version = _next_periode_version(db, bulan, tahun)
+    db.execute('DELETE FROM paid_set WHERE periode_tahun = ? AND periode_bulan = ?', (tahun, bulan))
+    db.execute('''
+        INSERT INTO paid_set (periode_tahun, periode_bulan, pelanggan, nomen_ids, data_version)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (tahun, bulan, len(ids), ids.tobytes(), version))
+    return len(ids)
+
+
+def touch_paid_set(db, bulan, tahun):
+    """Naikkan versi periode tanpa rebuild (mis. baris ARDEBT periode diarsip)"""
+    db.execute(
+        'UPDATE paid_set SET data_version = ? WHERE periode_tahun = ? AND periode_bulan = ?',
+        (_next_periode_version(db, bulan, tahun), tahun, bulan)
+    )
+
+
+def periode_version(db, bulan, tahun):
+    """Versi data periode untuk kunci cache frame (data_version global jika paid_set belum ada)"""
+    row = fetch_one(db, 'paid_set_version', (bulan, tahun))
+    return int(row[0]) if row else current_data_version(db)
+
+
+def load_paid_set(db, bulan, tahun):
+    """Array nomen_id terurut yang sudah bayar (fallback: hitung dari collection)"""
+    row = fetch_one(db, 'paid_set', (bulan, tahun))
+    if row is None:
+        return _collection_ids(db, bulan, tahun)
+    return np.frombuffer(bytes(row['nomen_ids']), dtype=PAID_SET_DTYPE)
+
+
+def is_paid(paid, ids):
+    """Mask bool: ids yang ada di paid (paid terurut unik)"""
+    if len(paid) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    pos = np.searchsorted(paid, ids)
+    pos[pos == len(paid)] = 0
+    return paid[pos] == ids
+
+
+# ==========================================
+# FRAME PER PERIODE
+# ==========================================
+
+# Kolom kategori yang bisa difilter dengan kesamaan (selain rayon)
+CATEGORY_FILTERS = ('pc', 'ez', 'tarif')
+
+# Bucket umur piutang (bulan, inklusif); None = tanpa batas atas
+UMUR_BUCKETS = {
+    '0': (0, 0),
+    '1-3': (1, 3),
+    '4-6': (4, 6),
+    '7-12': (7, 12),
+    '13+': (13, None),
+}
+
+# Sort yang diizinkan; prefix '-' = menurun. 'rayon' = urutan frame (rayon, nomen)
+SORT_KEYS = ('rayon', 'target_mc', 'saldo_tunggakan', 'umur_piutang')
+
+# Jumlah view (kombinasi filter + sort) yang disimpan per frame
+VIEW_CACHE_SIZE = 16
+
+
+def parse_frame_filters(args):
+    """
+    Filter + sort list belum bayar dari query params (mapping). ValueError
+    jika nilai tidak valid. Return (filters, sort).
+    """
+    filters = {}
+    for name in ('rayon',) + CATEGORY_FILTERS:
+        value = (args.get(name) or '').strip()
+        if value:
+            filters[name] = value
+
+    min_target = args.get('min_target')
+    if min_target not in (None, ''):
+        filters['min_target'] = float(min_target)
+
+    umur = args.get('umur')
+    if umur:
+        if umur not in UMUR_BUCKETS:
+            raise ValueError(f"Invalid umur: {umur} ({', '.join(UMUR_BUCKETS)})")
+        filters['umur'] = umur
+
+    has_saldo = args.get('has_saldo')
+    if has_saldo not in (None, ''):
+        if has_saldo not in ('0', '1'):
+            raise ValueError(f'Invalid has_saldo: {has_saldo} (0/1)')
+        filters['has_saldo'] = has_saldo == '1'
+
+    q = (args.get('q') or '').strip().lower()
+    if q:
+        filters['q'] = q
+
+    sort = args.get('sort') or 'rayon'
+    if sort.lstrip('-') not in SORT_KEYS:
+        raise ValueError(f"Invalid sort: {sort} ({', '.join(SORT_KEYS)})")
+    if sort == '-rayon':
+        raise ValueError('Invalid sort: -rayon')
+    return filters, sort
+
+
+class FrameView:
+    """
+    Subset belum bayar dari satu frame setelah filter, dalam urutan sort.
+    index = posisi di frame; values = nilai sort per posisi (None untuk
+    urutan frame). Baris dengan nilai sama diurutkan posisi frame, jadi
+    (nilai, rayon, nomen) unik dan bisa dipakai sebagai cursor.
+    """
+
+    def __init__(self, frame, index, values=None):
+        self.frame = frame
+        self.index = index
+        self.values = values
+
+    @property
+    def key_length(self):
+        return 2 if self.values is None else 3
+
+    def summary(self):
+        idx = self.index
+        return {
+            'total_pelanggan': int(len(self.frame.ids)),
+            'total_belum_bayar': int(len(idx)),
+            'total_target': float(self.frame.target[idx].sum()),
+            'total_tunggakan': float(self.frame.saldo[idx].sum()),
+        }
+
+    def by_rayon(self):
+        frame = self.frame
+        codes = frame.rayon_codes[self.index]
+        counts = np.bincount(codes, minlength=len(frame.rayons))
+        targets = np.bincount(codes, weights=frame.target[self.index], minlength=len(frame.rayons))
+        return [
+            {'rayon': rayon, 'total': int(counts[i]), 'total_target': float(targets[i])}
+            for i, rayon in enumerate(frame.rayons) if counts[i]
+        ]
+
+    def _start_after(self, key):
+        keys = self.frame.keys
+        if self.values is None:
+            return int(np.searchsorted(self.index, bisect_right(keys, tuple(key))))
+        value, rank = float(key[0]), bisect_right(keys, tuple(key[1:]))
+        lo = int(np.searchsorted(self.values, value, side='left'))
+        hi = int(np.searchsorted(self.values, value, side='right'))
+        return lo + int(np.searchsorted(self.index[lo:hi], rank))
+
+    def page(self, limit, key=None, offset=0):
+        """
+        (ids, last_key) satu halaman: setelah cursor key jika ada, selain
+        itu mulai dari offset. last_key None jika ini halaman terakhir.
+        """
+        start = offset if key is None else self._start_after(key)
+        index = self.index[start:start + limit]
+        last_key = None
+        if len(index) and start + limit < len(self.index):
+            last_key = self.frame.keys[index[-1]]
+            if self.values is not None:
+                last_key = (float(self.values[start + len(index) - 1]),) + last_key
+        return self.frame.ids[index], last_key
+
+
+class PeriodeFrame:
+    """Pelanggan MC satu periode (urut rayon, nomen) + status bayar"""
+
+    def __init__(self, ids, rayon_codes, rayons, target, saldo, paid_mask, keys,
+                 categories=None, umur=None, names=None):
+        self.ids = ids
+        self.rayon_codes = rayon_codes
+        self.rayons = rayons
+        self.target = target
+        self.saldo = saldo
+        self.paid = paid_mask
+        self.keys = keys
+        self.categories = categories or {}
+        self.umur = umur if umur is not None else np.full(len(ids), -1, dtype=np.int64)
+        self.nomens = np.array([key[1] for key in keys], dtype=str)
+        self.names = np.array(names if names is not None else [''] * len(ids), dtype=str)
+        self.unpaid_index = np.flatnonzero(~paid_mask)
+        self._views = OrderedDict()
+        self._views_lock = threading.Lock()
+
+    @property
+    def unpaid_ids(self):
+        return self.ids[self.unpaid_index]
+
+    def _category_mask(self, name, value):
+        if name == 'rayon':
+            labels, codes = self.rayons, self.rayon_codes
+        else:
+            labels, codes = self.categories[name]
+        try:
+            return codes == labels.index(value)
+        except ValueError:
+            return np.zeros(len(self.ids), dtype=bool)
+
+    def _mask(self, filters):
+        mask = ~self.paid
+        for name in ('rayon',) + CATEGORY_FILTERS:
+            if name in filters:
+                mask &= self._category_mask(name, filters[name])
+        if 'min_target' in filters:
+            mask &= self.target >= filters['min_target']
+        if 'umur' in filters:
+            low, high = UMUR_BUCKETS[filters['umur']]
+            mask &= self.umur >= low
+            if high is not None:
+                mask &= self.umur <= high
+        if 'has_saldo' in filters:
+            mask &= (self.saldo > 0) if filters['has_saldo'] else (self.saldo <= 0)
+        return mask
+
+    def _sort_values(self, name):
+        return {
+            'target_mc': self.target,
+            'saldo_tunggakan': self.saldo,
+            'umur_piutang': self.umur.astype(np.float64),
+        }[name]
+
+    def _build_view(self, filters, sort):
+        index = np.flatnonzero(self._mask(filters))
+        q = filters.get('q')
+        if q:
+            # Nomen diawali q, atau nama mengandung q (hanya di subset terfilter)
+            keep = np.char.startswith(self.nomens[index], q) | (np.char.find(self.names[index], q) >= 0)
+            index = index[keep]
+
+        if sort == 'rayon':
+            return FrameView(self, index)
+        values = self._sort_values(sort.lstrip('-'))[index]
+        if sort.startswith('-'):
+            values = -values
+        order = np.lexsort((index, values))
+        return FrameView(self, index[order], values[order])
+
+    def view(self, filters=None, sort='rayon'):
+        """View terfilter + terurut, di-cache per kombinasi (frame immutable)"""
+        filters = filters or {}
+        if not filters and sort == 'rayon':
+            return FrameView(self, self.unpaid_index)
+
+        key = (tuple(sorted(filters.items())), sort)
+        with self._views_lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+
+        view = self._build_view(filters, sort)
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+
+def _codes(values):
+    labels, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+    return list(labels), codes.astype(np.int64)
+
+
+def _build_frame(db, bulan, tahun):
+    # Urut ulang di Python supaya bisect pada sort key (rayon, nomen) valid
+    # apapun collation backend-nya (SQLite: urutan sudah sama, O(n))
+    rows = sorted(fetch_all(db, 'paid_set_mc_frame', (bulan, tahun)),
+                  key=lambda row: (row[1] or '', row[3] or ''))
+    ids = np.fromiter((row[0] or 0 for row in rows), dtype=PAID_SET_DTYPE, count=len(rows))
+    rayons, rayon_codes = _codes([row[1] or '' for row in rows])
+    target = np.fromiter((row[2] or 0 for row in rows), dtype=np.float64, count=len(rows))
+    categories = {
+        name: _codes(['' if row[col] is None else str(row[col]) for row in rows])
+        for col, name in enumerate(CATEGORY_FILTERS, start=4)
+    }
+
+    saldo = np.zeros(len(ids), dtype=np.float64)
+    umur = np.full(len(ids), -1, dtype=np.int64)
+    ar = fetch_all(db, 'paid_set_ardebt', (bulan, tahun))
+    if ar:
+        ar_ids = np.fromiter((row[0] for row in ar), dtype=PAID_SET_DTYPE, count=len(ar))
+        ar_saldo = np.fromiter((row[1] or 0 for row in ar), dtype=np.float64, count=len(ar))
+        ar_umur = np.fromiter((row[2] or 0 for row in ar), dtype=np.int64, count=len(ar))
+        has_ar = is_paid(ar_ids, ids)
+        pos = np.searchsorted(ar_ids, ids[has_ar])
+        saldo[has_ar] = ar_saldo[pos]
+        umur[has_ar] = ar_umur[pos]
+
+    keys = [(row[1] or '', row[3] or '') for row in rows]
+    names = [(row[7] or '').lower() for row in rows]
+
+    paid_mask = is_paid(load_paid_set(db, bulan, tahun), ids)
+    return PeriodeFrame(ids, rayon_codes, rayons, target, saldo, paid_mask, keys,
+                        categories=categories, umur=umur, names=names)
+
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def get_periode_frame(db, bulan, tahun):
+    """Frame periode, di-cache per (database, periode, versi periode)"""
+    key = (get_db_path(), tahun, bulan, periode_version(db, bulan, tahun))
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is not None:
+            _frames.move_to_end(key)
+            return frame
+
+    frame = _build_frame(db, bulan, tahun)
+    with _frames_lock:
+        _frames[key] = frame
+        while len(_frames) > FRAME_CACHE_SIZE:
+            _frames.popitem(last=False)
+    return frame
+
+
+# ==========================================
+# DETAIL
+# ==========================================
+
+def fetch_unpaid_details(db, bulan, tahun, ids):
+    """
+    Baris detail (MC + ARDEBT + master bayar) untuk nomen_id terpilih,
+    urut sesuai ids. SQL IN (...) dirakit per chunk (jumlah placeholder
+    mengikuti ukuran halaman).
+    """
+    ids = [int(i) for i in ids]
+    if not ids:
+        return []
+
+    by_id = {}
+    for start in range(0, len(ids), DETAIL_CHUNK):
+        chunk = ids[start:start + DETAIL_CHUNK]
+        sql = f"""
+            SELECT
+                m.nomen_id, m.nomen, m.nama, m.alamat, m.rayon, m.pc, m.ez, m.tarif,
+                m.target_mc, m.kubikasi,
+                a.saldo_tunggakan, a.umur_piutang,
+                mb.tgl_bayar as tgl_bayar_mb, mb.jumlah_bayar as bayar_mb
+            FROM master_pelanggan m
+            LEFT JOIN ardebt a
+                ON m.nomen_id = a.nomen_id
+                AND m.periode_bulan = a.periode_bulan
+                AND m.periode_tahun = a.periode_tahun
+            LEFT JOIN master_bayar mb
+                ON m.nomen_id = mb.nomen_id
+                AND m.periode_bulan = mb.periode_bulan
+                AND m.periode_tahun = mb.periode_tahun
+            WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+              AND m.nomen_id IN ({', '.join('?' * len(chunk))})
+        """
+        rows = db.execute(sql, [bulan, tahun] + chunk).fetchall()
+        for row in rows:
+            by_id.setdefault(row['nomen_id'], []).append(row)
+
+    result = []
+    for nomen_id in ids:
+        for row in by_id.get(nomen_id, []):
+            item = dict(row)
+            item.pop('nomen_id')
+            result.append(item)
+    return result
+
+
+def unpaid_rows(db, bulan, tahun):
+    """Semua pelanggan belum bayar (nomen, nama, alamat, rayon, tagihan, tarif), urut rayon, nomen"""
+    rows = fetch_all(db, 'belum_bayar_list', (bulan, tahun))
+    ids = np.fromiter((row['nomen_id'] or 0 for row in rows), dtype=PAID_SET_DTYPE, count=len(rows))
+    paid = is_paid(load_paid_set(db, bulan, tahun), ids)
+    return [row for row, p in zip(rows, paid) if not p]
+
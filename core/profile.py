@@ -0,0 +1,119 @@
+"""
+Customer Profile Module
+Profil satu pelanggan: MC, SBRS, collection, ARDEBT, mainbill dan analisa
+
+Membuka satu pelanggan dulu memanggil lima endpoint (profil, profil
+lengkap, history multi periode, history pembayaran, history kubikasi)
+dengan query sendiri-sendiri, sebagian tanpa ORDER BY / batas periode.
+get_customer_profile() mengumpulkan semuanya dalam satu pass: satu
+lookup nomen_dict lalu satu range scan index nomen_id per tabel.
+
+Pembayaran, SBRS dan ARDEBT periode yang sudah dipindah ke arsip Parquet
+(core.archive) ikut dibaca jika `dari` meminta periode arsip, sama seperti
+/api/customer/<nomen>/history.
+
+Hasil di-cache per nomen (LRU kecil per proses). Entry valid selama
+nomen_dict.data_version pelanggan itu tidak berubah — upload periode,
+arsip dan analisa menandai pelanggan yang disentuh (core/versioning.py),
+jadi upload yang tidak memuat nomen ini tidak membuang cache-nya. Kunci
+cache juga memuat versi manifest arsip.
+"""
+
+import threading
+from collections import OrderedDict
+
+from core.archive import archive_version, needs_archive, periode_key, read_archive
+from core.database import get_db_path
+from core.queries import fetch_all, fetch_one
+
+# Jumlah profil yang disimpan per proses
+PROFILE_CACHE_SIZE = 256
+
+# (section, query, tabel arsip / None, kolom arsip)
+_SECTIONS = (
+    ('mc_history', 'profile_mc', None, None),
+    ('sbrs_history', 'profile_sbrs', 'sbrs_data', [
+        'periode_bulan', 'periode_tahun', 'readmethod', 'skip_status', 'trouble_status',
+        'stand_awal', 'stand_akhir', 'volume', 'analisa_tindak_lanjut',
+    ]),
+    ('payments', 'profile_payments', 'collection_harian', [
+        'tgl_bayar', 'jumlah_bayar', 'volume_air', 'tipe_bayar', 'bill_period',
+        'periode_bulan', 'periode_tahun',
+    ]),
+    ('ardebt_history', 'profile_ardebt', 'ardebt', [
+        'periode_bulan', 'periode_tahun', 'saldo_tunggakan', 'umur_piutang',
+    ]),
+    ('mainbill_history', 'profile_mainbill', None, None),
+)
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _periode_desc(row):
+    return row['periode_tahun'], row['periode_bulan']
+
+
+def _payment_desc(row):
+    return row['tgl_bayar'] or ''
+
+
+def _build_profile(db, nomen, nomen_id, dari):
+    since_key = periode_key(*dari) if dari else 0
+    profile = {'nomen': nomen}
+    for section, query_name, table, columns in _SECTIONS:
+        rows = [dict(row) for row in fetch_all(db, query_name, (nomen_id, since_key))]
+        if table and needs_archive(table, dari):
+            rows.extend(read_archive(table, nomen, columns=columns, since=dari, db=db))
+            rows.sort(key=_payment_desc if section == 'payments' else _periode_desc, reverse=True)
+        profile[section] = rows
+    profile['analisa'] = [dict(row) for row in fetch_all(db, 'profile_analisa', (nomen,))]
+
+    mc = profile['mc_history']
+    latest = mc[0] if mc else None
+    ardebt = profile['ardebt_history']
+    profile['pelanggan'] = latest
+    profile['summary'] = {
+        'periode_mc': len(mc),
+        'total_bayar': sum(p['jumlah_bayar'] or 0 for p in profile['payments']),
+        'jumlah_transaksi': len(profile['payments']),
+        'last_payment': profile['payments'][0]['tgl_bayar'] if profile['payments'] else None,
+        'saldo_tunggakan': (ardebt[0]['saldo_tunggakan'] or 0) if ardebt else 0,
+        'analisa_open': sum(1 for a in profile['analisa'] if a['status'] != 'resolved'),
+    }
+    return profile
+
+
+def get_customer_profile(db, nomen, dari=None):
+    """
+    Profil pelanggan (dict) atau None jika nomen tidak dikenal. dari =
+    (tahun, bulan) periode paling lama yang diambil; None = semua periode
+    (tabel live + arsip).
+    """
+    row = fetch_one(db, 'profile_nomen', (nomen,))
+    if row is None:
+        return None
+    nomen_id, version = row['id'], row['data_version']
+
+    key = (get_db_path(), nomen, tuple(dari) if dari else None, archive_version())
+    with _profiles_lock:
+        cached = _profiles.get(key)
+        if cached is not None and cached[0] == version:
+            _profiles.move_to_end(key)
+            _stats['hits'] += 1
+            return cached[1]
+        _stats['misses'] += 1
+
+    profile = _build_profile(db, nomen, nomen_id, dari)
+    with _profiles_lock:
+        _profiles[key] = (version, profile)
+        _profiles.move_to_end(key)
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+
+def profile_cache_status():
+    with _profiles_lock:
+        return {'entries': len(_profiles), 'max_entries': PROFILE_CACHE_SIZE, **_stats}
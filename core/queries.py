@@ -0,0 +1,743 @@
+"""
+Query Registry Module
+Named SQL queries declared once, executed with per-query timing
+
+Semua query dashboard didaftarkan di sini dengan nama unik. Endpoint
+memanggil fetch_one / fetch_all dengan nama query, sehingga:
+- SQL identik selalu dipakai ulang (hit di statement cache sqlite3)
+- Setiap eksekusi dicatat: jumlah call, latency p50/p95, rows returned
+"""
+
+import threading
+import time
+from collections import deque
+
+# ==========================================
+# QUERY DEFINITIONS
+# ==========================================
+
+QUERIES = {
+    # -----------------------------------------
+    # PERIODE
+    # -----------------------------------------
+    'latest_periode_mc': """
+        SELECT periode_bulan, periode_tahun
+        FROM master_pelanggan
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+        LIMIT 1
+    """,
+    'latest_periode_sbrs': """
+        SELECT periode_bulan, periode_tahun
+        FROM sbrs_data
+        WHERE periode_bulan IS NOT NULL AND periode_tahun IS NOT NULL
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+        LIMIT 1
+    """,
+    'periode_list_mc': """
+        SELECT DISTINCT periode_bulan, periode_tahun
+        FROM master_pelanggan
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'mc_count_periode': """
+        SELECT COUNT(*) as cnt
+        FROM master_pelanggan
+        WHERE periode_bulan = ? AND periode_tahun = ?
+    """,
+
+    # -----------------------------------------
+    # KPI (tabel ringkasan kpi_periode / kpi_periode_rayon / agg_cube, core/summary.py)
+    # -----------------------------------------
+    'kpi_summary': """
+        SELECT *
+        FROM kpi_periode
+        WHERE periode_bulan = ? AND periode_tahun = ?
+    """,
+    'latest_periode_kpi': """
+        SELECT periode_bulan, periode_tahun
+        FROM kpi_periode
+        WHERE total_pelanggan > 0
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+        LIMIT 1
+    """,
+    'home_stats': """
+        SELECT
+            k.total_pelanggan, k.target_mc, k.collection_total,
+            k.sudah_bayar, k.belum_bayar, k.total_tunggakan,
+            r.rayon,
+            r.total_pelanggan as rayon_total,
+            r.sudah_bayar as rayon_sudah_bayar,
+            r.target_mc as rayon_target,
+            r.realisasi as rayon_realisasi
+        FROM kpi_periode k
+        LEFT JOIN kpi_periode_rayon r
+            ON r.periode_tahun = k.periode_tahun AND r.periode_bulan = k.periode_bulan
+        WHERE k.periode_bulan = ? AND k.periode_tahun = ?
+        ORDER BY r.rayon
+    """,
+    'kpi_summary_rayon': """
+        SELECT
+            rayon, total_pelanggan, jumlah_pelanggan, target_mc,
+            sudah_bayar, realisasi, belum_bayar, unpaid_amount
+        FROM kpi_periode_rayon
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        ORDER BY rayon
+    """,
+    'cube_pcez': """
+        SELECT
+            pc,
+            ez,
+            SUM(total_pelanggan) as total_pelanggan,
+            SUM(target) as total_target,
+            SUM(realisasi) as total_realisasi,
+            SUM(realisasi_current) as realisasi_current,
+            SUM(realisasi_tunggakan) as realisasi_tunggakan,
+            SUM(volume) as total_volume,
+            SUM(outstanding) as total_outstanding,
+            SUM(pelanggan_bayar) as pelanggan_bayar,
+            COUNT(DISTINCT rayon) as total_rayon
+        FROM agg_cube
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        GROUP BY pc, ez
+        ORDER BY pc, ez
+    """,
+    'cube_pc': """
+        SELECT
+            pc,
+            SUM(total_pelanggan) as total_pelanggan,
+            SUM(target) as total_target,
+            SUM(realisasi) as total_realisasi,
+            SUM(pelanggan_bayar) as pelanggan_bayar
+        FROM agg_cube
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        GROUP BY pc
+        ORDER BY pc
+    """,
+    'cube_rayon': """
+        SELECT
+            rayon,
+            SUM(total_pelanggan) as total_pelanggan,
+            SUM(target) as total_target,
+            SUM(realisasi) as total_realisasi,
+            SUM(pelanggan_bayar) as pelanggan_bayar,
+            SUM(pelanggan_tidak_bayar) as pelanggan_tidak_bayar,
+            SUM(unpaid_amount) as unpaid_amount
+        FROM agg_cube
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        GROUP BY rayon
+        ORDER BY rayon
+    """,
+    'kpi_summary_trend': """
+        SELECT periode_bulan, periode_tahun, target_mc, collection_current as collection
+        FROM kpi_periode
+        WHERE total_pelanggan > 0
+        ORDER BY periode_tahun, periode_bulan
+    """,
+
+    # -----------------------------------------
+    # COLLECTION
+    # -----------------------------------------
+    'collection_list': """
+        SELECT
+            c.id,
+            c.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.pc,
+            m.ez,
+            c.tgl_bayar,
+            c.jumlah_bayar,
+            c.volume_air,
+            c.tipe_bayar,
+            m.target_mc,
+            c.periode_bulan,
+            c.periode_tahun
+        FROM collection_harian c
+        LEFT JOIN master_pelanggan m
+            ON c.nomen_id = m.nomen_id
+            AND c.periode_bulan = m.periode_bulan
+            AND c.periode_tahun = m.periode_tahun
+        WHERE c.periode_bulan = ?
+          AND c.periode_tahun = ?
+        ORDER BY COALESCE(c.tgl_bayar, '') DESC, COALESCE(c.jumlah_bayar, 0) DESC, c.id DESC
+        LIMIT ? OFFSET ?
+    """,
+    # Keyset: halaman setelah (tgl_bayar, jumlah_bayar, id) baris terakhir,
+    # dibaca mundur lewat idx_coll_periode_sort tanpa membuang baris.
+    # COALESCE: perbandingan row value dengan NULL hasilnya NULL (baris hilang
+    # dari halaman berikutnya), dan urutan NULL beda di SQLite / PostgreSQL
+    'collection_list_after': """
+        SELECT
+            c.id,
+            c.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.pc,
+            m.ez,
+            c.tgl_bayar,
+            c.jumlah_bayar,
+            c.volume_air,
+            c.tipe_bayar,
+            m.target_mc,
+            c.periode_bulan,
+            c.periode_tahun
+        FROM collection_harian c
+        LEFT JOIN master_pelanggan m
+            ON c.nomen_id = m.nomen_id
+            AND c.periode_bulan = m.periode_bulan
+            AND c.periode_tahun = m.periode_tahun
+        WHERE c.periode_bulan = ?
+          AND c.periode_tahun = ?
+          AND (COALESCE(c.tgl_bayar, ''), COALESCE(c.jumlah_bayar, 0), c.id)
+              < (COALESCE(?, ''), COALESCE(?, 0), ?)
+        ORDER BY COALESCE(c.tgl_bayar, '') DESC, COALESCE(c.jumlah_bayar, 0) DESC, c.id DESC
+        LIMIT ?
+    """,
+    'export_collection': """
+        SELECT
+            c.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.pc,
+            m.ez,
+            c.tgl_bayar,
+            c.jumlah_bayar,
+            c.volume_air,
+            c.tipe_bayar,
+            m.target_mc
+        FROM collection_harian c
+        LEFT JOIN master_pelanggan m
+            ON c.nomen_id = m.nomen_id
+            AND c.periode_bulan = m.periode_bulan
+            AND c.periode_tahun = m.periode_tahun
+        WHERE c.periode_bulan = ?
+          AND c.periode_tahun = ?
+          AND (? IS NULL OR m.rayon = ?)
+        ORDER BY COALESCE(c.tgl_bayar, '') DESC, COALESCE(c.jumlah_bayar, 0) DESC, c.id DESC
+    """,
+    'collection_list_summary': """
+        SELECT
+            COUNT(*) as total_transaksi,
+            COUNT(DISTINCT c.nomen_id) as unique_pelanggan,
+            SUM(c.jumlah_bayar) as total_bayar,
+            SUM(c.volume_air) as total_volume,
+            COUNT(CASE WHEN c.tipe_bayar = 'current' THEN 1 END) as current_count,
+            COUNT(CASE WHEN c.tipe_bayar = 'tunggakan' THEN 1 END) as tunggakan_count,
+            AVG(c.jumlah_bayar) as avg_bayar
+        FROM collection_harian c
+        WHERE c.periode_bulan = ? AND c.periode_tahun = ?
+    """,
+    'collection_daily': """
+        SELECT
+            tgl_bayar, hari, transaksi, pelanggan_bayar, current, tunggakan, total,
+            cum_current, cum_tunggakan, cum_total, cum_pelanggan_bayar, target, cum_pct_target
+        FROM collection_daily
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        ORDER BY tgl_bayar
+    """,
+    'collection_top_payers': """
+        SELECT
+            c.nomen,
+            m.nama,
+            m.rayon,
+            SUM(c.jumlah_bayar) as total_bayar,
+            COUNT(*) as jumlah_transaksi
+        FROM collection_harian c
+        JOIN master_pelanggan m
+            ON c.nomen_id = m.nomen_id
+            AND c.periode_bulan = m.periode_bulan
+            AND c.periode_tahun = m.periode_tahun
+        WHERE c.periode_bulan = ? AND c.periode_tahun = ?
+        GROUP BY c.nomen_id, c.nomen, m.nama, m.rayon
+        ORDER BY total_bayar DESC
+        LIMIT ?
+    """,
+
+    # -----------------------------------------
+    # BELUM BAYAR
+    # -----------------------------------------
+    'belum_bayar_list': """
+        SELECT
+            m.nomen_id,
+            m.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.target_mc as tagihan,
+            m.tarif
+        FROM master_pelanggan m
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+        ORDER BY m.rayon, m.nomen
+    """,
+    # Export (streaming) — filter rayon opsional: NULL = semua rayon
+    'export_belum_bayar': """
+        SELECT
+            m.nomen_id,
+            m.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.pc,
+            m.ez,
+            m.tarif,
+            m.target_mc,
+            a.saldo_tunggakan,
+            a.umur_piutang
+        FROM master_pelanggan m
+        LEFT JOIN ardebt a
+            ON m.nomen_id = a.nomen_id
+            AND m.periode_bulan = a.periode_bulan
+            AND m.periode_tahun = a.periode_tahun
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+          AND (? IS NULL OR m.rayon = ?)
+        ORDER BY m.rayon, m.nomen
+    """,
+    'paid_set': """
+        SELECT pelanggan, nomen_ids
+        FROM paid_set
+        WHERE periode_bulan = ? AND periode_tahun = ?
+    """,
+    'paid_set_version': """
+        SELECT data_version
+        FROM paid_set
+        WHERE periode_bulan = ? AND periode_tahun = ?
+    """,
+    'paid_set_source': """
+        SELECT DISTINCT nomen_id
+        FROM collection_harian
+        WHERE periode_bulan = ? AND periode_tahun = ?
+          AND nomen_id IS NOT NULL
+        ORDER BY nomen_id
+    """,
+    'paid_set_mc_frame': """
+        SELECT nomen_id, rayon, target_mc, nomen, pc, ez, tarif, nama
+        FROM master_pelanggan
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        ORDER BY rayon, nomen
+    """,
+    'paid_set_ardebt': """
+        SELECT nomen_id, SUM(saldo_tunggakan) as saldo, MAX(umur_piutang) as umur
+        FROM ardebt
+        WHERE periode_bulan = ? AND periode_tahun = ?
+          AND nomen_id IS NOT NULL
+        GROUP BY nomen_id
+        ORDER BY nomen_id
+    """,
+
+    # -----------------------------------------
+    # ANOMALY (SBRS)
+    # -----------------------------------------
+    'anomaly_extreme': """
+        SELECT COUNT(DISTINCT nomen_id) as count,
+               SUM(volume) as total_kubikasi,
+               AVG(volume) as avg_kubikasi
+        FROM sbrs_data
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        AND (volume > 100 OR volume > (
+            SELECT AVG(volume) * 3 FROM sbrs_data
+            WHERE periode_bulan = ? AND periode_tahun = ?
+        ))
+    """,
+    'anomaly_turun': """
+        SELECT COUNT(*) as count
+        FROM sbrs_data s1
+        LEFT JOIN sbrs_data s2 ON s1.nomen_id = s2.nomen_id
+        WHERE s1.periode_bulan = ? AND s1.periode_tahun = ?
+        AND (
+            (s1.periode_bulan = 1 AND s2.periode_bulan = 12 AND s2.periode_tahun = s1.periode_tahun - 1)
+            OR (s1.periode_bulan > 1 AND s2.periode_bulan = s1.periode_bulan - 1 AND s2.periode_tahun = s1.periode_tahun)
+        )
+        AND s2.volume > 0
+        AND s1.volume < (s2.volume * 0.5)
+    """,
+    'anomaly_zero': """
+        SELECT COUNT(DISTINCT nomen_id) as count
+        FROM sbrs_data
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        AND volume = 0
+    """,
+    'anomaly_negatif': """
+        SELECT COUNT(DISTINCT nomen_id) as count,
+               SUM(volume) as total_negatif
+        FROM sbrs_data
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        AND volume < 0
+    """,
+    'anomaly_salah_catat': """
+        SELECT COUNT(DISTINCT nomen_id) as count
+        FROM sbrs_data
+        WHERE periode_bulan = ? AND periode_tahun = ?
+        AND stand_akhir < stand_awal
+    """,
+    'anomaly_detail_zero': """
+        SELECT nomen, nama, alamat, volume FROM sbrs_data
+        WHERE periode_bulan=? AND periode_tahun=? AND volume=0 LIMIT 100
+    """,
+    'anomaly_detail_negatif': """
+        SELECT nomen, nama, alamat, volume FROM sbrs_data
+        WHERE periode_bulan=? AND periode_tahun=? AND volume < 0 LIMIT 100
+    """,
+    'anomaly_detail_extreme': """
+        SELECT nomen, nama, alamat, volume FROM sbrs_data
+        WHERE periode_bulan=? AND periode_tahun=? AND volume > 100 LIMIT 100
+    """,
+
+    # -----------------------------------------
+    # PCEZ PERFORMANCE
+    # -----------------------------------------
+    'ardebt_columns': """
+        PRAGMA table_info(ardebt)
+    """,
+    'pcez_detail_rayon': """
+        SELECT
+            m.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.target_mc,
+            COALESCE(SUM(c.jumlah_bayar), 0) as total_bayar,
+            COALESCE(SUM(c.volume_air), 0) as total_volume,
+            COALESCE(t.saldo_tunggakan, 0) as tunggakan,
+            CASE WHEN SUM(c.jumlah_bayar) > 0 THEN 'BAYAR' ELSE 'TIDAK BAYAR' END as status
+        FROM master_pelanggan m
+        LEFT JOIN collection_harian c
+            ON m.nomen_id = c.nomen_id
+            AND m.periode_bulan = c.periode_bulan
+            AND m.periode_tahun = c.periode_tahun
+        LEFT JOIN (
+            SELECT nomen_id, SUM(saldo_tunggakan) as saldo_tunggakan
+            FROM ardebt
+            WHERE periode_bulan = ? AND periode_tahun = ?
+            GROUP BY nomen_id
+        ) t ON m.nomen_id = t.nomen_id
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+            AND SUBSTR(m.rayon, 1, 3) = ?
+            AND SUBSTR(m.rayon, 4, 2) = ?
+        GROUP BY m.nomen_id, m.nomen, m.nama, m.alamat, m.rayon, m.target_mc, t.saldo_tunggakan
+        ORDER BY m.rayon, m.nomen
+    """,
+    'pcez_detail_ardebt': """
+        SELECT
+            m.nomen,
+            m.nama,
+            m.alamat,
+            m.rayon,
+            m.target_mc,
+            COALESCE(SUM(c.jumlah_bayar), 0) as total_bayar,
+            COALESCE(SUM(c.volume_air), 0) as total_volume,
+            COALESCE(t.saldo_tunggakan, 0) as tunggakan,
+            CASE WHEN SUM(c.jumlah_bayar) > 0 THEN 'BAYAR' ELSE 'TIDAK BAYAR' END as status
+        FROM master_pelanggan m
+        LEFT JOIN ardebt a
+            ON m.nomen_id = a.nomen_id
+            AND m.periode_bulan = a.periode_bulan
+            AND m.periode_tahun = a.periode_tahun
+        LEFT JOIN collection_harian c
+            ON m.nomen_id = c.nomen_id
+            AND m.periode_bulan = c.periode_bulan
+            AND m.periode_tahun = c.periode_tahun
+        LEFT JOIN (
+            SELECT nomen_id, SUM(saldo_tunggakan) as saldo_tunggakan
+            FROM ardebt
+            WHERE periode_bulan = ? AND periode_tahun = ?
+            GROUP BY nomen_id
+        ) t ON m.nomen_id = t.nomen_id
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+            AND a.pc = ? AND a.ez = ?
+        GROUP BY m.nomen_id, m.nomen, m.nama, m.alamat, m.rayon, m.target_mc, t.saldo_tunggakan
+        ORDER BY m.rayon, m.nomen
+    """,
+
+    # -----------------------------------------
+    # UPLOAD HISTORY
+    # -----------------------------------------
+    'history_stats_by_type': """
+        SELECT
+            file_type,
+            COUNT(*) as total_uploads,
+            SUM(row_count) as total_rows,
+            MAX(upload_date) as last_upload
+        FROM upload_metadata
+        GROUP BY file_type
+    """,
+    'history_recent_activity': """
+        SELECT
+            DATE(upload_date) as date,
+            COUNT(*) as uploads
+        FROM upload_metadata
+        WHERE upload_date >= ?
+        GROUP BY DATE(upload_date)
+        ORDER BY date DESC
+    """,
+    'history_status_counts': """
+        SELECT
+            status,
+            COUNT(*) as count
+        FROM upload_metadata
+        GROUP BY status
+    """,
+    'history_periods': """
+        SELECT DISTINCT
+            periode_bulan,
+            periode_tahun
+        FROM upload_metadata
+        WHERE status = 'success'
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'history_upload_detail': """
+        SELECT * FROM upload_metadata
+        WHERE id = ?
+    """,
+
+    # -----------------------------------------
+    # CUSTOMER (PER NOMEN)
+    # -----------------------------------------
+    'customer_payment_history': """
+        SELECT
+            tgl_bayar,
+            jumlah_bayar,
+            tipe_bayar,
+            bill_period,
+            sumber_file,
+            periode_bulan,
+            periode_tahun
+        FROM collection_harian
+        WHERE nomen_id = (SELECT id FROM nomen_dict WHERE nomen = ?)
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY tgl_bayar DESC
+    """,
+    # Pencarian FTS5 (core/search.py): bm25 berbobot per kolom, di-scope ke periode
+    'customer_search': """
+        SELECT
+            m.nomen, m.nama, m.alamat, m.rayon, m.pc, m.ez, m.tarif, m.target_mc,
+            bm25(customer_fts, ?, ?, ?) as score
+        FROM customer_fts
+        JOIN master_pelanggan m
+            ON m.nomen_id = customer_fts.rowid
+        WHERE customer_fts MATCH ?
+          AND m.periode_bulan = ? AND m.periode_tahun = ?
+        ORDER BY score
+        LIMIT ?
+    """,
+    'customer_search_like': """
+        SELECT m.nomen, m.nama, m.alamat, m.rayon, m.pc, m.ez, m.tarif, m.target_mc, 0 as score
+        FROM master_pelanggan m
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+          AND (m.nomen LIKE ? OR LOWER(m.nama) LIKE LOWER(?) OR LOWER(m.alamat) LIKE LOWER(?))
+        ORDER BY m.nomen
+        LIMIT ?
+    """,
+    'customer_mc_history': """
+        SELECT
+            periode_bulan,
+            periode_tahun,
+            kubikasi,
+            target_mc
+        FROM customer_series
+        WHERE nomen_id = (SELECT id FROM nomen_dict WHERE nomen = ?)
+          AND (kubikasi IS NOT NULL OR target_mc IS NOT NULL)
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'customer_series': """
+        SELECT
+            periode_tahun, periode_bulan, kubikasi, target_mc, sbrs_volume,
+            bayar, transaksi, saldo_tunggakan, umur_piutang
+        FROM customer_series
+        WHERE nomen_id = ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+        LIMIT ?
+    """,
+    'customer_sbrs_history': """
+        SELECT
+            periode_bulan,
+            periode_tahun,
+            readmethod,
+            skip_status,
+            trouble_status,
+            volume,
+            analisa_tindak_lanjut
+        FROM sbrs_data
+        WHERE nomen_id = (SELECT id FROM nomen_dict WHERE nomen = ?)
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    # Profil pelanggan (core/profile.py): semua lewat index nomen_id, param (nomen_id, periode_key)
+    'profile_nomen': """
+        SELECT id, data_version FROM nomen_dict WHERE nomen = ?
+    """,
+    'profile_mc': """
+        SELECT
+            periode_bulan, periode_tahun, nama, alamat, rayon, pc, ez, tarif,
+            target_mc, kubikasi
+        FROM master_pelanggan
+        WHERE nomen_id = ?
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'profile_sbrs': """
+        SELECT
+            periode_bulan, periode_tahun, readmethod, skip_status, trouble_status,
+            stand_awal, stand_akhir, volume, analisa_tindak_lanjut
+        FROM sbrs_data
+        WHERE nomen_id = ?
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'profile_payments': """
+        SELECT
+            tgl_bayar, jumlah_bayar, volume_air, tipe_bayar, bill_period,
+            periode_bulan, periode_tahun
+        FROM collection_harian
+        WHERE nomen_id = ?
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY tgl_bayar DESC, id DESC
+    """,
+    'profile_ardebt': """
+        SELECT periode_bulan, periode_tahun, saldo_tunggakan, umur_piutang
+        FROM ardebt
+        WHERE nomen_id = ?
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'profile_mainbill': """
+        SELECT periode_bulan, periode_tahun, tgl_tagihan, total_tagihan, tarif
+        FROM mainbill
+        WHERE nomen_id = ?
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+    'profile_analisa': """
+        SELECT id, jenis_anomali, deskripsi, status, priority, assigned_to, due_date,
+               created_at, updated_at
+        FROM analisa_manual
+        WHERE nomen = ?
+        ORDER BY updated_at DESC
+    """,
+    'customer_ardebt_history': """
+        SELECT
+            periode_bulan,
+            periode_tahun,
+            saldo_tunggakan,
+            umur_piutang
+        FROM ardebt
+        WHERE nomen_id = (SELECT id FROM nomen_dict WHERE nomen = ?)
+          AND periode_tahun * 12 + periode_bulan >= ?
+        ORDER BY periode_tahun DESC, periode_bulan DESC
+    """,
+}
+
+
+# ==========================================
+# TIMING STATISTICS
+# ==========================================
+
+class QueryStats:
+    """
+    Statistik eksekusi per nama query (thread-safe, in-process).
+
+    Latency disimpan di ring buffer berukuran tetap per query sehingga
+    p50/p95 dihitung dari N eksekusi terakhir.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, elapsed_ms, rows):
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {
+                    'calls': 0,
+                    'rows': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'samples': deque(maxlen=self.window)
+                }
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['samples'].append(elapsed_ms)
+
+    def snapshot(self):
+        """Return list statistik per query, diurutkan dari total waktu terbesar"""
+        with self._lock:
+            items = [(name, dict(entry), sorted(entry['samples']))
+                     for name, entry in self._stats.items()]
+
+        result = []
+        for name, entry, samples in items:
+            result.append({
+                'query': name,
+                'calls': entry['calls'],
+                'rows': entry['rows'],
+                'avg_rows': round(entry['rows'] / entry['calls'], 2) if entry['calls'] else 0,
+                'total_ms': round(entry['total_ms'], 2),
+                'p50_ms': round(_percentile(samples, 50), 2),
+                'p95_ms': round(_percentile(samples, 95), 2),
+                'max_ms': round(entry['max_ms'], 2)
+            })
+
+        result.sort(key=lambda x: x['total_ms'], reverse=True)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _percentile(sorted_samples, pct):
+    """Nearest-rank percentile dari list yang sudah terurut"""
+    if not sorted_samples:
+        return 0.0
+    idx = max(0, int(round(pct / 100.0 * len(sorted_samples))) - 1)
+    return sorted_samples[min(idx, len(sorted_samples) - 1)]
+
+
+query_stats = QueryStats()
+
+
+# ==========================================
+# EXECUTION HELPERS
+# ==========================================
+
+def get_sql(name):
+    """Return SQL untuk query terdaftar (KeyError jika nama tidak dikenal)"""
+    return QUERIES[name]
+
+
+def fetch_all(db, name, params=()):
+    """Execute named query dan return semua rows"""
+    started = time.perf_counter()
+    rows = db.execute(QUERIES[name], params).fetchall()
+    query_stats.record(name, (time.perf_counter() - started) * 1000, len(rows))
+    return rows
+
+
+def iter_rows(db, name, params=(), size=1000):
+    """
+    Execute named query dan yield rows per batch fetchmany(size), untuk
+    export besar tanpa menampung seluruh hasil di memori
+    """
+    started = time.perf_counter()
+    cursor = db.execute(QUERIES[name], params)
+    count = 0
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            break
+        count += len(rows)
+        yield rows
+    query_stats.record(name, (time.perf_counter() - started) * 1000, count)
+
+
+def fetch_one(db, name, params=()):
+    """Execute named query dan return row pertama (atau None)"""
+    started = time.perf_counter()
+    row = db.execute(QUERIES[name], params).fetchone()
+    query_stats.record(name, (time.perf_counter() - started) * 1000, 1 if row is not None else 0)
+    return row
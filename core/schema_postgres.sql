@@ -0,0 +1,298 @@
+-- PostgreSQL schema (DATABASE_BACKEND=postgres)
+-- Mirrors the SQLite schema in core/database.py init_db()
+
+CREATE TABLE IF NOT EXISTS upload_metadata (
+    id SERIAL PRIMARY KEY,
+    file_type TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    periode_tahun INTEGER NOT NULL,
+    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    row_count INTEGER,
+    status TEXT DEFAULT 'success'
+);
+
+CREATE TABLE IF NOT EXISTS nomen_dict (
+    id SERIAL PRIMARY KEY,
+    nomen TEXT NOT NULL UNIQUE,
+    data_version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS master_pelanggan (
+    nomen TEXT NOT NULL,
+    nomen_id INTEGER,
+    nama TEXT,
+    alamat TEXT,
+    rayon TEXT,
+    pc TEXT,
+    ez TEXT,
+    pcez TEXT,
+    block TEXT,
+    zona_novak TEXT,
+    tarif TEXT,
+    target_mc DOUBLE PRECISION DEFAULT 0,
+    kubikasi DOUBLE PRECISION DEFAULT 0,
+    periode TEXT,
+    periode_bulan INTEGER NOT NULL,
+    periode_tahun INTEGER NOT NULL,
+    upload_id INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (periode_tahun, periode_bulan, nomen)
+);
+
+CREATE TABLE IF NOT EXISTS collection_harian (
+    id BIGSERIAL PRIMARY KEY,
+    nomen TEXT,
+    nomen_id INTEGER,
+    tgl_bayar TEXT,
+    jumlah_bayar DOUBLE PRECISION DEFAULT 0,
+    volume_air DOUBLE PRECISION DEFAULT 0,
+    tipe_bayar TEXT DEFAULT 'current',
+    bill_period TEXT,
+    periode_bulan INTEGER,
+    periode_tahun INTEGER,
+    upload_id INTEGER,
+    sumber_file TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (nomen, tgl_bayar, jumlah_bayar, bill_period)
+);
+
+CREATE TABLE IF NOT EXISTS master_bayar (
+    id BIGSERIAL PRIMARY KEY,
+    nomen TEXT,
+    nomen_id INTEGER,
+    tgl_bayar TEXT,
+    jumlah_bayar DOUBLE PRECISION DEFAULT 0,
+    periode_bulan INTEGER,
+    periode_tahun INTEGER,
+    upload_id INTEGER,
+    periode TEXT,
+    sumber_file TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS mainbill (
+    id BIGSERIAL PRIMARY KEY,
+    nomen TEXT,
+    nomen_id INTEGER,
+    tgl_tagihan TEXT,
+    total_tagihan DOUBLE PRECISION DEFAULT 0,
+    pcezbk TEXT,
+    tarif TEXT,
+    periode_bulan INTEGER,
+    periode_tahun INTEGER,
+    upload_id INTEGER,
+    periode TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ardebt (
+    id BIGSERIAL PRIMARY KEY,
+    nomen TEXT,
+    nomen_id INTEGER,
+    saldo_tunggakan DOUBLE PRECISION DEFAULT 0,
+    pc TEXT,
+    ez TEXT,
+    umur_piutang INTEGER,
+    periode_bulan INTEGER,
+    periode_tahun INTEGER,
+    upload_id INTEGER,
+    periode TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sbrs_data (
+    id BIGSERIAL PRIMARY KEY,
+    nomen TEXT NOT NULL,
+    nomen_id INTEGER,
+    nama TEXT,
+    alamat TEXT,
+    rayon TEXT,
+    readmethod TEXT,
+    skip_status TEXT,
+    trouble_status TEXT,
+    spm_status TEXT,
+    stand_awal DOUBLE PRECISION,
+    stand_akhir DOUBLE PRECISION,
+    volume DOUBLE PRECISION,
+    analisa_tindak_lanjut TEXT,
+    tag1 TEXT,
+    tag2 TEXT,
+    periode_bulan INTEGER NOT NULL,
+    periode_tahun INTEGER NOT NULL,
+    upload_id INTEGER REFERENCES upload_metadata(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS analisa_manual (
+    id SERIAL PRIMARY KEY,
+    nomen TEXT,
+    jenis_anomali TEXT,
+    deskripsi TEXT,
+    status TEXT DEFAULT 'pending',
+    priority TEXT DEFAULT 'medium',
+    assigned_to TEXT,
+    due_date TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analisa_comments (
+    id SERIAL PRIMARY KEY,
+    analisa_id INTEGER NOT NULL REFERENCES analisa_manual(id),
+    "user" TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analisa_activity (
+    id SERIAL PRIMARY KEY,
+    analisa_id INTEGER NOT NULL REFERENCES analisa_manual(id),
+    action TEXT NOT NULL,
+    "user" TEXT NOT NULL,
+    icon TEXT DEFAULT 'circle',
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS slow_queries (
+    id SERIAL PRIMARY KEY,
+    logged_at TEXT NOT NULL,
+    endpoint TEXT,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    sql TEXT NOT NULL,
+    params TEXT,
+    query_plan TEXT
+);
+
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    id SERIAL PRIMARY KEY,
+    task TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    page_count_before INTEGER,
+    page_count_after INTEGER,
+    freelist_before INTEGER,
+    freelist_after INTEGER,
+    detail TEXT
+);
+
+CREATE TABLE IF NOT EXISTS kpi_periode (
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    total_pelanggan INTEGER NOT NULL DEFAULT 0,
+    jumlah_pelanggan INTEGER NOT NULL DEFAULT 0,
+    target_mc DOUBLE PRECISION NOT NULL DEFAULT 0,
+    collection_current DOUBLE PRECISION NOT NULL DEFAULT 0,
+    collection_tunggakan DOUBLE PRECISION NOT NULL DEFAULT 0,
+    collection_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sudah_bayar INTEGER NOT NULL DEFAULT 0,
+    belum_bayar INTEGER NOT NULL DEFAULT 0,
+    unpaid_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_tunggakan DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (periode_tahun, periode_bulan)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_periode_rayon (
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    rayon TEXT,
+    total_pelanggan INTEGER NOT NULL DEFAULT 0,
+    jumlah_pelanggan INTEGER NOT NULL DEFAULT 0,
+    target_mc DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sudah_bayar INTEGER NOT NULL DEFAULT 0,
+    realisasi DOUBLE PRECISION NOT NULL DEFAULT 0,
+    belum_bayar INTEGER NOT NULL DEFAULT 0,
+    unpaid_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS agg_cube (
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    rayon TEXT,
+    pc TEXT,
+    ez TEXT,
+    tarif TEXT,
+    total_pelanggan INTEGER NOT NULL DEFAULT 0,
+    target DOUBLE PRECISION NOT NULL DEFAULT 0,
+    realisasi DOUBLE PRECISION NOT NULL DEFAULT 0,
+    realisasi_current DOUBLE PRECISION NOT NULL DEFAULT 0,
+    realisasi_tunggakan DOUBLE PRECISION NOT NULL DEFAULT 0,
+    volume DOUBLE PRECISION NOT NULL DEFAULT 0,
+    outstanding DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+    pelanggan_tidak_bayar INTEGER NOT NULL DEFAULT 0,
+    unpaid_amount DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS collection_daily (
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    tgl_bayar TEXT NOT NULL,
+    hari INTEGER,
+    transaksi INTEGER NOT NULL DEFAULT 0,
+    pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+    current DOUBLE PRECISION NOT NULL DEFAULT 0,
+    tunggakan DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cum_current DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cum_tunggakan DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cum_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cum_pelanggan_bayar INTEGER NOT NULL DEFAULT 0,
+    target DOUBLE PRECISION NOT NULL DEFAULT 0,
+    cum_pct_target DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (periode_tahun, periode_bulan, tgl_bayar)
+);
+
+CREATE TABLE IF NOT EXISTS paid_set (
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    pelanggan INTEGER NOT NULL DEFAULT 0,
+    nomen_ids BYTEA NOT NULL,
+    data_version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (periode_tahun, periode_bulan)
+);
+
+CREATE TABLE IF NOT EXISTS customer_series (
+    nomen_id INTEGER NOT NULL,
+    periode_tahun INTEGER NOT NULL,
+    periode_bulan INTEGER NOT NULL,
+    kubikasi DOUBLE PRECISION,
+    target_mc DOUBLE PRECISION,
+    sbrs_volume DOUBLE PRECISION,
+    bayar DOUBLE PRECISION,
+    transaksi INTEGER,
+    saldo_tunggakan DOUBLE PRECISION,
+    umur_piutang INTEGER,
+    PRIMARY KEY (nomen_id, periode_tahun, periode_bulan)
+);
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    source TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_coll_tgl ON collection_harian(tgl_bayar);
+CREATE INDEX IF NOT EXISTS idx_master_rayon ON master_pelanggan(rayon);
+CREATE INDEX IF NOT EXISTS idx_master_periode_rayon ON master_pelanggan(periode_tahun, periode_bulan, rayon, nomen);
+CREATE INDEX IF NOT EXISTS idx_master_periode_nid ON master_pelanggan(periode_tahun, periode_bulan, nomen_id);
+CREATE INDEX IF NOT EXISTS idx_coll_periode_nid ON collection_harian(periode_tahun, periode_bulan, nomen_id);
+DROP INDEX IF EXISTS idx_coll_periode_tgl;
+CREATE INDEX IF NOT EXISTS idx_coll_periode_sort ON collection_harian(periode_tahun, periode_bulan, (COALESCE(tgl_bayar, '')) DESC, (COALESCE(jumlah_bayar, 0)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_mb_periode_nid ON master_bayar(periode_tahun, periode_bulan, nomen_id);
+CREATE INDEX IF NOT EXISTS idx_mainbill_periode_nid ON mainbill(periode_tahun, periode_bulan, nomen_id);
+CREATE INDEX IF NOT EXISTS idx_ardebt_periode_nid ON ardebt(periode_tahun, periode_bulan, nomen_id);
+CREATE INDEX IF NOT EXISTS idx_sbrs_periode_nid ON sbrs_data(periode_tahun, periode_bulan, nomen_id);
+CREATE INDEX IF NOT EXISTS idx_master_nid ON master_pelanggan(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_coll_nid ON collection_harian(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_mb_nid ON master_bayar(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_ardebt_nid ON ardebt(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_mainbill_nid ON mainbill(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_analisa_nomen ON analisa_manual(nomen, updated_at);
+CREATE INDEX IF NOT EXISTS idx_sbrs_nid ON sbrs_data(nomen_id);
+CREATE INDEX IF NOT EXISTS idx_slow_queries_duration ON slow_queries(duration_ms);
+CREATE INDEX IF NOT EXISTS idx_kpi_rayon_periode ON kpi_periode_rayon(periode_tahun, periode_bulan, rayon);
+CREATE INDEX IF NOT EXISTS idx_cube_periode ON agg_cube(periode_tahun, periode_bulan, pc, ez);
@@ -0,0 +1,108 @@
+"""
+Customer Search Module
+Index FTS5 nomen / nama / alamat untuk pencarian pelanggan
+
+LIKE '%...%' pada master_pelanggan membaca seluruh tabel. customer_fts
+(FTS5, satu baris per pelanggan, rowid = nomen_id) menyimpan nomen, nama
+dan alamat dari periode MC terbaru; loader MC menyinkronkan baris periode
+yang diupload di transaksi yang sama (sync_customer_fts).
+
+Pencarian: setiap kata jadi prefix query ("jl"* "sun"*), diurutkan bm25
+(nama lebih berat dari alamat), lalu di-join ke master_pelanggan periode
+yang diminta lewat idx_master_periode_nid.
+
+PostgreSQL tidak punya FTS5: search_customers memakai ILIKE per periode.
+"""
+
+import re
+
+from core.database import is_sqlite
+from core.queries import fetch_all, fetch_one
+
+# Bobot bm25 per kolom (nomen, nama, alamat)
+BM25_WEIGHTS = (5.0, 10.0, 2.0)
+
+MAX_LIMIT = 100
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def create_customer_fts(cursor):
+    """Buat tabel FTS5 (SQLite saja); True jika baru dibuat"""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customer_fts'"
+    ).fetchone()
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS customer_fts USING fts5(
+            nomen, nama, alamat,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    return exists is None
+
+
+def _upsert_periode(db, bulan, tahun, replace=True):
+    if replace:
+        db.execute('''
+            DELETE FROM customer_fts WHERE rowid IN (
+                SELECT nomen_id FROM master_pelanggan
+                WHERE periode_bulan = ? AND periode_tahun = ?
+            )
+        ''', (bulan, tahun))
+    db.execute('''
+        INSERT INTO customer_fts (rowid, nomen, nama, alamat)
+        SELECT m.nomen_id, m.nomen, COALESCE(m.nama, ''), COALESCE(m.alamat, '')
+        FROM master_pelanggan m
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+          AND m.nomen_id IS NOT NULL
+          AND m.nomen_id NOT IN (SELECT rowid FROM customer_fts)
+        GROUP BY m.nomen_id
+    ''', (bulan, tahun))
+
+
+def sync_customer_fts(db, bulan, tahun):
+    """
+    Sinkronkan index setelah upload MC (tanpa commit). Periode terbaru
+    menimpa nama/alamat; upload periode lama hanya menambah pelanggan
+    yang belum ada di index.
+    """
+    if not is_sqlite():
+        return
+    latest = fetch_one(db, 'latest_periode_mc')
+    is_latest = latest is None or (tahun, bulan) >= (latest['periode_tahun'], latest['periode_bulan'])
+    _upsert_periode(db, bulan, tahun, replace=is_latest)
+
+
+def rebuild_customer_fts(db):
+    """Bangun ulang index dari semua periode MC (terlama → terbaru); return jumlah pelanggan"""
+    if not is_sqlite():
+        return 0
+    db.execute('DELETE FROM customer_fts')
+    periodes = db.execute('''
+        SELECT DISTINCT periode_tahun, periode_bulan FROM master_pelanggan
+        ORDER BY periode_tahun, periode_bulan
+    ''').fetchall()
+    for tahun, bulan in periodes:
+        _upsert_periode(db, bulan, tahun)
+    db.execute("INSERT INTO customer_fts (customer_fts) VALUES ('optimize')")
+    return db.execute('SELECT COUNT(*) FROM customer_fts').fetchone()[0]
+
+
+def build_match(text):
+    """Teks bebas → query FTS5: semua kata wajib, masing-masing sebagai prefix"""
+    tokens = _TOKEN.findall(text or '')
+    return ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+def search_customers(db, text, bulan, tahun, limit=20):
+    """Pelanggan MC periode (bulan, tahun) yang cocok dengan text, urut relevansi"""
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if not is_sqlite():
+        pattern = f"%{(text or '').strip()}%"
+        return fetch_all(db, 'customer_search_like', (bulan, tahun, pattern, pattern, pattern, limit))
+
+    match = build_match(text)
+    if not match:
+        return []
+    return fetch_all(db, 'customer_search', (*BM25_WEIGHTS, match, bulan, tahun, limit))
@@ -0,0 +1,117 @@
+"""
+Customer Series Module
+Time-series ringkas per pelanggan: satu baris per (nomen_id, periode)
+
+History multi periode dulu membaca master_pelanggan / sbrs_data /
+collection_harian / ardebt per nomen — baris lebar tersebar di banyak
+periode. customer_series (WITHOUT ROWID, primary key nomen_id + periode)
+menyimpan angka yang dipakai sparkline & trend: kubikasi, target_mc,
+volume SBRS, total bayar + jumlah transaksi, saldo tunggakan dan umur
+piutang. Window 24 periode = satu range scan primary key.
+
+Setiap upload mengisi ulang kolom milik tabel sumbernya saja
+(refresh_customer_series, di transaksi upload): kolom itu di-NULL-kan
+untuk periode tersebut lalu di-upsert dari agregat per nomen_id. NULL
+berarti pelanggan tidak punya baris di sumber itu; baris yang semua
+kolomnya NULL dihapus.
+
+Arsip Parquet tidak menyentuh tabel ini, jadi series tetap lengkap untuk
+periode di luar hot window.
+"""
+
+from core.queries import fetch_all, fetch_one
+
+# Jumlah periode default / maksimum untuk endpoint series
+SERIES_DEFAULT_PERIODES = 24
+SERIES_MAX_PERIODES = 120
+
+SERIES_COLUMNS = [
+    'kubikasi', 'target_mc', 'sbrs_volume', 'bayar', 'transaksi', 'saldo_tunggakan', 'umur_piutang',
+]
+
+# file_type upload → (tabel sumber, {kolom series: agregat per nomen_id})
+SERIES_SOURCES = {
+    'mc': ('master_pelanggan', {'kubikasi': 'SUM(kubikasi)', 'target_mc': 'SUM(target_mc)'}),
+    'sbrs': ('sbrs_data', {'sbrs_volume': 'SUM(volume)'}),
+    'collection': ('collection_harian', {'bayar': 'SUM(jumlah_bayar)', 'transaksi': 'COUNT(*)'}),
+    'ardebt': ('ardebt', {'saldo_tunggakan': 'SUM(saldo_tunggakan)', 'umur_piutang': 'MAX(umur_piutang)'}),
+}
+
+
+def create_customer_series(cursor):
+    """Buat tabel customer_series (SQLite); True jika baru dibuat"""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customer_series'"
+    ).fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_series (
+            nomen_id INTEGER NOT NULL,
+            periode_tahun INTEGER NOT NULL,
+            periode_bulan INTEGER NOT NULL,
+            kubikasi REAL,
+            target_mc REAL,
+            sbrs_volume REAL,
+            bayar REAL,
+            transaksi INTEGER,
+            saldo_tunggakan REAL,
+            umur_piutang INTEGER,
+            PRIMARY KEY (nomen_id, periode_tahun, periode_bulan)
+        ) WITHOUT ROWID
+    ''')
+    return exists is None
+
+
+def refresh_customer_series(db, file_type, bulan, tahun):
+    """Isi ulang kolom series milik file_type untuk satu periode (tanpa commit)"""
+    if file_type not in SERIES_SOURCES:
+        return
+    table, measures = SERIES_SOURCES[file_type]
+    columns = list(measures)
+
+    db.execute(f'''
+        UPDATE customer_series SET {', '.join(f'{c} = NULL' for c in columns)}
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    ''', (tahun, bulan))
+    db.execute(f'''
+        INSERT INTO customer_series (nomen_id, periode_tahun, periode_bulan, {', '.join(columns)})
+        SELECT nomen_id, periode_tahun, periode_bulan, {', '.join(measures.values())}
+        FROM {table}
+        WHERE periode_tahun = ? AND periode_bulan = ? AND nomen_id IS NOT NULL
+        GROUP BY nomen_id, periode_tahun, periode_bulan
+        ON CONFLICT (nomen_id, periode_tahun, periode_bulan) DO UPDATE SET
+            {', '.join(f'{c} = excluded.{c}' for c in columns)}
+    ''', (tahun, bulan))
+    db.execute(f'''
+        DELETE FROM customer_series
+        WHERE periode_tahun = ? AND periode_bulan = ?
+          AND {' AND '.join(f'{c} IS NULL' for c in SERIES_COLUMNS)}
+    ''', (tahun, bulan))
+
+
+def rebuild_customer_series(db):
+    """Isi customer_series dari semua periode live di tabel sumber; return jumlah baris"""
+    for file_type, (table, _) in SERIES_SOURCES.items():
+        periodes = db.execute(f'SELECT DISTINCT periode_tahun, periode_bulan FROM {table}').fetchall()
+        for tahun, bulan in periodes:
+            refresh_customer_series(db, file_type, bulan, tahun)
+    return db.execute('SELECT COUNT(*) FROM customer_series').fetchone()[0]
+
+
+def get_customer_series(db, nomen, last=SERIES_DEFAULT_PERIODES):
+    """
+    Series `last` periode terakhir pelanggan sebagai array per kolom (urut
+    periode naik, siap untuk sparkline), atau None jika nomen tidak dikenal
+    """
+    row = fetch_one(db, 'profile_nomen', (nomen,))
+    if row is None:
+        return None
+    last = max(1, min(int(last), SERIES_MAX_PERIODES))
+    rows = fetch_all(db, 'customer_series', (row['id'], last))[::-1]
+
+    series = {
+        'nomen': nomen,
+        'periodes': [f"{r['periode_tahun']:04d}-{r['periode_bulan']:02d}" for r in rows],
+    }
+    for column in SERIES_COLUMNS:
+        series[column] = [r[column] for r in rows]
+    return series
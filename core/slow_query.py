@@ -0,0 +1,219 @@
+"""
+Slow Query Log Module
+Times every SQLite statement and records the slow ones with EXPLAIN QUERY PLAN
+
+Koneksi dibuat dengan factory TimedConnection. Setiap statement diukur
+dari execute() sampai fetch terakhir; statement yang melewati
+SLOW_QUERY_THRESHOLD_MS dikumpulkan di koneksi, lalu di akhir request
+(teardown) di-EXPLAIN dan ditulis ke:
+- rotating log file (SLOW_QUERY_LOG_PATH)
+- tabel slow_queries
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from flask import current_app, has_request_context, request
+
+DEFAULT_THRESHOLD_MS = 200
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_logger = logging.getLogger('sunter.slow_query')
+_logger_lock = threading.Lock()
+
+
+def _config(key, default=None):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+# ==========================================
+# TIMED CONNECTION / CURSOR
+# ==========================================
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor yang mengakumulasi waktu execute + fetch per statement.
+
+    Iterasi langsung (for row in cursor) tidak ikut diukur; semua
+    endpoint memakai fetchone/fetchall.
+    """
+
+    def _begin(self, sql, params):
+        self._sq_sql = sql
+        self._sq_params = params
+        self._sq_elapsed = 0.0
+        self._sq_entry = None
+
+    def _add(self, elapsed):
+        self._sq_elapsed += elapsed
+        elapsed_ms = self._sq_elapsed * 1000
+
+        if self._sq_entry is not None:
+            self._sq_entry['duration_ms'] = elapsed_ms
+            return
+
+        threshold = self.connection.slow_threshold_ms
+        if threshold and elapsed_ms >= threshold:
+            self._sq_entry = {
+                'logged_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'endpoint': request.endpoint if has_request_context() else None,
+                'duration_ms': elapsed_ms,
+                'sql': self._sq_sql,
+                'params': self._sq_params
+            }
+            self.connection.slow_queries.append(self._sq_entry)
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self._begin(sql, seq_of_parameters[0] if seq_of_parameters else ())
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            if hasattr(self, '_sq_sql'):
+                self._add(time.perf_counter() - started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            if hasattr(self, '_sq_sql'):
+                self._add(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            if hasattr(self, '_sq_sql'):
+                self._add(time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3.Connection yang membuat TimedCursor dan menampung slow queries"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slow_threshold_ms = _config('SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS)
+        self.slow_queries = []
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ==========================================
+# FLUSH (EXPLAIN + LOG FILE + TABLE)
+# ==========================================
+
+def _get_logger():
+    """Pasang RotatingFileHandler sekali per proses"""
+    with _logger_lock:
+        if not _logger.handlers:
+            log_path = str(_config('SLOW_QUERY_LOG_PATH') or os.path.join('logs', 'slow_query.log'))
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            _logger.addHandler(handler)
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+    return _logger
+
+
+def explain_query_plan(conn, sql, params=()):
+    """
+    Return output EXPLAIN QUERY PLAN sebagai teks berindentasi
+    (format sama seperti .eqp di sqlite3 shell)
+    """
+    try:
+        # sqlite3.Cursor biasa supaya EXPLAIN tidak ikut diukur
+        rows = sqlite3.Cursor(conn).execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return f"(explain failed: {e})"
+
+    depth = {0: -1}
+    lines = []
+    for row in rows:
+        node_id, parent, _, detail = row[0], row[1], row[2], row[3]
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+def _format_params(params):
+    try:
+        return json.dumps(params if isinstance(params, dict) else list(params), default=str)
+    except TypeError:
+        return repr(params)
+
+
+def flush_slow_queries(conn, db_path):
+    """
+    Tulis slow queries yang terkumpul di koneksi ke log file dan tabel
+    slow_queries. Dipanggil dari teardown sebelum koneksi ditutup/dikembalikan.
+    """
+    entries = getattr(conn, 'slow_queries', None)
+    if not entries:
+        return 0
+    conn.slow_queries = []
+
+    logger = _get_logger()
+    rows = []
+    for entry in entries:
+        plan = explain_query_plan(conn, entry['sql'], entry['params'])
+        params = _format_params(entry['params'])
+        sql = ' '.join(entry['sql'].split())
+
+        logger.info(
+            f"[{entry['duration_ms']:.1f} ms] endpoint={entry['endpoint']} "
+            f"sql={sql} params={params}\n{plan}"
+        )
+        rows.append((entry['logged_at'], entry['endpoint'], round(entry['duration_ms'], 2),
+                     sql, params, plan))
+
+    # Koneksi terpisah: koneksi reader bersifat query_only
+    try:
+        writer = sqlite3.connect(db_path, timeout=1)
+        try:
+            writer.executemany('''
+                INSERT INTO slow_queries (logged_at, endpoint, duration_ms, sql, params, query_plan)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            writer.commit()
+        finally:
+            writer.close()
+    except sqlite3.Error as e:
+        print(f"⚠️  Failed to store slow queries: {e}")
+
+    print(f"🐢 {len(rows)} slow quer{'y' if len(rows) == 1 else 'ies'} logged")
+    return len(rows)
@@ -0,0 +1,496 @@
+"""
+KPI Summary Module
+Tabel ringkasan per periode (kpi_periode), per rayon (kpi_periode_rayon)
+dan cube agregasi (agg_cube)
+
+Endpoint KPI / home / belum bayar / SBRS dulu menghitung ulang SUM(target_mc),
+COUNT(DISTINCT nomen) dan split collection dari tabel fakta di setiap
+request. Sekarang angka itu disimpan per periode dan dibaca dengan satu
+lookup primary key.
+
+Ringkasan satu periode dihitung ulang (DELETE + INSERT ... SELECT) di
+transaksi yang sama dengan upload MC / collection / ARDEBT periode itu,
+jadi ringkasan tidak pernah tertinggal dari tabel fakta. Perintah
+`flask kpi-summary rebuild|check` membangun ulang semua periode atau
+membandingkan isi ringkasan dengan hasil hitung langsung dari tabel fakta.
+
+agg_cube menyimpan grain terkecil (periode, rayon, pc, ez, tarif) dengan
+target, realisasi current/tunggakan, volume, outstanding dan jumlah
+pelanggan bayar / tidak bayar. Endpoint PCEZ, per PC dan per rayon cukup
+menjumlahkan beberapa ribu baris cube (GROUP BY dimensi yang diminta).
+pc/ez diambil dari ARDEBT seperti endpoint PCEZ sebelumnya ('UNKNOWN'
+jika pelanggan tidak ada di ARDEBT periode itu).
+
+collection_daily menyimpan satu baris per tanggal bayar: nilai harian dan
+kumulatif (current, tunggakan, total, pelanggan bayar distinct) plus
+persentase kumulatif terhadap target MC. Grafik harian dan perbandingan
+dengan bulan lalu cukup membaca <= 31 baris per periode.
+
+Periode yang collection / ARDEBT-nya sudah dipindah ke arsip Parquet
+tidak di-rebuild (nilai ringkasan lama dipertahankan).
+
+Trend KPI dibaca dari kpi_periode (satu baris per periode) dan di-cache
+per proses dengan kunci data_version; setelah upload berikutnya versi
+naik dan trend dihitung ulang sekali.
+"""
+
+import math
+import threading
+
+from core.archive import archived_collection_totals, archived_periodes, get_archive_dir, live_periodes
+from core.database import get_db_path
+from core.paidset import build_paid_set
+from core.queries import fetch_all, fetch_one
+from core.versioning import bump_data_version, current_data_version
+
+# Jenis upload yang mengubah angka ringkasan
+KPI_FILE_TYPES = {'mc', 'collection', 'ardebt'}
+
+KPI_PERIODE_COLUMNS = [
+    'total_pelanggan', 'jumlah_pelanggan', 'target_mc',
+    'collection_current', 'collection_tunggakan', 'collection_total',
+    'sudah_bayar', 'belum_bayar', 'unpaid_amount', 'total_tunggakan',
+]
+
+KPI_RAYON_COLUMNS = [
+    'total_pelanggan', 'jumlah_pelanggan', 'target_mc',
+    'sudah_bayar', 'realisasi', 'belum_bayar', 'unpaid_amount',
+]
+
+CUBE_DIMENSIONS = ['rayon', 'pc', 'ez', 'tarif']
+
+CUBE_COLUMNS = [
+    'total_pelanggan', 'target', 'realisasi', 'realisasi_current', 'realisasi_tunggakan',
+    'volume', 'outstanding', 'pelanggan_bayar', 'pelanggan_tidak_bayar', 'unpaid_amount',
+]
+
+DAILY_COLUMNS = [
+    'hari', 'transaksi', 'pelanggan_bayar', 'current', 'tunggakan', 'total',
+    'cum_current', 'cum_tunggakan', 'cum_total', 'cum_pelanggan_bayar', 'target', 'cum_pct_target',
+]
+
+# Parameter: (tahun, bulan) x 4
+_KPI_PERIODE_SELECT = '''
+    WITH mc AS (
+        SELECT nomen_id, target_mc FROM master_pelanggan
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    ),
+    coll AS (
+        SELECT nomen_id, tipe_bayar, jumlah_bayar FROM collection_harian
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    ),
+    paid AS (
+        SELECT DISTINCT nomen_id FROM coll
+    ),
+    unpaid AS (
+        SELECT mc.nomen_id, mc.target_mc FROM mc
+        LEFT JOIN paid p ON p.nomen_id = mc.nomen_id
+        WHERE p.nomen_id IS NULL
+    )
+    SELECT
+        ? AS periode_tahun,
+        ? AS periode_bulan,
+        (SELECT COUNT(*) FROM mc) AS total_pelanggan,
+        (SELECT COUNT(DISTINCT nomen_id) FROM mc) AS jumlah_pelanggan,
+        (SELECT COALESCE(SUM(target_mc), 0) FROM mc) AS target_mc,
+        (SELECT COALESCE(SUM(jumlah_bayar), 0) FROM coll WHERE tipe_bayar = 'current') AS collection_current,
+        (SELECT COALESCE(SUM(jumlah_bayar), 0) FROM coll WHERE tipe_bayar = 'tunggakan') AS collection_tunggakan,
+        (SELECT COALESCE(SUM(jumlah_bayar), 0) FROM coll) AS collection_total,
+        (SELECT COUNT(*) FROM paid) AS sudah_bayar,
+        (SELECT COUNT(*) FROM unpaid) AS belum_bayar,
+        (SELECT COALESCE(SUM(target_mc), 0) FROM unpaid) AS unpaid_amount,
+        (SELECT COALESCE(SUM(saldo_tunggakan), 0) FROM ardebt
+         WHERE periode_tahun = ? AND periode_bulan = ?) AS total_tunggakan
+'''
+
+# Parameter: (tahun, bulan) x 3
+_KPI_RAYON_SELECT = '''
+    WITH mc AS (
+        SELECT nomen_id, rayon, target_mc FROM master_pelanggan
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    ),
+    paid AS (
+        SELECT nomen_id, SUM(jumlah_bayar) AS bayar FROM collection_harian
+        WHERE periode_tahun = ? AND periode_bulan = ?
+        GROUP BY nomen_id
+    )
+    SELECT
+        ? AS periode_tahun,
+        ? AS periode_bulan,
+        mc.rayon,
+        COUNT(*) AS total_pelanggan,
+        COUNT(DISTINCT mc.nomen_id) AS jumlah_pelanggan,
+        COALESCE(SUM(mc.target_mc), 0) AS target_mc,
+        COUNT(p.nomen_id) AS sudah_bayar,
+        COALESCE(SUM(p.bayar), 0) AS realisasi,
+        SUM(CASE WHEN p.nomen_id IS NULL THEN 1 ELSE 0 END) AS belum_bayar,
+        COALESCE(SUM(CASE WHEN p.nomen_id IS NULL THEN mc.target_mc ELSE 0 END), 0) AS unpaid_amount
+    FROM mc
+    LEFT JOIN paid p ON p.nomen_id = mc.nomen_id
+    GROUP BY mc.rayon
+'''
+
+# Parameter: (tahun, bulan) x 4
+_AGG_CUBE_SELECT = '''
+    WITH mc AS (
+        SELECT nomen_id, rayon, tarif, target_mc FROM master_pelanggan
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    ),
+    coll AS (
+        SELECT
+            nomen_id,
+            SUM(jumlah_bayar) AS bayar,
+            SUM(CASE WHEN tipe_bayar = 'current' THEN jumlah_bayar ELSE 0 END) AS bayar_current,
+            SUM(CASE WHEN tipe_bayar = 'tunggakan' THEN jumlah_bayar ELSE 0 END) AS bayar_tunggakan,
+            SUM(volume_air) AS volume
+        FROM collection_harian
+        WHERE periode_tahun = ? AND periode_bulan = ?
+        GROUP BY nomen_id
+    ),
+    ar AS (
+        SELECT nomen_id, MIN(pc) AS pc, MIN(ez) AS ez, SUM(saldo_tunggakan) AS saldo
+        FROM ardebt
+        WHERE periode_tahun = ? AND periode_bulan = ?
+        GROUP BY nomen_id
+    )
+    SELECT
+        ? AS periode_tahun,
+        ? AS periode_bulan,
+        mc.rayon,
+        COALESCE(ar.pc, 'UNKNOWN') AS pc,
+        COALESCE(ar.ez, 'UNKNOWN') AS ez,
+        mc.tarif,
+        COUNT(*) AS total_pelanggan,
+        COALESCE(SUM(mc.target_mc), 0) AS target,
+        COALESCE(SUM(c.bayar), 0) AS realisasi,
+        COALESCE(SUM(c.bayar_current), 0) AS realisasi_current,
+        COALESCE(SUM(c.bayar_tunggakan), 0) AS realisasi_tunggakan,
+        COALESCE(SUM(c.volume), 0) AS volume,
+        COALESCE(SUM(ar.saldo), 0) AS outstanding,
+        COUNT(c.nomen_id) AS pelanggan_bayar,
+        SUM(CASE WHEN c.nomen_id IS NULL THEN 1 ELSE 0 END) AS pelanggan_tidak_bayar,
+        COALESCE(SUM(CASE WHEN c.nomen_id IS NULL THEN mc.target_mc ELSE 0 END), 0) AS unpaid_amount
+    FROM mc
+    LEFT JOIN coll c ON c.nomen_id = mc.nomen_id
+    LEFT JOIN ar ON ar.nomen_id = mc.nomen_id
+    GROUP BY mc.rayon, COALESCE(ar.pc, 'UNKNOWN'), COALESCE(ar.ez, 'UNKNOWN'), mc.tarif
+'''
+
+# Parameter: (tahun, bulan) x 4
+# cum_pelanggan_bayar = pelanggan yang pembayaran pertamanya <= tanggal itu
+_COLLECTION_DAILY_SELECT = '''
+    WITH daily AS (
+        SELECT
+            tgl_bayar,
+            COUNT(*) AS transaksi,
+            COUNT(DISTINCT nomen_id) AS pelanggan_bayar,
+            SUM(CASE WHEN tipe_bayar = 'current' THEN jumlah_bayar ELSE 0 END) AS current,
+            SUM(CASE WHEN tipe_bayar = 'tunggakan' THEN jumlah_bayar ELSE 0 END) AS tunggakan,
+            SUM(jumlah_bayar) AS total
+        FROM collection_harian
+        WHERE periode_tahun = ? AND periode_bulan = ? AND tgl_bayar IS NOT NULL
+        GROUP BY tgl_bayar
+    ),
+    first_pay AS (
+        SELECT tgl_bayar, COUNT(*) AS pelanggan_baru
+        FROM (
+            SELECT nomen_id, MIN(tgl_bayar) AS tgl_bayar
+            FROM collection_harian
+            WHERE periode_tahun = ? AND periode_bulan = ?
+              AND tgl_bayar IS NOT NULL AND nomen_id IS NOT NULL
+            GROUP BY nomen_id
+        ) f
+        GROUP BY tgl_bayar
+    ),
+    mc AS (
+        SELECT COALESCE(SUM(target_mc), 0) AS target FROM master_pelanggan
+        WHERE periode_tahun = ? AND periode_bulan = ?
+    )
+    SELECT
+        ? AS periode_tahun,
+        ? AS periode_bulan,
+        d.tgl_bayar,
+        CAST(SUBSTR(d.tgl_bayar, 9, 2) AS INTEGER) AS hari,
+        d.transaksi,
+        d.pelanggan_bayar,
+        d.current,
+        d.tunggakan,
+        d.total,
+        SUM(d.current) OVER w AS cum_current,
+        SUM(d.tunggakan) OVER w AS cum_tunggakan,
+        SUM(d.total) OVER w AS cum_total,
+        SUM(COALESCE(f.pelanggan_baru, 0)) OVER w AS cum_pelanggan_bayar,
+        mc.target,
+        CASE WHEN mc.target > 0 THEN SUM(d.total) OVER w * 100.0 / mc.target ELSE 0 END AS cum_pct_target
+    FROM daily d
+    LEFT JOIN first_pay f ON f.tgl_bayar = d.tgl_bayar
+    CROSS JOIN mc
+    WINDOW w AS (ORDER BY d.tgl_bayar ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+'''
+
+# (tabel, SELECT, jumlah pasangan parameter, kolom dimensi, kolom ukuran)
+_SUMMARY_TABLES = [
+    ('kpi_periode', _KPI_PERIODE_SELECT, 4, [], KPI_PERIODE_COLUMNS),
+    ('kpi_periode_rayon', _KPI_RAYON_SELECT, 3, ['rayon'], KPI_RAYON_COLUMNS),
+    ('agg_cube', _AGG_CUBE_SELECT, 4, CUBE_DIMENSIONS, CUBE_COLUMNS),
+    ('collection_daily', _COLLECTION_DAILY_SELECT, 4, ['tgl_bayar'], DAILY_COLUMNS),
+]
+
+
+def _periode_params(bulan, tahun, times):
+    return (tahun, bulan) * times
+
+
+def refresh_kpi_periode(db, bulan, tahun):
+    """
+    Hitung ulang ringkasan + cube + paid_set satu periode (tanpa commit;
+    dipanggil di transaksi upload)
+    """
+    for table, select, pairs, dimensions, measures in _SUMMARY_TABLES:
+        columns = ', '.join(['periode_tahun', 'periode_bulan'] + dimensions + measures)
+        db.execute(f'DELETE FROM {table} WHERE periode_tahun = ? AND periode_bulan = ?', (tahun, bulan))
+        db.execute(f'INSERT INTO {table} ({columns}) {select}', _periode_params(bulan, tahun, pairs))
+    build_paid_set(db, bulan, tahun)
+
+
+def _source_periodes(db):
+    """Semua (tahun, bulan) yang punya data MC, collection atau ARDEBT"""
+    rows = db.execute('''
+        SELECT DISTINCT periode_tahun, periode_bulan FROM master_pelanggan
+        UNION SELECT DISTINCT periode_tahun, periode_bulan FROM collection_harian
+        UNION SELECT DISTINCT periode_tahun, periode_bulan FROM ardebt
+    ''').fetchall()
+    return sorted((int(r[0]), int(r[1])) for r in rows)
+
+
+def _archived(db, archive_dir=None):
+    """Periode yang datanya hanya ada di arsip (bukan yang sudah di-upload ulang ke tabel live)"""
+    archived = set()
+    for table in ('collection_harian', 'ardebt'):
+        periodes = archived_periodes(table, archive_dir)
+        archived.update(set(periodes) - live_periodes(db, table, periodes))
+    return archived
+
+
+def rebuild_kpi_summary(db, periodes=None, archive_dir=None):
+    """
+    Bangun ulang ringkasan untuk periodes [(tahun, bulan)] (default semua).
+    Return list periode yang di-rebuild (tanpa commit).
+    """
+    archived = _archived(db, archive_dir)
+    rebuilt = []
+    for tahun, bulan in periodes or _source_periodes(db):
+        if (tahun, bulan) in archived:
+            continue
+        refresh_kpi_periode(db, bulan, tahun)
+        rebuilt.append((tahun, bulan))
+    return rebuilt
+
+
+def _differs(stored, actual):
+    if stored is None or actual is None:
+        return stored != actual
+    return not math.isclose(float(stored), float(actual), rel_tol=1e-9, abs_tol=0.005)
+
+
+def check_kpi_summary(db, periodes=None, archive_dir=None):
+    """
+    Bandingkan ringkasan & cube dengan hasil hitung langsung dari tabel fakta.
+    Return list selisih: {periode, table, key, column, stored, actual}
+    (key = nilai dimensi, () untuk kpi_periode).
+    """
+    archived = _archived(db, archive_dir)
+    mismatches = []
+
+    for tahun, bulan in periodes or _source_periodes(db):
+        if (tahun, bulan) in archived:
+            continue
+        label = f"{tahun:04d}-{bulan:02d}"
+
+        for table, select, pairs, dimensions, measures in _SUMMARY_TABLES:
+            def _keyed(rows):
+                return {tuple(row[d] for d in dimensions): row for row in rows}
+
+            actual = _keyed(db.execute(select, _periode_params(bulan, tahun, pairs)).fetchall())
+            stored = _keyed(db.execute(
+                f'SELECT * FROM {table} WHERE periode_tahun = ? AND periode_bulan = ?', (tahun, bulan)
+            ).fetchall())
+
+            for key in sorted(set(actual) | set(stored), key=repr):
+                for column in measures:
+                    stored_value = stored[key][column] if key in stored else None
+                    actual_value = actual[key][column] if key in actual else None
+                    if _differs(stored_value, actual_value):
+                        mismatches.append({'periode': label, 'table': table, 'key': key, 'column': column,
+                                           'stored': stored_value, 'actual': actual_value})
+
+    return mismatches
+
+
+def get_kpi_summary(db, bulan, tahun):
+    """Ringkasan satu periode sebagai dict (semua 0 jika periode belum ada)"""
+    row = fetch_one(db, 'kpi_summary', (bulan, tahun))
+    if row is None:
+        return {column: 0 for column in KPI_PERIODE_COLUMNS}
+    return {column: row[column] for column in KPI_PERIODE_COLUMNS}
+
+
+def get_kpi_summary_rayon(db, bulan, tahun):
+    """Ringkasan per rayon (list of dict, urut rayon)"""
+    return [dict(row) for row in fetch_all(db, 'kpi_summary_rayon', (bulan, tahun))]
+
+
+def get_home_stats(db, bulan=None, tahun=None):
+    """
+    Kartu home + tabel per rayon dari satu query (kpi_periode JOIN
+    kpi_periode_rayon). Tanpa bulan/tahun: periode terbaru yang punya MC.
+    Return None jika belum ada data.
+    """
+    if not bulan or not tahun:
+        latest = fetch_one(db, 'latest_periode_kpi')
+        if latest is None:
+            return None
+        bulan, tahun = latest['periode_bulan'], latest['periode_tahun']
+
+    rows = fetch_all(db, 'home_stats', (bulan, tahun))
+    first = rows[0] if rows else None
+
+    def _card(column):
+        return first[column] if first is not None else 0
+
+    total_pelanggan = _card('total_pelanggan')
+    total_target = _card('target_mc')
+    total_bayar = _card('collection_total')
+    sudah_bayar = _card('sudah_bayar')
+
+    return {
+        'periode': f"{bulan:02d}/{tahun}",
+        'periode_bulan': bulan,
+        'periode_tahun': tahun,
+        'total_pelanggan': total_pelanggan,
+        'sudah_bayar': sudah_bayar,
+        'belum_bayar': _card('belum_bayar'),
+        'pct_bayar': round(sudah_bayar / total_pelanggan * 100, 2) if total_pelanggan > 0 else 0,
+        'total_target': float(total_target),
+        'total_realisasi': float(total_bayar),
+        'pct_realisasi': round(total_bayar / total_target * 100, 2) if total_target > 0 else 0,
+        'total_tunggakan': float(_card('total_tunggakan')),
+        'by_rayon': [{
+            'rayon': row['rayon'],
+            'total': row['rayon_total'],
+            'sudah_bayar': row['rayon_sudah_bayar'],
+            'target': row['rayon_target'],
+            'realisasi': row['rayon_realisasi']
+        } for row in rows if row['rayon_total'] is not None]
+    }
+
+
+def rollup_cube(db, name, bulan, tahun):
+    """Roll-up agg_cube satu periode lewat query registry cube_* (list of dict)"""
+    return [dict(row) for row in fetch_all(db, name, (bulan, tahun))]
+
+
+# ==========================================
+# TREND
+# ==========================================
+
+_trend_cache = {'key': None, 'trend': []}
+_trend_lock = threading.Lock()
+
+
+def _build_kpi_trend(db, archive_dir):
+    # Collection periode lama sudah dipindah ke arsip Parquet; periode yang
+    # di-upload ulang ke tabel live memakai angka live
+    archived = archived_collection_totals(archive_dir)
+    live = live_periodes(db, 'collection_harian', archived)
+    trend = []
+    for row in fetch_all(db, 'kpi_summary_trend'):
+        tahun, bulan = int(row['periode_tahun']), int(row['periode_bulan'])
+        target = row['target_mc']
+        collection = row['collection']
+        if (tahun, bulan) in archived and (tahun, bulan) not in live:
+            collection = collection or archived[(tahun, bulan)]
+        pct = (collection / target * 100) if target > 0 else 0
+        trend.append({
+            'periode': f"{bulan}/{tahun}",
+            'bulan': bulan,
+            'tahun': tahun,
+            'target_mc': target,
+            'collection': collection,
+            'percentage': round(pct, 2)
+        })
+    return trend
+
+
+def load_kpi_trend(db, last=None, start=None, end=None, archive_dir=None):
+    """
+    Trend KPI per periode (urut waktu), di-cache sampai data_version berubah.
+    Filter: start / end = (tahun, bulan) inklusif, last = N periode terakhir.
+    """
+    archive_dir = archive_dir or get_archive_dir()
+    key = (get_db_path(), archive_dir, current_data_version(db))
+    with _trend_lock:
+        if _trend_cache['key'] != key:
+            _trend_cache.update(key=key, trend=_build_kpi_trend(db, archive_dir))
+        trend = _trend_cache['trend']
+
+    if start:
+        trend = [t for t in trend if (t['tahun'], t['bulan']) >= tuple(start)]
+    if end:
+        trend = [t for t in trend if (t['tahun'], t['bulan']) <= tuple(end)]
+    if last:
+        trend = trend[-last:]
+    return list(trend)
+
+
+def get_collection_daily(db, bulan, tahun):
+    """Seri harian + kumulatif satu periode (list of dict, urut tanggal)"""
+    return [dict(row) for row in fetch_all(db, 'collection_daily', (bulan, tahun))]
+
+
+def previous_periode(bulan, tahun):
+    """(bulan, tahun) bulan sebelumnya"""
+    return (12, tahun - 1) if bulan == 1 else (bulan - 1, tahun)
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def init_summary(app):
+    """Register CLI command `flask kpi-summary`"""
+    import click
+
+    @app.cli.command('kpi-summary')
+    @click.argument('action', type=click.Choice(['rebuild', 'check']))
+    @click.option('--periode', 'periode', default=None, help='Hanya periode YYYY-MM')
+    def kpi_summary_command(action, periode):
+        """Rebuild ringkasan KPI atau cek konsistensinya dengan tabel fakta"""
+        from core.database import get_db
+
+        periodes = None
+        if periode:
+            tahun, bulan = periode.split('-')
+            periodes = [(int(tahun), int(bulan))]
+
+        db = get_db()
+        if action == 'rebuild':
+            from core.writer import run_write
+
+            # Satu job writer per periode, bukan satu transaksi panjang untuk semua periode
+            rebuilt = []
+            for tahun_bulan in periodes or _source_periodes(db):
+                rebuilt += run_write(lambda conn, p=tahun_bulan: rebuild_kpi_summary(conn, [p]))
+            if rebuilt:
+                # Cache response / ETag / trend di-key data_version
+                run_write(lambda conn: bump_data_version(conn, 'kpi-summary:rebuild'))
+            print(f"✅ KPI summary rebuilt for {len(rebuilt)} periode(s)")
+            return
+
+        mismatches = check_kpi_summary(db, periodes)
+        for m in mismatches:
+            where = f"{m['periode']} {m['table']}" + (f" {m['key']}" if m['key'] else '')
+            print(f"❌ {where} {m['column']}: stored={m['stored']} actual={m['actual']}")
+        if mismatches:
+            raise SystemExit(1)
+        print("✅ KPI summary consistent with fact tables")
@@ -0,0 +1,72 @@
+"""
+Data Version Module
+Satu nomor versi untuk isi tabel fakta / ringkasan
+
+Setiap perubahan data dashboard (upload, arsip periode, restore backup)
+menaikkan data_version di transaksi yang sama. Tulis analisa tidak
+mengubah data dashboard dan tidak menaikkan versi global. Cache hasil query cukup
+membandingkan versi yang tersimpan dengan current_data_version() (satu
+lookup primary key) — tidak perlu invalidasi lintas worker.
+
+Versi = max(versi + 1, epoch milidetik), jadi tetap naik setelah
+restore backup lama (versi di backup bisa lebih kecil dari versi yang
+sudah pernah dilihat cache).
+
+nomen_dict.data_version menyimpan versi terakhir yang menyentuh satu
+pelanggan (upload periode yang memuat / menghapus barisnya, arsip,
+analisa), untuk cache per nomen (core/profile.py). Versi per nomen
+selalu naik setiap kali disentuh (tidak pernah sama dengan versi lama),
+walaupun analisa dan upload terjadi di milidetik yang sama.
+"""
+
+import time
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+# max(versi nomen + 1, versi baru), portable SQLite / PostgreSQL
+_NEXT_NOMEN_VERSION = 'CASE WHEN data_version >= ? THEN data_version + 1 ELSE ? END'
+
+
+def current_data_version(db):
+    """Versi data saat ini (0 jika belum pernah ada perubahan)"""
+    row = db.execute('SELECT version FROM data_version WHERE id = 1').fetchone()
+    return int(row[0]) if row else 0
+
+
+def bump_data_version(db, source=None):
+    """Naikkan versi (tanpa commit; dipanggil di transaksi yang mengubah data)"""
+    version = max(current_data_version(db) + 1, _now_ms())
+    db.execute('''
+        INSERT INTO data_version (id, version, source, updated_at)
+        VALUES (1, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (id) DO UPDATE SET
+            version = excluded.version,
+            source = excluded.source,
+            updated_at = excluded.updated_at
+    ''', (version, source))
+    return version
+
+
+def touch_periode_nomens(db, version, table, bulan, tahun):
+    """
+    Tandai pelanggan yang punya baris di periode tabel fakta berubah pada
+    `version`. Dipanggil sebelum DELETE periode (pelanggan yang hilang)
+    dan setelah INSERT (pelanggan baru / berubah).
+    """
+    db.execute(f'''
+        UPDATE nomen_dict SET data_version = {_NEXT_NOMEN_VERSION}
+        WHERE id IN (SELECT nomen_id FROM {table} WHERE periode_bulan = ? AND periode_tahun = ?)
+    ''', (version, version, bulan, tahun))
+
+
+def touch_nomen(db, nomen):
+    """
+    Tandai satu pelanggan berubah (analisa) tanpa menaikkan versi global —
+    cache response / trend / frame periode tidak bergantung pada analisa
+    """
+    version = _now_ms()
+    db.execute(f'UPDATE nomen_dict SET data_version = {_NEXT_NOMEN_VERSION} WHERE nomen = ?',
+               (version, version, nomen))
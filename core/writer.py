@@ -0,0 +1,266 @@
+"""
+Write Coordinator Module
+Satu writer thread per proses untuk semua mutasi database (SQLite)
+
+Endpoint yang menulis (upload, analisa create/update/comment) tidak lagi
+commit di koneksi request masing-masing. Mutasi dikirim sebagai fungsi
+fn(conn) ke antrian; writer thread mengambil beberapa job sekaligus dan
+menjalankannya dalam satu transaksi (group commit):
+
+    BEGIN IMMEDIATE
+      SAVEPOINT job_1 ... RELEASE      (gagal → ROLLBACK TO, job lain jalan terus)
+      SAVEPOINT job_2 ... RELEASE
+    COMMIT
+
+Antar worker gunicorn, setiap batch dijalankan di bawah file lock
+(fcntl.flock pada <db>.write.lock), jadi hanya satu proses yang memegang
+write lock SQLite pada satu waktu dan SQLITE_BUSY tidak terjadi lagi di
+antara writer yang lewat coordinator.
+
+Penulis di luar coordinator yang memakai koneksi sendiri (CLI arsip,
+maintenance ANALYZE / VACUUM) mengambil file lock yang sama lewat
+write_lock(). Job sebaiknya pendek: upload besar dipecah menjadi
+beberapa job (lihat api/upload.py load_frame()).
+
+PostgreSQL tidak butuh coordinator: run_write() langsung menjalankan
+fn(get_db()) lalu commit.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from flask import current_app
+
+from core.database import _config, get_db, get_db_path, is_sqlite
+
+
+class _Job:
+    __slots__ = ('fn', 'future', 'queued_at')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class WriteCoordinator:
+    """
+    Writer thread dengan satu koneksi dan antrian job.
+    submit(fn) → Future berisi hasil fn(conn) setelah batch-nya di-commit.
+    """
+
+    def __init__(self, db_path, batch_max=50, batch_wait_ms=5, lock_path=None):
+        self.db_path = db_path
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait_ms / 1000
+        self.lock_path = lock_path or f"{db_path}.write.lock"
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._conn = None
+        self._lock_file = None
+        self._start_lock = threading.Lock()
+        self.stats = {'batches': 0, 'jobs': 0, 'failed': 0, 'max_batch': 0, 'last_commit_ms': None}
+
+    # ---- API ----
+
+    def submit(self, fn):
+        self._ensure_started()
+        job = _Job(fn)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn, timeout=None):
+        """Submit dan tunggu hasil (exception dari fn diteruskan ke pemanggil)"""
+        return self.submit(fn).result(timeout)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def status(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queued': self._queue.qsize(),
+            **self.stats,
+        }
+
+    # ---- writer thread ----
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _connect(self):
+        # isolation_level=None: transaksi dikelola sendiri (BEGIN / SAVEPOINT)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _collect(self, first):
+        """Ambil job yang sudah antri (maks batch_max), tunggu sebentar untuk batch"""
+        jobs = [first]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(jobs) < self.batch_max:
+            remaining = deadline - time.perf_counter()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # stop setelah batch ini
+                break
+            jobs.append(job)
+        return jobs
+
+    def _process_lock(self):
+        """Lock antar proses (blocking) selama satu batch"""
+        if fcntl is None:
+            return None
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'w')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        return self._lock_file
+
+    def _run_batch(self, jobs):
+        conn = self._conn
+        lock_file = self._process_lock()
+        started = time.perf_counter()
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for i, job in enumerate(jobs):
+                conn.execute(f'SAVEPOINT job_{i}')
+                try:
+                    results.append((job, True, job.fn(conn)))
+                    conn.execute(f'RELEASE job_{i}')
+                except Exception as e:
+                    conn.execute(f'ROLLBACK TO job_{i}')
+                    conn.execute(f'RELEASE job_{i}')
+                    results.append((job, False, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            # Gagal BEGIN / COMMIT: seluruh batch gagal
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            results = [(job, False, e) for job in jobs]
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self.stats['batches'] += 1
+        self.stats['jobs'] += len(jobs)
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(jobs))
+        self.stats['last_commit_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        for job, ok, value in results:
+            if ok:
+                job.future.set_result(value)
+            else:
+                self.stats['failed'] += 1
+                job.future.set_exception(value)
+
+    def _loop(self):
+        self._conn = self._connect()
+        try:
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    break
+                self._run_batch(self._collect(first))
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+# ==========================================
+# MODULE API
+# ==========================================
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Coordinator untuk DATABASE_PATH aktif (dibuat ulang jika path berubah)"""
+    global _writer
+
+    path = os.path.abspath(get_db_path())
+    with _writer_lock:
+        if _writer is None or _writer.db_path != path:
+            if _writer is not None:
+                _writer.stop()
+            _writer = WriteCoordinator(
+                path,
+                batch_max=_config('WRITE_BATCH_MAX', 50),
+                batch_wait_ms=_config('WRITE_BATCH_WAIT_MS', 5),
+            )
+        return _writer
+
+
+def run_write(fn, timeout=None):
+    """
+    Jalankan mutasi fn(conn) dan return hasilnya setelah commit.
+    fn tidak boleh memanggil conn.commit() / rollback() sendiri.
+    """
+    if not is_sqlite() or not _config('WRITE_QUEUE_ENABLED', True):
+        db = get_db()
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+
+    # Job dijalankan di writer thread dengan app context pemanggil
+    # (config / get_backend() tetap menunjuk database yang sama)
+    app = current_app._get_current_object()
+
+    def _job(conn):
+        with app.app_context():
+            return fn(conn)
+
+    return get_writer().run(_job, timeout)
+
+
+@contextmanager
+def write_lock(db_path=None):
+    """
+    File lock writer (<db>.write.lock) untuk mutasi yang tidak lewat
+    run_write(): menunggu batch writer yang sedang berjalan (proses mana pun)
+    dan menahan batch berikutnya sampai blok selesai. Jangan memanggil
+    run_write() di dalam blok ini (writer thread akan menunggu lock yang sama).
+    """
+    if fcntl is None or not is_sqlite():
+        yield
+        return
+    path = f"{os.path.abspath(db_path or get_db_path())}.write.lock"
+    with open(path, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def writer_status():
+    return _writer.status() if _writer is not None else {'running': False}
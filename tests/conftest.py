@@ -0,0 +1,143 @@
+"""
+Shared pytest fixtures
+
+plan_db: database sintetis berbentuk produksi untuk test EXPLAIN QUERY PLAN.
+Secara default dibangun dengan PLAN_TEST_CUSTOMERS pelanggan x 24 periode,
+lalu sqlite_stat1 di-scale ke ukuran produksi (500k pelanggan) supaya
+query planner memilih plan yang sama seperti di server. Set
+PLAN_TEST_CUSTOMERS=500000 untuk membangun database ukuran penuh.
+"""
+
+import os
+import random
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from core.database import init_db
+
+PRODUCTION_CUSTOMERS = 500_000
+PLAN_TEST_CUSTOMERS = int(os.environ.get('PLAN_TEST_CUSTOMERS', 2000))
+PERIODES = [(tahun, bulan) for tahun in (2024, 2025) for bulan in range(1, 13)]
+
+RAYONS = [f"{pc}{ez:02d}" for pc in ('340', '341', '350', '351') for ez in range(1, 9)]
+TARIFS = ['2A2', '2A3', '3A', '4A', '2B']
+
+
+def _populate(conn, customers, seed=42):
+    """Isi semua tabel fakta: satu baris per pelanggan per periode (+ nomen_dict)"""
+    rnd = random.Random(seed)
+    nomens = [f"{60000000 + i}" for i in range(customers)]
+    profile = {n: (rnd.choice(RAYONS), rnd.choice(TARIFS)) for n in nomens}
+
+    for tahun, bulan in PERIODES:
+        conn.executemany('''
+            INSERT INTO master_pelanggan
+            (nomen, nama, alamat, rayon, pc, ez, tarif, target_mc, kubikasi, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (n, f"PELANGGAN {n}", f"JL SUNTER {i % 400}", profile[n][0],
+             profile[n][0][:3], profile[n][0][3:], profile[n][1],
+             rnd.randint(50, 500) * 1000, rnd.randint(0, 60), bulan, tahun)
+            for i, n in enumerate(nomens)
+        ))
+
+        payers = [n for n in nomens if rnd.random() < 0.8]
+        conn.executemany('''
+            INSERT INTO collection_harian
+            (nomen, tgl_bayar, jumlah_bayar, volume_air, tipe_bayar, bill_period, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (n, f"{tahun}-{bulan:02d}-{rnd.randint(1, 28):02d}", rnd.randint(50, 500) * 1000,
+             rnd.randint(0, 60), 'current' if rnd.random() < 0.85 else 'tunggakan',
+             f"{tahun}{bulan:02d}", bulan, tahun)
+            for n in payers
+        ))
+        conn.executemany('''
+            INSERT INTO master_bayar (nomen, tgl_bayar, jumlah_bayar, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (n, f"{tahun}-{bulan:02d}-{rnd.randint(1, 28):02d}", rnd.randint(50, 500) * 1000, bulan, tahun)
+            for n in payers
+        ))
+        conn.executemany('''
+            INSERT INTO mainbill (nomen, total_tagihan, tarif, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ((n, rnd.randint(50, 500) * 1000, profile[n][1], bulan, tahun) for n in nomens))
+        conn.executemany('''
+            INSERT INTO ardebt (nomen, saldo_tunggakan, pc, ez, umur_piutang, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (n, rnd.randint(50, 2000) * 1000, profile[n][0][:3], profile[n][0][3:],
+             rnd.randint(1, 24), bulan, tahun)
+            for n in nomens if rnd.random() < 0.3
+        ))
+        conn.executemany('''
+            INSERT INTO sbrs_data (nomen, rayon, stand_awal, stand_akhir, volume, periode_bulan, periode_tahun)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (n, profile[n][0], 1000, 1000 + v, v, bulan, tahun)
+            for n, v in ((n, rnd.randint(-5, 150)) for n in nomens)
+        ))
+
+    # nomen_id seperti hasil loader (map_nomen_ids)
+    conn.executemany('INSERT OR IGNORE INTO nomen_dict (id, nomen) VALUES (?, ?)',
+                     ((i + 1, n) for i, n in enumerate(nomens)))
+    for table in ('master_pelanggan', 'collection_harian', 'master_bayar', 'mainbill', 'ardebt', 'sbrs_data'):
+        conn.execute(f'UPDATE {table} SET nomen_id = (SELECT id FROM nomen_dict d WHERE d.nomen = {table}.nomen)')
+    conn.commit()
+
+
+def _scale_stats(conn, factor):
+    """
+    Scale sqlite_stat1 seolah-olah tabel berisi `factor` kali lebih banyak pelanggan.
+
+    Jumlah baris dikali factor. Rata-rata baris per prefix index juga dikali
+    factor, kecuali prefix yang memuat nomen/nomen_id/id (baris per pelanggan tetap).
+    """
+    if factor <= 1:
+        return
+
+    rows = conn.execute('SELECT tbl, idx, stat FROM sqlite_stat1').fetchall()
+    for tbl, idx, stat in rows:
+        tokens = stat.split()
+        columns = [r[2] for r in conn.execute(f'PRAGMA index_info("{idx}")')] if idx else []
+
+        scaled = []
+        for pos, token in enumerate(tokens):
+            if not token.isdigit():
+                scaled.append(token)
+                continue
+            value = int(token)
+            prefix = columns[:pos]
+            if pos == 0 or not any(col in ('nomen', 'nomen_id', 'id') for col in prefix):
+                value = max(1, int(value * factor))
+            scaled.append(str(value))
+
+        conn.execute('UPDATE sqlite_stat1 SET stat = ? WHERE tbl = ? AND idx IS ?',
+                     (' '.join(scaled), tbl, idx))
+    conn.commit()
+
+
+@pytest.fixture(scope='session')
+def plan_db(tmp_path_factory):
+    """Koneksi ke database sintetis dengan statistik ukuran produksi"""
+    db_path = str(tmp_path_factory.mktemp('plan') / 'sunter.db')
+
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    init_db(app)
+
+    conn = sqlite3.connect(db_path)
+    _populate(conn, PLAN_TEST_CUSTOMERS)
+    conn.execute('ANALYZE')
+    _scale_stats(conn, PRODUCTION_CUSTOMERS / PLAN_TEST_CUSTOMERS)
+    conn.close()
+
+    # Koneksi baru supaya planner membaca sqlite_stat1 yang sudah di-scale
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
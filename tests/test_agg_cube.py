@@ -0,0 +1,81 @@
+"""
+Aggregation cube tests
+
+agg_cube (periode x rayon x pc x ez x tarif) di-roll-up ke PCEZ / PC /
+rayon; totalnya harus sama dengan kpi_periode dan hitung langsung dari
+tabel fakta.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.belum_bayar import register_belum_bayar_routes
+from api.collection import register_collection_routes
+from api.pcez_performance import register_pcez_performance_routes
+from core.database import close_db, get_db, init_db
+from core.summary import check_kpi_summary, get_kpi_summary, rebuild_kpi_summary, rollup_cube
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 200)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_pcez_performance_routes(app, get_db)
+    register_collection_routes(app, get_db)
+    register_belum_bayar_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def test_rollups_match_kpi_periode(app):
+    with app.app_context():
+        db = get_db()
+        kpi = get_kpi_summary(db, BULAN, TAHUN)
+        for name in ('cube_pcez', 'cube_pc', 'cube_rayon'):
+            rows = rollup_cube(db, name, BULAN, TAHUN)
+            assert sum(r['total_pelanggan'] for r in rows) == kpi['total_pelanggan']
+            assert sum(r['total_target'] for r in rows) == kpi['target_mc']
+            assert sum(r['total_realisasi'] for r in rows) == kpi['collection_total']
+        assert check_kpi_summary(db) == []
+
+
+def test_grouped_endpoints_served_from_cube(app):
+    client = app.test_client()
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    by_rayon = dict(conn.execute('''
+        SELECT m.rayon, SUM(c.jumlah_bayar) FROM collection_harian c
+        JOIN master_pelanggan m ON m.nomen_id = c.nomen_id
+         AND m.periode_bulan = c.periode_bulan AND m.periode_tahun = c.periode_tahun
+        WHERE c.periode_bulan = ? AND c.periode_tahun = ?
+        GROUP BY m.rayon''', (BULAN, TAHUN)).fetchall())
+    pelanggan = conn.execute('SELECT COUNT(*) FROM master_pelanggan WHERE periode_bulan = ? AND periode_tahun = ?',
+                             (BULAN, TAHUN)).fetchone()[0]
+    conn.close()
+
+    pcez = client.get(f'/api/collection/performance/pcez?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert pcez['summary']['total_pelanggan'] == pelanggan
+    assert pcez['summary']['total_realisasi'] == sum(by_rayon.values())
+
+    collection = client.get(f'/api/collection/by-rayon?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert {r['rayon']: r['collection'] for r in collection} == by_rayon
+
+    unpaid = client.get(f'/api/belum-bayar/by-rayon?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert sum(r['count'] for r in unpaid) == pelanggan - pcez['summary']['pelanggan_bayar']
+    assert [r['count'] for r in unpaid] == sorted((r['count'] for r in unpaid), reverse=True)
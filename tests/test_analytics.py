@@ -0,0 +1,93 @@
+"""
+Analytics engine tests
+
+Dengan ANALYTICS_BACKEND=duckdb query di ANALYTIC_QUERIES dijalankan di
+DuckDB dan hasilnya sama dengan SQLite (ANALYTICS_COMPARE); jika engine
+tidak bisa dibuka request tetap dijawab dari SQLite.
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+import core.analytics as analytics
+from api.collection import register_collection_routes
+from api.pcez_performance import register_pcez_performance_routes
+from core.database import close_db, get_read_db, init_db
+from core.queries import query_stats
+from tests.conftest import _populate
+
+ENDPOINTS = [
+    '/api/collection/top-payers?bulan=6&tahun=2025&limit=1000',
+    '/api/collection/performance/pcez/340/08?bulan=6&tahun=2025',
+]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 100)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_collection_routes(app, get_read_db)
+    register_pcez_performance_routes(app, get_read_db)
+    monkeypatch.setattr(analytics, 'engine', analytics.AnalyticsEngine())
+    return app
+
+
+def _responses(app):
+    client = app.test_client()
+    return [client.get(path).get_json() for path in ENDPOINTS]
+
+
+def _load_tables(location):
+    """Pengganti ATTACH (extension sqlite butuh download): salin tabel fakta ke DuckDB"""
+    conn = analytics.duckdb.connect(':memory:')
+    src = sqlite3.connect(location)
+    try:
+        for table in analytics.FACT_TABLES:
+            frame = pd.read_sql_query(f'SELECT * FROM {table}', src)
+            conn.register('frame', frame)
+            conn.execute(f'CREATE TABLE {table} AS SELECT * FROM frame')
+            conn.unregister('frame')
+    finally:
+        src.close()
+    return conn
+
+
+def test_duckdb_matches_sqlite(app, monkeypatch):
+    pytest.importorskip('duckdb')
+    expected = _responses(app)
+
+    monkeypatch.setattr(analytics.engine, '_open', _load_tables)
+    monkeypatch.setitem(analytics.compare_stats, 'match', 0)
+    monkeypatch.setitem(analytics.compare_stats, 'mismatch', 0)
+    app.config.update(ANALYTICS_BACKEND='duckdb', ANALYTICS_COMPARE=True)
+
+    assert _responses(app) == expected
+    assert analytics.compare_stats == {'match': 2, 'mismatch': 0, 'last_mismatch': None}
+    names = {s['query'] for s in query_stats.snapshot()}
+    assert {'collection_top_payers@duckdb', 'pcez_detail_ardebt@duckdb'} <= names
+
+
+def test_falls_back_to_sqlite(app, monkeypatch):
+    expected = _responses(app)
+
+    def _fail(location):
+        raise RuntimeError('extension sqlite not available')
+
+    monkeypatch.setattr(analytics.engine, '_open', _fail)
+    app.config['ANALYTICS_BACKEND'] = 'duckdb'
+
+    assert _responses(app) == expected
+    if analytics.duckdb is not None:
+        assert analytics.engine.status()['last_error'] == 'extension sqlite not available'
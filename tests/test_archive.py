@@ -0,0 +1,197 @@
+"""
+Cold archive tests
+
+Periode 2024 dari database sintetis dipindah ke Parquet; endpoint history
+per nomen harus mengembalikan data yang sama seperti sebelum diarsip.
+Periode dibaca di bawah write_lock, dan periode yang di-upload ulang
+setelah diarsip tidak terhitung dua kali (live + arsip).
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+import core.archive as archive
+from api.customer import register_customer_routes
+from api.upload import register_upload_routes
+from core.archive import archive_cold_periodes, archived_periodes, load_manifest, read_archive
+from core.database import close_db, get_db, init_db
+from core.summary import load_kpi_trend
+from tests.conftest import _populate
+from tests.test_upload import _post
+
+NOMEN = '60000007'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 50)
+    conn.close()
+
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.teardown_appcontext(close_db)
+    register_customer_routes(app, get_db)
+    register_upload_routes(app, get_db)
+    return app
+
+
+def _live_history(app, nomen):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute('''
+        SELECT tgl_bayar, jumlah_bayar, tipe_bayar, bill_period, sumber_file, periode_bulan, periode_tahun
+        FROM collection_harian WHERE nomen = ?
+    ''', (nomen,)).fetchall()
+    conn.close()
+    return sorted((dict(row) for row in rows), key=repr)
+
+
+def test_archive_moves_cold_periodes(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    before = conn.execute('SELECT COUNT(*) FROM sbrs_data WHERE periode_tahun = 2024').fetchone()[0]
+
+    with app.app_context():
+        result = archive_cold_periodes(get_db(), before=(2025, 1))
+
+    assert set(result) == {'collection_harian', 'sbrs_data', 'ardebt'}
+    assert len(result['sbrs_data']) == 12
+    assert sum(result['sbrs_data'].values()) == before
+    assert conn.execute('SELECT COUNT(*) FROM sbrs_data WHERE periode_tahun = 2024').fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM sbrs_data WHERE periode_tahun = 2025').fetchone()[0] > 0
+    conn.close()
+
+    archive_dir = app.config['ARCHIVE_DIR']
+    assert archived_periodes('ardebt', archive_dir)[0] == (2024, 1)
+    assert load_manifest(archive_dir)['sbrs_data']['2024-06'] == pq.ParquetFile(
+        f"{archive_dir}/sbrs_data/2024-06.parquet").metadata.num_rows
+
+
+def test_archive_files_sorted_by_nomen(app):
+    with app.app_context():
+        archive_cold_periodes(get_db(), before=(2024, 2), tables=['collection_harian'])
+
+    parquet = pq.ParquetFile(f"{app.config['ARCHIVE_DIR']}/collection_harian/2024-01.parquet")
+    nomens = parquet.read(columns=['nomen']).column('nomen').to_pylist()
+    assert nomens == sorted(nomens)
+    assert parquet.metadata.row_group(0).column(parquet.schema_arrow.get_field_index('nomen')).statistics.has_min_max
+
+
+def test_read_archive_periode_range(app):
+    with app.app_context():
+        archive_cold_periodes(get_db(), before=(2025, 1), tables=['sbrs_data'])
+
+    rows = read_archive('sbrs_data', NOMEN, columns=['periode_tahun', 'periode_bulan', 'nomen'],
+                        since=(2024, 10), archive_dir=app.config['ARCHIVE_DIR'])
+    assert sorted((r['periode_tahun'], r['periode_bulan']) for r in rows) == [(2024, 10), (2024, 11), (2024, 12)]
+    assert {r['nomen'] for r in rows} == {NOMEN}
+
+
+def test_history_endpoint_reads_archive(app):
+    expected = _live_history(app, NOMEN)
+
+    with app.app_context():
+        archive_cold_periodes(get_db(), before=(2025, 1))
+
+    client = app.test_client()
+    everything = client.get(f'/api/history_pembayaran?nomen={NOMEN}&dari=all').get_json()
+    assert sorted(everything, key=repr) == expected
+    assert [r['tgl_bayar'] for r in everything] == sorted((r['tgl_bayar'] for r in everything), reverse=True)
+
+    recent = client.get(f'/api/history_pembayaran?nomen={NOMEN}&dari=2024-07').get_json()
+    assert recent and all((r['periode_tahun'], r['periode_bulan']) >= (2024, 7) for r in recent)
+
+    history = client.get(f'/api/customer/{NOMEN}/history?dari=2024-01').get_json()
+    assert len(history['sbrs_history']) == 24
+    assert history['sbrs_history'][0]['periode_tahun'] == 2025
+
+    assert client.get(f'/api/history_pembayaran?nomen={NOMEN}&dari=2024-13').status_code == 400
+
+
+def test_profile_reads_archive(app):
+    client = app.test_client()
+    before = client.get(f'/api/customer/{NOMEN}/profile?dari=all').get_json()
+
+    with app.app_context():
+        archive_cold_periodes(get_db(), before=(2025, 1))
+
+    after = client.get(f'/api/customer/{NOMEN}/profile?dari=all').get_json()
+    for section in ('payments', 'sbrs_history', 'ardebt_history'):
+        assert sorted(after[section], key=repr) == sorted(before[section], key=repr)
+    assert [p['tgl_bayar'] for p in after['payments']] == sorted((p['tgl_bayar'] for p in after['payments']),
+                                                                 reverse=True)
+    assert after['summary']['total_bayar'] == before['summary']['total_bayar']
+
+    recent = client.get(f'/api/customer/{NOMEN}/profile?dari=2024-07').get_json()
+    assert all((r['periode_tahun'], r['periode_bulan']) >= (2024, 7) for r in recent['sbrs_history'])
+    assert len(recent['sbrs_history']) == 18
+
+
+def test_archive_reads_periode_under_write_lock(app, monkeypatch):
+    held = []
+
+    @contextmanager
+    def _lock(db_path=None):
+        held.append(True)
+        try:
+            yield
+        finally:
+            held.pop()
+
+    archive_periode = archive._archive_periode
+
+    def _checked(*args):
+        assert held, 'periode read before write_lock'
+        return archive_periode(*args)
+
+    monkeypatch.setattr(archive, 'write_lock', _lock)
+    monkeypatch.setattr(archive, '_archive_periode', _checked)
+    with app.app_context():
+        assert archive_cold_periodes(get_db(), before=(2024, 3), tables=['collection_harian'])
+
+
+def test_reupload_of_archived_periode_counts_once(app, monkeypatch):
+    archive_dir = app.config['ARCHIVE_DIR']
+    with app.app_context():
+        archive_cold_periodes(get_db(), before=(2024, 2), tables=['collection_harian'])
+
+    # Baris live periode arsip (upload ulang sebelum partisi di-drop): arsip dilewati
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.execute('''
+        INSERT INTO collection_harian (nomen, nomen_id, tgl_bayar, jumlah_bayar, tipe_bayar, periode_bulan, periode_tahun)
+        SELECT nomen, id, '2024-01-05', 1000, 'current', 1, 2024 FROM nomen_dict WHERE nomen = ?
+    ''', (NOMEN,))
+    conn.commit()
+    conn.close()
+    with app.app_context():
+        rows = read_archive('collection_harian', NOMEN, since=(2024, 1), until=(2024, 1), db=get_db())
+    assert rows == []
+
+    frame = pd.DataFrame({'NOMEN': [NOMEN], 'TGL_BAYAR': ['2024-01-10'], 'JML_BAYAR': [5000]})
+    assert _post(app, monkeypatch, 'collection', 1, 2024, frame).status_code == 200
+
+    assert '2024-01' not in load_manifest(archive_dir).get('collection_harian', {})
+    assert not os.path.exists(f"{archive_dir}/collection_harian/2024-01.parquet")
+    history = app.test_client().get(f'/api/history_pembayaran?nomen={NOMEN}&dari=all').get_json()
+    assert [r['tgl_bayar'] for r in history if (r['periode_tahun'], r['periode_bulan']) == (2024, 1)] == [
+        '2024-01-10']
+
+    with app.app_context():
+        db = get_db()
+        live = db.execute('''
+            SELECT collection_current FROM kpi_periode WHERE periode_tahun = 2024 AND periode_bulan = 1
+        ''').fetchone()[0]
+        trend = {(t['tahun'], t['bulan']): t['collection'] for t in load_kpi_trend(db)}
+    assert trend[(2024, 1)] == live
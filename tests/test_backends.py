@@ -0,0 +1,219 @@
+"""
+Database backend tests
+
+Translation SQLite → PostgreSQL dites langsung, termasuk semua statement
+yang dijalankan upload (direkam di SQLite lalu diterjemahkan). Kontrak
+backend dijalankan untuk SQLite selalu, dan untuk PostgreSQL jika
+TEST_POSTGRES_DSN di-set (mis. postgresql://postgres@localhost/sunter_test
+pada Postgres throwaway).
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+import api.upload as upload
+import core.backends as backends
+from core.backends import (PgConnection, PostgresBackend, SQLiteBackend, psycopg2,
+                           translate_placeholders, translate_sql)
+from core.database import close_db, get_db, init_db
+from tests.conftest import _populate
+from tests.test_upload import _post
+
+
+# ==========================================
+# TRANSLATION
+# ==========================================
+
+def test_translate_placeholders():
+    sql = 'SELECT * FROM ardebt WHERE periode_bulan = ? AND periode_tahun = ?'
+    assert translate_placeholders(sql) == (
+        'SELECT * FROM ardebt WHERE periode_bulan = %s AND periode_tahun = %s'
+    )
+
+
+def test_translate_keeps_question_mark_in_literals_and_comments():
+    sql = "SELECT '?' AS q, \"col?\" FROM t -- why?\nWHERE a = ?"
+    assert translate_placeholders(sql) == "SELECT '?' AS q, \"col?\" FROM t -- why?\nWHERE a = %s"
+
+
+def test_translate_escapes_percent():
+    sql = "SELECT * FROM master_pelanggan WHERE nama LIKE '%JL%' AND rayon LIKE ? || '%'"
+    assert translate_placeholders(sql) == (
+        "SELECT * FROM master_pelanggan WHERE nama LIKE '%%JL%%' AND rayon LIKE %s || '%%'"
+    )
+
+
+def test_translate_escaped_quote_in_literal():
+    sql = "SELECT 'it''s ?' FROM t WHERE a = ?"
+    assert translate_placeholders(sql) == "SELECT 'it''s ?' FROM t WHERE a = %s"
+
+
+def test_translate_pragma_table_info():
+    sql = translate_sql('PRAGMA table_info(ardebt)')
+    assert 'information_schema.columns' in sql
+    assert "table_name = 'ardebt'" in sql
+    assert 'AS name' in sql
+
+
+def test_translate_insert_or_ignore():
+    sql = translate_sql('''
+        INSERT OR IGNORE INTO nomen_dict (nomen)
+        SELECT DISTINCT nomen FROM ardebt WHERE periode_bulan = ? -- baru
+    ''')
+    assert sql.lstrip().startswith('INSERT INTO nomen_dict')
+    assert sql.endswith('\nON CONFLICT DO NOTHING')
+    assert 'periode_bulan = %s' in sql
+
+
+def test_translate_other_pragma_is_noop():
+    assert translate_sql('PRAGMA foreign_keys = ON') == 'SELECT NULL WHERE FALSE'
+    assert translate_sql('  pragma optimize') == 'SELECT NULL WHERE FALSE'
+
+
+def test_pg_connection_in_transaction():
+    class _Raw:
+        status = 0
+
+        def get_transaction_status(self):
+            return self.status
+
+    conn = PgConnection(backend=None, raw=_Raw())
+    assert conn.in_transaction is False
+    conn.raw.status = 2  # psycopg2 TRANSACTION_STATUS_INTRANS
+    assert conn.in_transaction is True
+
+
+@pytest.fixture
+def upload_app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['WRITE_QUEUE_ENABLED'] = False  # semua statement lewat get_db() (yang direkam)
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 20)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    upload.register_upload_routes(app, get_db)
+    return app
+
+
+def test_upload_statements_translate_for_postgres(upload_app, monkeypatch):
+    statements = []
+    connect = SQLiteBackend.connect
+
+    def _recording_connect(self):
+        conn = connect(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(backends.SQLiteBackend, 'connect', _recording_connect)
+
+    frames = {
+        'collection': pd.DataFrame({
+            'NOMEN': ['60000001', '60000002'], 'TGL_BAYAR': ['2025-07-03', '2025-07-04'],
+            'JML_BAYAR': [10000, 20000],
+        }),
+        'ardebt': pd.DataFrame({
+            'NOMEN': ['60000001', '60000002'], 'PCEZ': ['340/01', '340/02'],
+            'PERIODE_BILL': ['2025-06-01', '2025-07-01'], 'JUMLAH': [125000, 250000],
+        }),
+    }
+    for file_type, frame in frames.items():
+        response = _post(upload_app, monkeypatch, file_type, 7, 2025, frame)
+        assert response.status_code == 200, response.get_json()
+
+    written = [s for s in statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'CREATE'))]
+    assert any('collection_harian' in s for s in written) and any('customer_series' in s for s in written)
+    for sql in statements:
+        translated = translate_sql(sql).upper()
+        assert 'INSERT OR' not in translated, sql
+        assert not translated.lstrip().startswith('PRAGMA'), sql
+        assert 'SQLITE_MASTER' not in translated, sql
+
+
+# ==========================================
+# BACKEND CONTRACT
+# ==========================================
+
+def _backends():
+    yield pytest.param('sqlite', id='sqlite')
+    marks = []
+    if not os.environ.get('TEST_POSTGRES_DSN') or psycopg2 is None:
+        marks.append(pytest.mark.skip(reason='TEST_POSTGRES_DSN not set or psycopg2 missing'))
+    yield pytest.param('postgres', id='postgres', marks=marks)
+
+
+@pytest.fixture(params=list(_backends()))
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        backend = SQLiteBackend(str(tmp_path / 'contract.db'))
+        id_column = 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+    else:
+        backend = PostgresBackend(os.environ['TEST_POSTGRES_DSN'], maxconn=2)
+        id_column = 'id SERIAL PRIMARY KEY'
+
+    conn = backend.connect()
+    conn.execute('DROP TABLE IF EXISTS contract_test')
+    conn.execute(f'CREATE TABLE contract_test ({id_column}, nomen TEXT, nama TEXT, jumlah REAL)')
+    conn.commit()
+    backend.release(conn)
+
+    yield backend
+
+    conn = backend.connect()
+    conn.execute('DROP TABLE IF EXISTS contract_test')
+    conn.commit()
+    backend.release(conn)
+    backend.close()
+
+
+def test_execute_and_rows(backend):
+    conn = backend.connect()
+    cur = conn.execute('INSERT INTO contract_test (nomen, nama, jumlah) VALUES (?, ?, ?)',
+                       ('60000001', "O'NEIL 50%", 1500.5))
+    assert cur.lastrowid == 1
+    conn.commit()
+
+    row = conn.execute('SELECT nomen, nama, jumlah FROM contract_test WHERE nomen = ?',
+                       ('60000001',)).fetchone()
+    assert row['nama'] == "O'NEIL 50%"
+    assert row[2] == 1500.5
+    assert dict(row)['nomen'] == '60000001'
+    backend.release(conn)
+
+
+def test_bulk_insert(backend):
+    conn = backend.connect()
+    rows = [(f'6000{i:04d}', None if i % 2 else f'NAMA,{i}', float(i)) for i in range(500)]
+    assert backend.bulk_insert(conn, 'contract_test', ['nomen', 'nama', 'jumlah'], iter(rows)) == 500
+    conn.commit()
+
+    total = conn.execute('SELECT COUNT(*), COUNT(nama), SUM(jumlah) FROM contract_test').fetchone()
+    assert tuple(total) == (500, 250, sum(range(500)))
+    backend.release(conn)
+
+
+def test_uncommitted_work_is_discarded_on_release(backend):
+    conn = backend.connect()
+    conn.execute('INSERT INTO contract_test (nomen) VALUES (?)', ('x',))
+    backend.release(conn)
+
+    conn = backend.connect()
+    assert conn.execute('SELECT COUNT(*) FROM contract_test').fetchone()[0] == 0
+    backend.release(conn)
+
+
+def test_table_info(backend):
+    conn = backend.connect()
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(contract_test)').fetchall()]
+    assert columns == ['id', 'nomen', 'nama', 'jumlah']
+    backend.release(conn)
@@ -0,0 +1,75 @@
+"""
+Collection daily series tests
+
+collection_daily diisi bersama ringkasan KPI; nilai harian & kumulatif
+harus sama dengan hitung langsung dari collection_harian.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.collection import register_collection_routes
+from core.database import close_db, get_db, init_db
+from core.summary import rebuild_kpi_summary
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 200)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_collection_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def test_daily_series_matches_fact_table(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    daily = conn.execute('''
+        SELECT tgl_bayar, SUM(jumlah_bayar), COUNT(DISTINCT nomen_id) FROM collection_harian
+        WHERE periode_bulan = ? AND periode_tahun = ? GROUP BY tgl_bayar ORDER BY tgl_bayar
+    ''', (BULAN, TAHUN)).fetchall()
+    total, payers = conn.execute('''
+        SELECT SUM(jumlah_bayar), COUNT(DISTINCT nomen_id) FROM collection_harian
+        WHERE periode_bulan = ? AND periode_tahun = ?''', (BULAN, TAHUN)).fetchone()
+    target = conn.execute('SELECT SUM(target_mc) FROM master_pelanggan WHERE periode_bulan = ? AND periode_tahun = ?',
+                          (BULAN, TAHUN)).fetchone()[0]
+    conn.close()
+
+    data = app.test_client().get(f'/api/collection/daily?bulan={BULAN}&tahun={TAHUN}').get_json()
+
+    assert [(p['date'], p['total'], p['transactions']) for p in data] == daily
+    running = 0
+    for point, (_, amount, _) in zip(data, daily):
+        running += amount
+        assert point['cum_total'] == running
+    assert data[-1]['cum_pelanggan'] == payers
+    assert data[-1]['cum_percentage'] == round(total * 100.0 / target, 2)
+
+
+def test_compare_overlays_previous_month(app):
+    client = app.test_client()
+    result = client.get(f'/api/collection/daily/compare?bulan={BULAN}&tahun={TAHUN}').get_json()
+
+    assert [s['label'] for s in result['series']] == ['06/2025', '05/2025']
+    assert len(result['days']) == 31
+    for i, series in enumerate(result['series']):
+        assert result['days'][-1]['values'][i]['cum_total'] == series['data'][-1]['cum_total']
+    cumulative = [d['values'][0]['cum_total'] for d in result['days']]
+    assert cumulative == sorted(cumulative)
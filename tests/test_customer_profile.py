@@ -0,0 +1,97 @@
+"""
+Customer profile tests
+
+/api/customer/<nomen>/profile menggabungkan MC, SBRS, collection, ardebt,
+mainbill dan analisa; cache per nomen hanya dibuang jika pelanggan itu
+disentuh upload / analisa.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.customer import register_customer_routes
+from core.database import close_db, get_db, init_db
+from core.profile import get_customer_profile, profile_cache_status
+from core.versioning import bump_data_version, current_data_version, touch_nomen, touch_periode_nomens
+from tests.conftest import _populate
+
+NOMEN = '60000007'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 50)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_customer_routes(app, get_db)
+    return app
+
+
+def _upload(db, table, bulan, tahun, change):
+    """Langkah upload seperti api/upload.py: bump, tandai periode lama, ubah data, tandai lagi"""
+    version = bump_data_version(db, f'upload:{table}')
+    touch_periode_nomens(db, version, table, bulan, tahun)
+    db.execute(change)
+    touch_periode_nomens(db, version, table, bulan, tahun)
+    db.commit()
+
+
+def test_profile_endpoint(app):
+    profile = app.test_client().get(f'/api/customer/{NOMEN}/profile?dari=all').get_json()
+
+    assert profile['nomen'] == NOMEN
+    assert len(profile['mc_history']) == 24 and profile['pelanggan'] == profile['mc_history'][0]
+    periodes = [(r['periode_tahun'], r['periode_bulan']) for r in profile['mc_history']]
+    assert periodes == sorted(periodes, reverse=True)
+    assert len(profile['mainbill_history']) == 24 and len(profile['sbrs_history']) == 24
+    tgl = [p['tgl_bayar'] for p in profile['payments']]
+    assert tgl == sorted(tgl, reverse=True)
+    assert profile['summary']['jumlah_transaksi'] == len(profile['payments'])
+
+    recent = app.test_client().get(f'/api/customer/{NOMEN}/profile?dari=2025-07').get_json()
+    assert len(recent['mc_history']) == 6
+
+    assert app.test_client().get('/api/customer/99999999/profile').status_code == 404
+
+
+def test_cache_follows_touched_nomens(app):
+    with app.app_context():
+        db = get_db()
+        db.execute(f"DELETE FROM sbrs_data WHERE nomen = '{NOMEN}' AND periode_tahun = 2025 AND periode_bulan = 6")
+        db.commit()
+        first = get_customer_profile(db, NOMEN)
+        hits = profile_cache_status()['hits']
+        assert get_customer_profile(db, NOMEN) is first
+        assert profile_cache_status()['hits'] == hits + 1
+
+        # Upload periode yang tidak memuat nomen ini: cache tetap dipakai
+        _upload(db, 'sbrs_data', 6, 2025,
+                'UPDATE sbrs_data SET volume = volume + 1 WHERE periode_tahun = 2025 AND periode_bulan = 6')
+        assert get_customer_profile(db, NOMEN) is first
+
+        # Upload yang menghapus baris nomen ini dari periode: cache dibuang
+        _upload(db, 'collection_harian', 6, 2025,
+                f"DELETE FROM collection_harian WHERE nomen = '{NOMEN}' AND periode_tahun = 2025 AND periode_bulan = 6")
+        fresh = get_customer_profile(db, NOMEN)
+        assert fresh is not first
+        assert all((p['periode_tahun'], p['periode_bulan']) != (2025, 6) for p in fresh['payments'])
+
+        db.execute('''
+            INSERT INTO analisa_manual (nomen, jenis_anomali, status, created_at, updated_at)
+            VALUES (?, 'ZERO', 'pending', '2025-06-01', '2025-06-01')
+        ''', (NOMEN,))
+        version = current_data_version(db)
+        touch_nomen(db, NOMEN)
+        db.commit()
+        assert current_data_version(db) == version
+        assert get_customer_profile(db, NOMEN)['summary']['analisa_open'] == len(fresh['analisa']) + 1
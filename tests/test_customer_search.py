@@ -0,0 +1,88 @@
+"""
+Customer search tests
+
+/api/customer/search memakai index FTS5 customer_fts: prefix per kata,
+urut bm25, di-scope ke periode MC, dan ikut tersinkron saat upload MC.
+"""
+
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+
+from api.customer import register_customer_routes
+from core.database import close_db, get_db, init_db
+from core.search import build_match, search_customers, sync_customer_fts
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / 'sunter.db')
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = path
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(path)
+    _populate(conn, 300)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_customer_routes(app, get_db)
+    with app.app_context():
+        db = get_db()
+        for tahun, bulan in db.execute('SELECT DISTINCT periode_tahun, periode_bulan FROM master_pelanggan '
+                                       'ORDER BY 1, 2').fetchall():
+            sync_customer_fts(db, bulan, tahun)
+        db.commit()
+    return app
+
+
+def test_build_match():
+    assert build_match('jl sunter 12') == '"jl"* "sunter"* "12"*'
+    assert build_match('o"neil') == '"o"* "neil"*'
+    assert build_match('  --  ') == ''
+
+
+def test_prefix_search_scoped_to_periode(app):
+    client = app.test_client()
+    result = client.get('/api/customer/search?q=sunter 12&periode_bulan=6&periode_tahun=2025').get_json()
+    assert result['count'] > 0
+    assert all(r['alamat'].split()[-1].startswith('12') for r in result['data'])
+
+    by_nomen = client.get('/api/customer/search?q=6000012&limit=5').get_json()
+    assert by_nomen['count'] == 5 and by_nomen['periode']['label'] == '12/2025'
+    assert all(r['nomen'].startswith('6000012') for r in by_nomen['data'])
+
+    assert client.get('/api/customer/search').status_code == 400
+
+
+def test_index_follows_mc_upload(app):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO nomen_dict (id, nomen) VALUES (9999, '69999999')")
+        db.execute('''
+            INSERT INTO master_pelanggan (nomen, nomen_id, nama, alamat, rayon, periode_bulan, periode_tahun)
+            VALUES ('69999999', 9999, 'SITI KHOLIFAH', 'JL DANAU SUNTER UTARA', '34001', 12, 2025)
+        ''')
+        # Upload periode lama tidak menimpa nama dari periode terbaru
+        db.execute("UPDATE master_pelanggan SET nama = 'NAMA LAMA' WHERE nomen = '60000001' AND periode_tahun = 2024")
+        sync_customer_fts(db, 12, 2025)
+        sync_customer_fts(db, 1, 2024)
+        db.commit()
+
+        assert [r['nomen'] for r in search_customers(db, 'kholi danau', 12, 2025)] == ['69999999']
+        assert search_customers(db, 'kholi', 11, 2025) == []
+        assert search_customers(db, 'nama lama', 1, 2024) == []
+
+
+def test_search_latency(app):
+    with app.app_context():
+        db = get_db()
+        started = time.perf_counter()
+        for _ in range(20):
+            search_customers(db, 'pelanggan 600001', 6, 2025)
+        assert (time.perf_counter() - started) / 20 < 0.05
@@ -0,0 +1,98 @@
+"""
+Customer series tests
+
+customer_series menyimpan satu baris per (nomen_id, periode) dengan angka
+dari MC, SBRS, collection dan ARDEBT; upload mengisi ulang kolom milik
+tabel sumbernya saja, dan /api/customer/<nomen>/series membacanya dengan
+satu range scan primary key.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.customer import register_customer_routes
+from core.database import close_db, get_db, init_db
+from core.queries import QUERIES
+from core.series import rebuild_customer_series, refresh_customer_series
+from tests.conftest import _populate
+
+NOMEN = '60000007'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 50)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_customer_routes(app, get_db)
+    with app.app_context():
+        rebuild_customer_series(get_db())
+        get_db().commit()
+    return app
+
+
+def _series_row(db, bulan, tahun):
+    return db.execute('''
+        SELECT s.* FROM customer_series s JOIN nomen_dict d ON d.id = s.nomen_id
+        WHERE d.nomen = ? AND s.periode_tahun = ? AND s.periode_bulan = ?
+    ''', (NOMEN, tahun, bulan)).fetchone()
+
+
+def test_series_endpoint_matches_fact_tables(app):
+    client = app.test_client()
+    series = client.get(f'/api/customer/{NOMEN}/series').get_json()
+    assert len(series['periodes']) == 24 and series['periodes'] == sorted(series['periodes'])
+
+    with app.app_context():
+        db = get_db()
+        kubikasi = [r[0] for r in db.execute('''
+            SELECT kubikasi FROM master_pelanggan WHERE nomen = ?
+            ORDER BY periode_tahun, periode_bulan
+        ''', (NOMEN,))]
+        bayar = {f"{r[0]:04d}-{r[1]:02d}": r[2] for r in db.execute('''
+            SELECT periode_tahun, periode_bulan, SUM(jumlah_bayar) FROM collection_harian
+            WHERE nomen = ? GROUP BY periode_tahun, periode_bulan
+        ''', (NOMEN,))}
+    assert series['kubikasi'] == kubikasi
+    assert series['bayar'] == [bayar.get(p) for p in series['periodes']]
+
+    recent = client.get(f'/api/customer/{NOMEN}/series?last=6').get_json()
+    assert recent['periodes'] == series['periodes'][-6:]
+    assert client.get('/api/customer/99999999/series').status_code == 404
+
+
+def test_refresh_only_touches_source_columns(app):
+    with app.app_context():
+        db = get_db()
+        before = _series_row(db, 6, 2025)
+
+        db.execute("DELETE FROM collection_harian WHERE nomen = ? AND periode_tahun = 2025 AND periode_bulan = 6",
+                   (NOMEN,))
+        refresh_customer_series(db, 'collection', 6, 2025)
+        after = _series_row(db, 6, 2025)
+        assert after['bayar'] is None and after['transaksi'] is None
+        assert after['kubikasi'] == before['kubikasi'] and after['sbrs_volume'] == before['sbrs_volume']
+
+        # Pelanggan yang hilang dari semua sumber periode itu: barisnya dihapus
+        for file_type, table in (('mc', 'master_pelanggan'), ('sbrs', 'sbrs_data'), ('ardebt', 'ardebt')):
+            db.execute(f"DELETE FROM {table} WHERE nomen = ? AND periode_tahun = 2025 AND periode_bulan = 6",
+                       (NOMEN,))
+            refresh_customer_series(db, file_type, 6, 2025)
+        assert _series_row(db, 6, 2025) is None
+
+
+def test_series_lookup_uses_primary_key(app):
+    with app.app_context():
+        plan = ' '.join(row[-1] for row in get_db().execute(
+            'EXPLAIN QUERY PLAN ' + QUERIES['customer_series'], (1, 24)).fetchall())
+    assert 'PRIMARY KEY' in plan and 'TEMP B-TREE' not in plan
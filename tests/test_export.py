@@ -0,0 +1,84 @@
+"""
+Export tests
+
+CSV/XLSX dikirim sebagai response streaming dan isinya sama dengan list API.
+"""
+
+import csv
+import io
+import sqlite3
+
+import pytest
+from flask import Flask
+from openpyxl import load_workbook
+
+from api.export import register_export_routes
+from api.belum_bayar import register_belum_bayar_routes
+from core.database import close_db, get_db, init_db
+from core.summary import rebuild_kpi_summary
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['EXPORT_BATCH_ROWS'] = 17
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 300)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_export_routes(app, get_db)
+    register_belum_bayar_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def _csv(response):
+    assert response.is_streamed
+    assert 'attachment' in response.headers['Content-Disposition']
+    return list(csv.DictReader(io.StringIO(response.get_data().decode('utf-8-sig'))))
+
+
+def test_belum_bayar_csv_matches_list(app):
+    client = app.test_client()
+    listed = client.get(f'/api/belum-bayar/list?bulan={BULAN}&tahun={TAHUN}').get_json()
+
+    rows = _csv(client.get(f'/api/export/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}'))
+    assert [r['nomen'] for r in rows] == [r['nomen'] for r in listed]
+
+    rayon = listed[0]['rayon']
+    by_rayon = _csv(client.get(f'/api/export/belum-bayar?periode_bulan={BULAN}'
+                               f'&periode_tahun={TAHUN}&rayon={rayon}'))
+    assert by_rayon and {r['rayon'] for r in by_rayon} == {rayon}
+    assert len(by_rayon) == sum(1 for r in listed if r['rayon'] == rayon)
+
+
+def test_collection_xlsx(app):
+    response = app.test_client().get(f'/api/export/collection?periode_bulan={BULAN}'
+                                     f'&periode_tahun={TAHUN}&format=xlsx')
+    assert response.is_streamed
+    sheet = load_workbook(io.BytesIO(response.get_data()), read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    try:
+        total = conn.execute('SELECT COUNT(*) FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ?',
+                             (BULAN, TAHUN)).fetchone()[0]
+    finally:
+        conn.close()
+    assert rows[0][0] == 'nomen' and len(rows) == total + 1
+
+
+def test_invalid_format(app):
+    assert app.test_client().get('/api/export/collection?format=pdf').status_code == 400
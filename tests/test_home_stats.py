@@ -0,0 +1,125 @@
+"""
+Home stats tests
+
+/api/home/stats dibaca dari kpi_periode + kpi_periode_rayon dengan satu
+query. Angkanya harus sama dengan hitung langsung dari tabel fakta
+(tanpa fan-out pelanggan yang bayar beberapa kali), dan lebih cepat dari
+tujuh query per request versi lama (benchmark latency di bawah).
+"""
+
+import sqlite3
+import statistics
+import time
+
+import pytest
+from flask import Flask
+
+from api.data import register_data_routes
+from core.database import close_db, get_db, init_db
+from core.summary import get_home_stats, rebuild_kpi_summary
+from tests.conftest import PLAN_TEST_CUSTOMERS, _populate
+
+BULAN, TAHUN = 12, 2025
+
+# Endpoint lama: satu query per kartu + by-rayon LEFT JOIN ke collection
+LEGACY_QUERIES = [
+    ('SELECT periode_bulan, periode_tahun FROM master_pelanggan '
+     'ORDER BY periode_tahun DESC, periode_bulan DESC LIMIT 1', ()),
+    ('SELECT COUNT(*) FROM master_pelanggan WHERE periode_bulan = ? AND periode_tahun = ?', None),
+    ('SELECT SUM(target_mc) FROM master_pelanggan WHERE periode_bulan = ? AND periode_tahun = ?', None),
+    ('SELECT SUM(jumlah_bayar), COUNT(DISTINCT nomen_id) FROM collection_harian '
+     'WHERE periode_bulan = ? AND periode_tahun = ?', None),
+    ('''SELECT COUNT(DISTINCT m.nomen_id) FROM master_pelanggan m
+        LEFT JOIN collection_harian c ON m.nomen_id = c.nomen_id
+         AND m.periode_bulan = c.periode_bulan AND m.periode_tahun = c.periode_tahun
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ? AND c.nomen_id IS NULL''', None),
+    ('SELECT SUM(saldo_tunggakan) FROM ardebt WHERE periode_bulan = ? AND periode_tahun = ?', None),
+    ('''SELECT m.rayon, COUNT(m.nomen_id), COUNT(c.nomen_id), SUM(m.target_mc), SUM(c.jumlah_bayar)
+        FROM master_pelanggan m
+        LEFT JOIN collection_harian c ON m.nomen_id = c.nomen_id
+         AND m.periode_bulan = c.periode_bulan AND m.periode_tahun = c.periode_tahun
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+        GROUP BY m.rayon ORDER BY m.rayon''', None),
+]
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path_factory.mktemp('home') / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path_factory.mktemp('archive'))
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, PLAN_TEST_CUSTOMERS)
+    # Beberapa pelanggan bayar dua kali (dulu terhitung ganda di by-rayon)
+    conn.execute('''
+        INSERT INTO collection_harian
+        (nomen, nomen_id, tgl_bayar, jumlah_bayar, tipe_bayar, periode_bulan, periode_tahun)
+        SELECT nomen, nomen_id, '2025-12-29', jumlah_bayar, 'tunggakan', periode_bulan, periode_tahun
+        FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ? AND nomen_id % 7 = 0
+    ''', (BULAN, TAHUN))
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_data_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def test_home_stats_match_fact_tables(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    rayons = conn.execute('''
+        SELECT m.rayon, COUNT(*), COUNT(p.nomen_id), SUM(m.target_mc), COALESCE(SUM(p.bayar), 0)
+        FROM master_pelanggan m
+        LEFT JOIN (SELECT nomen_id, SUM(jumlah_bayar) AS bayar FROM collection_harian
+                   WHERE periode_bulan = ? AND periode_tahun = ? GROUP BY nomen_id) p
+          ON p.nomen_id = m.nomen_id
+        WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+        GROUP BY m.rayon ORDER BY m.rayon
+    ''', (BULAN, TAHUN, BULAN, TAHUN)).fetchall()
+    tunggakan = conn.execute('SELECT SUM(saldo_tunggakan) FROM ardebt WHERE periode_bulan = ? AND periode_tahun = ?',
+                             (BULAN, TAHUN)).fetchone()[0]
+    conn.close()
+
+    # Tanpa parameter: periode terbaru (12/2025)
+    home = app.test_client().get('/api/home/stats').get_json()
+
+    assert home['periode'] == f'{BULAN:02d}/{TAHUN}'
+    assert [(r['rayon'], r['total'], r['sudah_bayar'], r['target'], r['realisasi'])
+            for r in home['by_rayon']] == rayons
+    assert home['total_pelanggan'] == sum(r[1] for r in rayons)
+    assert home['sudah_bayar'] + home['belum_bayar'] == home['total_pelanggan']
+    assert home['total_realisasi'] == sum(r[4] for r in rayons)
+    assert home['total_tunggakan'] == tunggakan
+
+
+def _median_ms(fn, runs=30):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def test_home_stats_latency_benchmark(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.row_factory = sqlite3.Row
+
+    def _legacy():
+        for sql, params in LEGACY_QUERIES:
+            conn.execute(sql, (BULAN, TAHUN) if params is None else params).fetchall()
+
+    legacy_ms = _median_ms(_legacy)
+    engine_ms = _median_ms(lambda: get_home_stats(conn, BULAN, TAHUN))
+    conn.close()
+
+    print(f"\nhome stats ({PLAN_TEST_CUSTOMERS:,} pelanggan): "
+          f"legacy {legacy_ms:.2f} ms, summary {engine_ms:.2f} ms ({legacy_ms / engine_ms:.0f}x)")
+    assert engine_ms < legacy_ms
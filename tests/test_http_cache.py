@@ -0,0 +1,122 @@
+"""
+HTTP conditional GET & compression tests
+
+ETag / Last-Modified mengikuti data_version; request dengan validator
+yang cocok dijawab 304 tanpa menjalankan handler. JSON besar dikompres.
+Tulis analisa (tanpa bump versi global) tidak boleh menghasilkan 304 basi.
+"""
+
+import gzip
+import sqlite3
+
+import pytest
+from flask import Flask, jsonify
+
+from api.analisa import register_analisa_routes
+from api.customer import register_customer_routes
+from core.database import close_db, get_db, init_db
+from core.http_cache import init_http_cache
+from core.versioning import bump_data_version
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    init_db(app)
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    bump_data_version(conn, 'test')
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    init_http_cache(app)
+    app.calls = 0
+
+    @app.route('/api/probe')
+    def probe():
+        app.calls += 1
+        return jsonify([{'nomen': str(60000000 + i), 'status': 'BELUM BAYAR'} for i in range(200)])
+
+    @app.route('/api/internal/probe')
+    def internal_probe():
+        return jsonify({'ok': True})
+
+    return app
+
+
+def test_etag_304_skips_handler(app):
+    client = app.test_client()
+    first = client.get('/api/probe?bulan=6&tahun=2025')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"') and first.headers['Cache-Control'] == 'no-cache'
+    assert first.last_modified is not None
+
+    again = client.get('/api/probe?tahun=2025&bulan=6', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    since = client.get('/api/probe?bulan=6&tahun=2025',
+                       headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert since.status_code == 304
+    assert app.calls == 1
+
+    # Args lain = ETag lain
+    assert client.get('/api/probe?bulan=5&tahun=2025', headers={'If-None-Match': etag}).status_code == 200
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    bump_data_version(conn, 'upload:collection_harian:2025-06')
+    conn.commit()
+    conn.close()
+
+    changed = client.get('/api/probe?bulan=6&tahun=2025', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+    assert 'ETag' not in client.get('/api/internal/probe').headers
+
+
+def test_large_json_is_gzipped(app):
+    client = app.test_client()
+    plain = client.get('/api/probe')
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get('/api/probe', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert int(compressed.headers['Content-Length']) < len(plain.data)
+    assert gzip.decompress(compressed.data) == plain.data
+
+    # Response kecil tidak dikompres
+    small = client.get('/api/internal/probe', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_analisa_write_invalidates_etags(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 20)
+    bump_data_version(conn, 'test')
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    init_http_cache(app)
+    register_analisa_routes(app, get_db)
+    register_customer_routes(app, get_db)
+    client = app.test_client()
+
+    listing = client.get('/api/analisa/list')
+    assert listing.get_json() == []
+    profile = client.get('/api/customer/60000007/profile')
+    etag = profile.headers['ETag']
+    assert client.get('/api/customer/60000007/profile', headers={'If-None-Match': etag}).status_code == 304
+
+    created = client.post('/api/analisa/create', json={'nomen': '60000007', 'jenis_anomali': 'ZERO'})
+    assert created.get_json()['success']
+
+    again = client.get('/api/analisa/list', headers={'If-None-Match': listing.headers.get('ETag', '"x"')})
+    assert again.status_code == 200 and len(again.get_json()) == 1
+    fresh = client.get('/api/customer/60000007/profile', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and len(fresh.get_json()['analisa']) == 1
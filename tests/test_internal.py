@@ -0,0 +1,55 @@
+"""
+Internal API tests
+
+/api/internal/* nonaktif tanpa INTERNAL_API_TOKEN, butuh bearer token
+yang cocok, dan reset / clear hanya lewat POST.
+"""
+
+import pytest
+from flask import Flask
+
+from api.internal import register_internal_routes
+from core.cache import get_response_cache, init_cache
+from core.database import close_db, get_db, init_db
+
+TOKEN = 'rahasia-internal'
+AUTH = {'Authorization': f'Bearer {TOKEN}'}
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    app.config['INTERNAL_API_TOKEN'] = TOKEN
+    init_db(app)
+
+    app.teardown_appcontext(close_db)
+    init_cache(app)
+    register_internal_routes(app, get_db)
+    return app
+
+
+def test_internal_requires_token(app):
+    client = app.test_client()
+    assert client.get('/api/internal/writer').status_code == 401
+    assert client.get('/api/internal/writer', headers={'Authorization': 'Bearer salah'}).status_code == 401
+    assert client.get('/api/internal/writer', headers=AUTH).status_code == 200
+
+    app.config['INTERNAL_API_TOKEN'] = None
+    assert client.get('/api/internal/writer', headers=AUTH).status_code == 404
+
+
+def test_clear_and_reset_are_post_only(app):
+    client = app.test_client()
+    cache = get_response_cache(app)
+    cache.set('key', 1, (200, 'application/json', b'{}'))
+
+    assert client.get('/api/internal/cache?clear=1', headers=AUTH).status_code == 200
+    assert cache.get('key') is not None
+    assert client.get('/api/internal/cache/clear', headers=AUTH).status_code == 405
+
+    assert client.post('/api/internal/cache/clear', headers=AUTH).status_code == 200
+    assert cache.get('key') is None
+    assert client.post('/api/internal/query-stats/reset', headers=AUTH).get_json() == {'success': True}
@@ -0,0 +1,133 @@
+"""
+KPI summary tests
+
+Ringkasan kpi_periode / kpi_periode_rayon dibangun dari database sintetis,
+endpoint KPI harus mengembalikan angka yang sama dengan hitung langsung
+dari tabel fakta, dan check_kpi_summary() menemukan ringkasan yang basi.
+`flask kpi-summary rebuild` menaikkan data_version (cache ikut basi).
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.belum_bayar import register_belum_bayar_routes
+from api.data import register_data_routes
+from api.kpi import register_kpi_routes
+from api.sbrs import register_sbrs_routes
+from core.database import close_db, get_db, init_db
+from core.summary import check_kpi_summary, init_summary, rebuild_kpi_summary, refresh_kpi_periode
+from core.versioning import current_data_version
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 200)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_kpi_routes(app, get_db)
+    register_data_routes(app, get_db)
+    register_belum_bayar_routes(app, get_db)
+    register_sbrs_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def _raw(app, sql):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    try:
+        return conn.execute(sql, (BULAN, TAHUN)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_endpoints_match_fact_tables(app):
+    client = app.test_client()
+    target, pelanggan = _raw(app, '''
+        SELECT SUM(target_mc), COUNT(*) FROM master_pelanggan
+        WHERE periode_bulan = ? AND periode_tahun = ?''')
+    current, total, payers = _raw(app, '''
+        SELECT SUM(CASE WHEN tipe_bayar = 'current' THEN jumlah_bayar ELSE 0 END),
+               SUM(jumlah_bayar), COUNT(DISTINCT nomen_id)
+        FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ?''')
+    unpaid, unpaid_amount = _raw(app, '''
+        SELECT COUNT(*), SUM(target_mc) FROM master_pelanggan m
+        WHERE periode_bulan = ? AND periode_tahun = ?
+          AND NOT EXISTS (SELECT 1 FROM collection_harian c WHERE c.nomen_id = m.nomen_id
+                          AND c.periode_bulan = m.periode_bulan AND c.periode_tahun = m.periode_tahun)''')
+
+    kpi = client.get(f'/api/kpi?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert kpi['target_mc'] == target
+    assert kpi['collection_current'] == current
+    assert kpi['jumlah_pelanggan'] == pelanggan
+
+    home = client.get(f'/api/home/stats?periode_bulan={BULAN}&periode_tahun={TAHUN}').get_json()
+    assert home['total_pelanggan'] == pelanggan
+    assert home['total_realisasi'] == total
+    assert home['sudah_bayar'] == payers
+    assert home['belum_bayar'] == unpaid
+    assert sum(r['total'] for r in home['by_rayon']) == pelanggan
+
+    summary = client.get(f'/api/belum-bayar/summary?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert (summary['unpaid_count'], summary['unpaid_amount']) == (unpaid, unpaid_amount)
+
+    sbrs = client.get(f'/api/sbrs/data?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert sum(r['total_tagihan'] for r in sbrs) == target
+    assert sum(r['belum_bayar'] for r in sbrs) == unpaid
+
+
+def test_check_detects_stale_summary(app):
+    with app.app_context():
+        db = get_db()
+        assert check_kpi_summary(db) == []
+
+        db.execute('DELETE FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ?', (BULAN, TAHUN))
+        stale = check_kpi_summary(db)
+        assert {m['periode'] for m in stale} == {f'{TAHUN}-{BULAN:02d}'}
+        assert 'collection_total' in {m['column'] for m in stale}
+
+        refresh_kpi_periode(db, BULAN, TAHUN)
+        assert check_kpi_summary(db) == []
+        db.rollback()
+
+
+def test_init_db_builds_summary_for_existing_database(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.execute('DROP TABLE kpi_periode')
+    conn.execute('DROP TABLE kpi_periode_rayon')
+    conn.commit()
+
+    init_db(app)
+
+    periodes = conn.execute('SELECT COUNT(*) FROM kpi_periode').fetchone()[0]
+    assert periodes == conn.execute(
+        'SELECT COUNT(*) FROM (SELECT DISTINCT periode_tahun, periode_bulan FROM master_pelanggan)'
+    ).fetchone()[0]
+    conn.close()
+
+
+def test_cli_rebuild_bumps_data_version(app):
+    init_summary(app)
+    with app.app_context():
+        version = current_data_version(get_db())
+
+    result = app.test_cli_runner().invoke(args=['kpi-summary', 'rebuild', '--periode', f'{TAHUN}-{BULAN:02d}'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        assert current_data_version(get_db()) > version
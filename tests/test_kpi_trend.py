@@ -0,0 +1,74 @@
+"""
+KPI trend tests
+
+Trend dibaca dari kpi_periode, difilter per rentang periode dan di-cache
+sampai data_version naik.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.kpi import register_kpi_routes
+from core.database import close_db, get_db, init_db
+from core.summary import rebuild_kpi_summary
+from core.versioning import bump_data_version, current_data_version
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 50)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_kpi_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def test_trend_range_parameters(app):
+    client = app.test_client()
+
+    full = client.get('/api/kpi/trend').get_json()
+    assert len(full) == 24
+    assert full[0]['periode'] == '1/2024' and full[-1]['periode'] == '12/2025'
+
+    last = client.get('/api/kpi/trend?last=3').get_json()
+    assert [t['periode'] for t in last] == ['10/2025', '11/2025', '12/2025']
+
+    ranged = client.get('/api/kpi/trend?from=2024-11&to=2025-02').get_json()
+    assert [t['periode'] for t in ranged] == ['11/2024', '12/2024', '1/2025', '2/2025']
+
+    assert client.get('/api/kpi/trend?from=2025-13').status_code == 400
+
+
+def test_trend_cache_follows_data_version(app):
+    client = app.test_client()
+    before = client.get('/api/kpi/trend?last=1').get_json()[0]
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.execute('UPDATE kpi_periode SET target_mc = target_mc * 2 WHERE periode_tahun = 2025 AND periode_bulan = 12')
+    conn.commit()
+
+    # Tanpa perubahan versi: hasil cache
+    assert client.get('/api/kpi/trend?last=1').get_json()[0] == before
+
+    version = current_data_version(conn)
+    assert bump_data_version(conn, 'test') > version
+    conn.commit()
+    conn.close()
+
+    after = client.get('/api/kpi/trend?last=1').get_json()[0]
+    assert after['target_mc'] == before['target_mc'] * 2
@@ -0,0 +1,92 @@
+"""
+Database maintenance tests
+
+Task maintenance dijalankan langsung (tanpa thread) terhadap database
+sintetis kecil yang dibuat lewat init_db (WAL + auto_vacuum INCREMENTAL).
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from core.database import init_db
+from core.maintenance import MaintenanceScheduler, run_analyze, run_checkpoint, run_incremental_vacuum
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'sunter.db')
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = path
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    init_db(app)
+
+    conn = sqlite3.connect(path)
+    _populate(conn, 100)
+    conn.close()
+    return path
+
+
+def _log_rows(conn):
+    return conn.execute('SELECT task, page_count_before, page_count_after, duration_ms FROM maintenance_log').fetchall()
+
+
+def test_new_database_uses_wal_and_incremental_vacuum(db_path):
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    conn.close()
+
+
+def test_analyze_writes_stats_and_log(db_path):
+    conn = sqlite3.connect(db_path)
+    result = run_analyze(conn, ['collection_harian'])
+
+    assert result['task'] == 'analyze'
+    stats = {row[0] for row in conn.execute('SELECT DISTINCT tbl FROM sqlite_stat1')}
+    assert 'collection_harian' in stats
+    assert _log_rows(conn)[-1][0] == 'analyze'
+    conn.close()
+
+
+def test_incremental_vacuum_shrinks_file(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM sbrs_data WHERE periode_tahun = 2024')
+    conn.commit()
+    free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    assert free_before > 0
+
+    result = run_incremental_vacuum(conn, pages=free_before)
+
+    assert result['freelist'] == 0
+    task, pages_before, pages_after, _ = _log_rows(conn)[-1]
+    assert task == 'vacuum' and pages_after == pages_before - free_before
+    conn.close()
+
+
+def test_checkpoint(db_path):
+    conn = sqlite3.connect(db_path)
+    result = run_checkpoint(conn, 'TRUNCATE')
+    assert result['detail'].startswith('TRUNCATE busy=0')
+    conn.close()
+
+
+def test_scheduler_runs_analyze_after_upload(db_path):
+    scheduler = MaintenanceScheduler(db_path, checkpoint_interval=0, idle_seconds=0,
+                                     vacuum_min_free_pages=1)
+    scheduler.request_analyze(['sbrs_data'])
+    scheduler.request_analyze(['ardebt'])
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM ardebt WHERE periode_tahun = 2024')
+    conn.commit()
+
+    tasks = [r['task'] for r in scheduler.run_pending()]
+    assert tasks == ['analyze', 'checkpoint', 'vacuum']
+    assert conn.execute("SELECT detail FROM maintenance_log WHERE task = 'analyze'").fetchone()[0] == 'ardebt,sbrs_data'
+
+    # Worker tanpa lock: tanpa request analyze tidak melakukan apa-apa
+    assert scheduler.run_pending(periodic=False) == []
+    conn.close()
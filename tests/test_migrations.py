@@ -0,0 +1,89 @@
+"""
+Schema migration tests
+
+Database skema lama (master_pelanggan PK nomen, FK anak ke
+master_pelanggan(nomen)) dimigrasi oleh init_db dalam satu transaksi;
+jika gagal di tengah jalan tidak ada tabel *_legacy atau data setengah
+tersalin yang tertinggal.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+import core.migrations as migrations
+from core.database import init_db
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE master_pelanggan (
+        nomen TEXT PRIMARY KEY, nama TEXT, rayon TEXT, pcez TEXT, tarif TEXT,
+        periode_bulan INTEGER, periode_tahun INTEGER
+    );
+    CREATE TABLE collection_harian (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nomen TEXT REFERENCES master_pelanggan(nomen),
+        tgl_bayar TEXT, jumlah_bayar REAL, periode_bulan INTEGER, periode_tahun INTEGER
+    );
+    CREATE INDEX idx_collection_nomen ON collection_harian(nomen);
+'''
+
+
+def _legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany('INSERT INTO master_pelanggan VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (f'6000000{i}', f'Pelanggan {i}', '34', '340/01', 'R1', 6, 2025) for i in range(5)
+    ])
+    conn.executemany(
+        'INSERT INTO collection_harian (nomen, tgl_bayar, jumlah_bayar, periode_bulan, periode_tahun) '
+        'VALUES (?, ?, ?, ?, ?)',
+        [(f'6000000{i}', '2025-06-10', 100000 + i, 6, 2025) for i in range(5)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _tables(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    _legacy_db(app.config['DATABASE_PATH'])
+    return app
+
+
+def test_legacy_schema_is_migrated(app):
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == migrations.SCHEMA_VERSION
+    assert not any(t.endswith('_legacy') for t in _tables(conn))
+    pk = [r[1] for r in sorted(conn.execute('PRAGMA table_info(master_pelanggan)'), key=lambda r: r[5]) if r[5]]
+    assert pk == ['periode_tahun', 'periode_bulan', 'nomen']
+    assert conn.execute('SELECT COUNT(*) FROM master_pelanggan').fetchone()[0] == 5
+    assert conn.execute('SELECT COUNT(*) FROM collection_harian WHERE nomen_id IS NOT NULL').fetchone()[0] == 5
+    conn.close()
+
+    # Start kedua: versi sudah terbaru, tidak ada yang dimigrasi ulang
+    init_db(app)
+
+
+def test_failed_migration_rolls_back(app, monkeypatch):
+    def _fail(cursor):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(migrations, 'create_fact_tables', _fail)
+    with pytest.raises(sqlite3.OperationalError):
+        init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 0
+    assert not any(t.endswith('_legacy') for t in _tables(conn))
+    assert 'master_pelanggan' in _tables(conn)
+    assert conn.execute('SELECT COUNT(*) FROM collection_harian').fetchone()[0] == 5
+    conn.close()
@@ -0,0 +1,69 @@
+"""
+nomen_dict tests
+
+Mapping nomen TEXT → id INTEGER untuk loader, dan backfill nomen_id saat
+database lama (tanpa kolom nomen_id) di-upgrade oleh init_db.
+"""
+
+import sqlite3
+
+from flask import Flask
+
+from core.database import close_db, get_db, init_db, map_nomen_ids
+
+
+def _app(path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = path
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    app.teardown_appcontext(close_db)
+    return app
+
+
+def test_map_nomen_ids_registers_and_reuses(tmp_path):
+    app = _app(str(tmp_path / 'sunter.db'))
+    init_db(app)
+
+    with app.app_context():
+        db = get_db()
+        first = map_nomen_ids(db, ['60000002', '60000001', '60000002'])
+        assert first[0] == first[2] and first[0] != first[1]
+
+        second = map_nomen_ids(db, ['60000001', '60000003'])
+        assert second[0] == first[1]
+        assert second[1] not in first
+        db.commit()
+
+        assert db.execute('SELECT COUNT(*) FROM nomen_dict').fetchone()[0] == 3
+
+
+def test_init_db_backfills_nomen_id(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE sbrs_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nomen TEXT NOT NULL,
+            volume REAL,
+            periode_bulan INTEGER NOT NULL,
+            periode_tahun INTEGER NOT NULL
+        )
+    ''')
+    conn.executemany('INSERT INTO sbrs_data (nomen, volume, periode_bulan, periode_tahun) VALUES (?, ?, ?, ?)',
+                     [('60000001', 10, 1, 2025), ('60000002', 20, 1, 2025), ('60000001', 12, 2, 2025)])
+    conn.commit()
+    conn.close()
+
+    init_db(_app(path))
+
+    conn = sqlite3.connect(path)
+    rows = conn.execute('''
+        SELECT s.nomen, s.nomen_id, d.nomen FROM sbrs_data s
+        LEFT JOIN nomen_dict d ON d.id = s.nomen_id
+    ''').fetchall()
+    assert all(nomen == dict_nomen for nomen, _, dict_nomen in rows)
+    assert len({nomen_id for _, nomen_id, _ in rows}) == 2
+
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 'idx_sbrs_periode_nid' in indexes and 'idx_sbrs_nomen' not in indexes
+    conn.close()
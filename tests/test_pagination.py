@@ -0,0 +1,123 @@
+"""
+Keyset pagination tests
+
+Halaman lewat cursor harus sama persis dengan LIMIT/OFFSET versi lama,
+summary hanya di halaman pertama, dan query keyset tidak sort ulang.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.data import register_data_routes
+from core.database import close_db, get_db, init_db
+from core.pagination import CursorError, decode_cursor, encode_cursor
+from core.queries import QUERIES
+from core.summary import rebuild_kpi_summary
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 300)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_data_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def _walk(client, path, limit):
+    pages = [client.get(f'{path}?periode_bulan={BULAN}&periode_tahun={TAHUN}&limit={limit}').get_json()]
+    while pages[-1]['pagination']['next_cursor']:
+        cursor = pages[-1]['pagination']['next_cursor']
+        pages.append(client.get(f'{path}?cursor={cursor}&limit={limit}').get_json())
+    return pages
+
+
+def _offset_rows(client, path, limit):
+    rows, offset = [], 0
+    while True:
+        page = client.get(f'{path}?periode_bulan={BULAN}&periode_tahun={TAHUN}'
+                          f'&limit={limit}&offset={offset}').get_json()
+        rows.extend(page['data'])
+        if len(page['data']) < limit:
+            return rows
+        offset += limit
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor(TAHUN, BULAN, ['2025-06-03', 125000.0, 42])
+    assert decode_cursor(token, 3) == (TAHUN, BULAN, ['2025-06-03', 125000.0, 42])
+    for bad in ('abc', 'e30', encode_cursor(TAHUN, BULAN, ['x'])):
+        with pytest.raises(CursorError):
+            decode_cursor(bad, 3)
+
+
+@pytest.mark.parametrize('path', ['/api/collection', '/api/belum-bayar'])
+def test_cursor_pages_match_offset(app, path):
+    client = app.test_client()
+    pages = _walk(client, path, 11)
+
+    assert len(pages) > 2
+    assert [row for page in pages for row in page['data']] == _offset_rows(client, path, 11)
+    assert pages[0]['summary'] is not None
+    assert all(page['summary'] is None for page in pages[1:])
+    assert all(page['periode']['bulan'] == BULAN for page in pages)
+
+
+def test_bad_cursor_is_400(app):
+    client = app.test_client()
+    assert client.get('/api/collection?cursor=not-a-cursor').status_code == 400
+
+    cursor = client.get(f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}&limit=5') \
+        .get_json()['pagination']['next_cursor']
+    assert client.get(f'/api/belum-bayar?cursor={cursor}&periode_bulan={BULAN - 1}').status_code == 400
+    assert client.get(f'/api/collection?cursor={cursor}').status_code == 400
+
+
+def test_keyset_query_uses_index_order(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    try:
+        plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + QUERIES['collection_list_after'],
+                                               (BULAN, TAHUN, '2025-06-15', 0, 0, 50))]
+    finally:
+        conn.close()
+    assert any('idx_coll_periode_sort' in detail for detail in plan), plan
+    assert not any('TEMP B-TREE' in detail for detail in plan), plan
+
+
+def test_cursor_pages_keep_null_sort_keys(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    nomen, nomen_id = conn.execute('SELECT nomen, nomen_id FROM master_pelanggan LIMIT 1').fetchone()
+    conn.executemany('''
+        INSERT INTO collection_harian (nomen, nomen_id, tgl_bayar, jumlah_bayar, tipe_bayar, periode_bulan, periode_tahun)
+        VALUES (?, ?, ?, ?, 'current', ?, ?)
+    ''', [(nomen, nomen_id, None, 5000, BULAN, TAHUN), (nomen, nomen_id, None, None, BULAN, TAHUN),
+          (nomen, nomen_id, '2025-06-20', None, BULAN, TAHUN)])
+    total = conn.execute('SELECT COUNT(*) FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ?',
+                         (BULAN, TAHUN)).fetchone()[0]
+    conn.commit()
+    conn.close()
+
+    client = app.test_client()
+    # limit 1: cursor jatuh tepat di baris yang sort key-nya NULL
+    pages = _walk(client, '/api/collection', 1)
+    rows = [row for page in pages for row in page['data']]
+    assert len(rows) == total
+    assert rows == _offset_rows(client, '/api/collection', 1)
+    assert [row['tgl_bayar'] for row in rows[-2:]] == [None, None]
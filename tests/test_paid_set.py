@@ -0,0 +1,182 @@
+"""
+Paid set tests
+
+Endpoint belum bayar dihitung dari paid set per periode (bukan anti-join);
+hasilnya harus sama dengan NOT IN / LEFT JOIN ... IS NULL versi lama.
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from api.belum_bayar import register_belum_bayar_routes
+from api.data import register_data_routes
+from core.database import close_db, get_db, init_db
+from core.paidset import get_periode_frame, is_paid, load_paid_set
+from core.summary import rebuild_kpi_summary, refresh_kpi_periode
+from core.versioning import bump_data_version
+from tests.conftest import _populate
+
+BULAN, TAHUN = 6, 2025
+
+ANTI_JOIN = '''
+    SELECT m.nomen, m.rayon, m.target_mc FROM master_pelanggan m
+    WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+      AND m.nomen_id NOT IN (SELECT nomen_id FROM collection_harian
+                             WHERE periode_bulan = ? AND periode_tahun = ?)
+    ORDER BY m.rayon, m.nomen
+'''
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 300)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    register_data_routes(app, get_db)
+    register_belum_bayar_routes(app, get_db)
+
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        get_db().commit()
+    return app
+
+
+def _expected(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    try:
+        return conn.execute(ANTI_JOIN, (BULAN, TAHUN, BULAN, TAHUN)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_is_paid_matches_python_set():
+    paid = np.array([2, 5, 9, 40], dtype='<i8')
+    ids = np.array([1, 2, 3, 9, 40, 41], dtype='<i8')
+    assert is_paid(paid, ids).tolist() == [False, True, False, True, True, False]
+    assert not is_paid(np.array([], dtype='<i8'), ids).any()
+
+
+def test_endpoints_match_anti_join(app):
+    expected = _expected(app)
+    client = app.test_client()
+
+    listed = client.get(f'/api/belum-bayar/list?bulan={BULAN}&tahun={TAHUN}').get_json()
+    assert [r['nomen'] for r in listed] == [r[0] for r in expected]
+
+    pages = []
+    for offset in range(0, len(expected), 40):
+        page = client.get(f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}'
+                          f'&limit=40&offset={offset}').get_json()
+        pages.extend(r['nomen'] for r in page['data'])
+    assert pages == [r[0] for r in expected]
+
+    assert page['summary']['total_belum_bayar'] == len(expected)
+    assert page['summary']['total_target'] == sum(r[2] for r in expected)
+    by_rayon = {}
+    for _, rayon, _ in expected:
+        by_rayon[rayon] = by_rayon.get(rayon, 0) + 1
+    assert {r['rayon']: r['total'] for r in page['by_rayon']} == by_rayon
+
+
+def test_paid_set_follows_collection_upload(app):
+    with app.app_context():
+        db = get_db()
+        before = load_paid_set(db, BULAN, TAHUN)
+
+        db.execute('DELETE FROM collection_harian WHERE periode_bulan = ? AND periode_tahun = ? AND nomen_id = ?',
+                   (BULAN, TAHUN, int(before[0])))
+        refresh_kpi_periode(db, BULAN, TAHUN)
+        bump_data_version(db, 'test')
+        db.commit()
+
+        after = load_paid_set(get_db(), BULAN, TAHUN)
+        assert after.tolist() == before[1:].tolist()
+
+    expected = _expected(app)
+    page = app.test_client().get(f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}').get_json()
+    assert page['summary']['total_belum_bayar'] == len(expected)
+
+
+FILTERED = '''
+    SELECT m.nomen, m.target_mc, COALESCE(a.saldo_tunggakan, 0), COALESCE(a.umur_piutang, -1)
+    FROM master_pelanggan m
+    LEFT JOIN ardebt a ON a.nomen_id = m.nomen_id
+        AND a.periode_bulan = m.periode_bulan AND a.periode_tahun = m.periode_tahun
+    WHERE m.periode_bulan = ? AND m.periode_tahun = ?
+      AND m.nomen_id NOT IN (SELECT nomen_id FROM collection_harian
+                             WHERE periode_bulan = ? AND periode_tahun = ?)
+'''
+
+
+def _walk_sorted(client, query):
+    url = f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}&limit=7&{query}'
+    page = client.get(url).get_json()
+    summary, rows = page['summary'], list(page['data'])
+    while page['pagination']['next_cursor']:
+        page = client.get(f"{url}&cursor={page['pagination']['next_cursor']}").get_json()
+        rows.extend(page['data'])
+    return summary, rows
+
+
+def test_filters_and_sort_match_sql(app):
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    try:
+        rayon = conn.execute('SELECT rayon FROM master_pelanggan LIMIT 1').fetchone()[0]
+        expected = conn.execute(FILTERED + ' AND m.rayon = ? AND a.saldo_tunggakan > 0'
+                                ' ORDER BY a.umur_piutang DESC, m.nomen',
+                                (BULAN, TAHUN, BULAN, TAHUN, rayon)).fetchall()
+        big = conn.execute(FILTERED + ' AND m.target_mc >= 100000 AND a.umur_piutang >= 13',
+                           (BULAN, TAHUN, BULAN, TAHUN)).fetchall()
+    finally:
+        conn.close()
+
+    client = app.test_client()
+    summary, rows = _walk_sorted(client, f'rayon={rayon}&has_saldo=1&sort=-umur_piutang')
+    assert summary['total_belum_bayar'] == len(expected)
+    assert [r['umur_piutang'] for r in rows] == [r[3] for r in expected]
+    assert sorted(r['nomen'] for r in rows) == sorted(r[0] for r in expected)
+
+    assert len(big) > 1
+    summary, rows = _walk_sorted(client, 'min_target=100000&umur=13%2B&sort=target_mc')
+    assert sorted(r['nomen'] for r in rows) == sorted(r[0] for r in big)
+    assert [r['target_mc'] for r in rows] == sorted(r[1] for r in big)
+    assert summary['total_target'] == sum(r[1] for r in big)
+
+    nomen = rows[0]['nomen']
+    found = client.get(f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}&q={nomen}').get_json()
+    assert [r['nomen'] for r in found['data']] == [nomen]
+    by_name = client.get(f'/api/belum-bayar?periode_bulan={BULAN}&periode_tahun={TAHUN}'
+                         f'&q=pelanggan {nomen[:-1]}&limit=500').get_json()
+    assert nomen in [r['nomen'] for r in by_name['data']]
+    assert all(r['nama'].lower().startswith(f'pelanggan {nomen[:-1]}') for r in by_name['data'])
+
+    assert client.get('/api/belum-bayar?sort=nama').status_code == 400
+    assert client.get('/api/belum-bayar?umur=99').status_code == 400
+
+
+def test_frame_cache_follows_periode_version(app):
+    with app.app_context():
+        db = get_db()
+        frame = get_periode_frame(db, BULAN, TAHUN)
+
+        # Versi global naik (periode lain / analisa): frame periode ini tetap dipakai
+        bump_data_version(db, 'test')
+        refresh_kpi_periode(db, 5, TAHUN)
+        db.commit()
+        assert get_periode_frame(db, BULAN, TAHUN) is frame
+
+        bump_data_version(db, 'test')
+        refresh_kpi_periode(db, BULAN, TAHUN)
+        db.commit()
+        assert get_periode_frame(db, BULAN, TAHUN) is not frame
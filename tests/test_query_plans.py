@@ -0,0 +1,100 @@
+"""
+Query plan regression tests
+
+Setiap query di core.queries.QUERIES di-EXPLAIN terhadap database sintetis
+ukuran produksi (lihat fixture plan_db). Index yang hilang atau query yang
+ditulis ulang dengan buruk akan gagal di sini sebelum deploy.
+"""
+
+import re
+
+import pytest
+
+from core.queries import QUERIES
+
+FACT_TABLES = {
+    'master_pelanggan',
+    'collection_harian',
+    'master_bayar',
+    'mainbill',
+    'ardebt',
+    'sbrs_data',
+}
+
+PERIODE_FILTER = re.compile(r'periode_bulan\s*=\s*\?')
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'WHERE', 'ON', 'LEFT', 'JOIN', 'INNER', 'GROUP', 'ORDER', 'LIMIT', 'USING'}
+
+
+def explain(conn, sql):
+    """Return list detail EXPLAIN QUERY PLAN (satu string per node)"""
+    params = [1] * sql.count('?')
+    return [row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+
+def fact_table_names(sql):
+    """Nama tabel fakta + alias-nya yang dipakai di query"""
+    names = set()
+    for table, alias in TABLE_REF.findall(sql):
+        if table in FACT_TABLES:
+            names.add(table)
+            if alias and alias.upper() not in SQL_KEYWORDS:
+                names.add(alias)
+    return names
+
+
+def full_scans(plan, names):
+    """
+    Node plan yang membaca seluruh tabel fakta: SCAN biasa, SCAN lewat
+    index (full index scan), atau skip-scan ANY(...) pada kolom pertama index
+    """
+    scans = []
+    for detail in plan:
+        match = re.match(r'(SCAN|SEARCH) (\w+)', detail)
+        if not match or match.group(2) not in names:
+            continue
+        if match.group(1) == 'SCAN' or 'ANY(' in detail:
+            scans.append(detail)
+    return scans
+
+
+PERIODE_QUERIES = sorted(name for name, sql in QUERIES.items() if PERIODE_FILTER.search(sql))
+
+
+@pytest.mark.parametrize('name', PERIODE_QUERIES)
+def test_no_fact_table_scan_with_periode_filter(plan_db, name):
+    sql = QUERIES[name]
+    plan = explain(plan_db, sql)
+
+    scans = full_scans(plan, fact_table_names(sql))
+    assert not scans, f"{name} full-scans a fact table:\n" + '\n'.join(plan)
+
+
+@pytest.mark.parametrize('name', sorted(QUERIES))
+def test_no_correlated_subquery(plan_db, name):
+    plan = explain(plan_db, QUERIES[name])
+
+    correlated = [detail for detail in plan if 'CORRELATED' in detail]
+    assert not correlated, f"{name} runs a correlated subquery per row:\n" + '\n'.join(plan)
+
+
+def test_periode_filter_detected():
+    """Guard: deteksi periode filter tidak boleh diam-diam kosong"""
+    assert 'kpi_summary' in PERIODE_QUERIES
+    assert 'collection_list' in PERIODE_QUERIES
+    assert 'latest_periode_mc' not in PERIODE_QUERIES
+
+
+def test_scan_detection(plan_db):
+    """Guard: query tanpa index periode harus terdeteksi sebagai full scan"""
+    sql = 'SELECT SUM(jumlah_bayar) FROM collection_harian c WHERE c.tipe_bayar = ?'
+    assert full_scans(explain(plan_db, sql), fact_table_names(sql))
+
+
+TEXT_NOMEN_JOIN = re.compile(r'\b\w+\.nomen\s*=\s*\w+\.nomen\b|\bnomen\s+NOT\s+IN\b', re.IGNORECASE)
+
+
+@pytest.mark.parametrize('name', sorted(QUERIES))
+def test_joins_use_nomen_id(name):
+    """Join & anti-join antar tabel fakta memakai nomen_id (integer), bukan nomen TEXT"""
+    assert not TEXT_NOMEN_JOIN.search(QUERIES[name]), f"{name} joins on text nomen"
@@ -0,0 +1,110 @@
+"""
+Response cache tests
+
+GET endpoint dashboard di-cache per (path, args, data_version): request
+kedua HIT, setelah data_version naik MISS lagi; cache disk dipakai
+bersama oleh app (worker) lain.
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from api.kpi import register_kpi_routes
+from core.cache import DiskCache, LRUCache, init_cache
+from core.database import close_db, get_read_db, init_db
+from core.summary import rebuild_kpi_summary
+from core.versioning import bump_data_version
+from tests.conftest import _populate
+
+
+def _make_app(db_path, cache_dir=None):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    app.config['ARCHIVE_DIR'] = db_path + '.archive'
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    app.config['RESPONSE_CACHE_DIR'] = cache_dir
+    app.teardown_appcontext(close_db)
+    init_cache(app)
+    register_kpi_routes(app, get_read_db)
+    return app
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'sunter.db')
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = path
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    init_db(app)
+
+    conn = sqlite3.connect(path)
+    _populate(conn, 50)
+    conn.row_factory = sqlite3.Row
+    rebuild_kpi_summary(conn)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_hit_until_data_version_changes(db_path):
+    client = _make_app(db_path).test_client()
+    url = '/api/kpi?tahun=2025&bulan=6'
+
+    first = client.get(url)
+    assert first.headers['X-Cache'] == 'MISS'
+    # Urutan args tidak mempengaruhi kunci
+    second = client.get('/api/kpi?bulan=6&tahun=2025')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('UPDATE kpi_periode SET target_mc = 1 WHERE periode_tahun = 2025 AND periode_bulan = 6')
+    bump_data_version(conn, 'upload:master_pelanggan:2025-06')
+    conn.commit()
+    conn.close()
+
+    third = client.get(url)
+    assert third.headers['X-Cache'] == 'MISS'
+    assert third.get_json()['target_mc'] == 1
+
+    # Error response tidak di-cache
+    assert client.get('/api/kpi').status_code == 400
+    assert 'X-Cache' not in client.get('/api/kpi').headers
+
+
+def test_disk_cache_shared_between_workers(db_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    worker_a = _make_app(db_path, cache_dir).test_client()
+    worker_b = _make_app(db_path, cache_dir).test_client()
+
+    assert worker_a.get('/api/kpi/trend').headers['X-Cache'] == 'MISS'
+    assert worker_b.get('/api/kpi/trend').headers['X-Cache'] == 'HIT'
+
+
+def test_lru_limits():
+    cache = LRUCache(max_entries=3, max_bytes=100)
+    for i in range(4):
+        cache.set(i, (200, 'application/json', b'x' * 10))
+    assert cache.get(0) is None and cache.get(3) is not None
+
+    cache.set('big', (200, 'application/json', b'x' * 95))
+    status = cache.status()
+    assert status['bytes'] <= 100
+    assert status['evictions'] >= 3
+
+
+def test_disk_cache_size_total(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache'), max_bytes=100)
+    cache.set('a', 1, (200, 'application/json', b'x' * 30))
+    cache.set('a', 1, (200, 'application/json', b'x' * 40))
+    cache.set('b', 1, (200, 'application/json', b'x' * 50))
+    assert cache.status()['bytes'] == 90
+
+    cache.set('c', 1, (200, 'application/json', b'x' * 30))
+    status = cache.status()
+    assert status['bytes'] <= 100 and cache.get('a') is None
+
+    cache.set('d', 2, (200, 'application/json', b'x' * 10))
+    assert cache.status() == dict(status, entries=1, bytes=10)
@@ -0,0 +1,66 @@
+"""
+Read snapshot tests
+
+Snapshot disalin ke file sementara lalu di-rename; salinan yang gagal
+tidak meninggalkan file sementara. Setelah upload snapshot di-refresh di
+background (refresh_snapshot_async).
+"""
+
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from core.database import init_db, refresh_snapshot, refresh_snapshot_async
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['READ_SNAPSHOT_ENABLED'] = True
+    app.config['READ_SNAPSHOT_PATH'] = str(tmp_path / 'snapshot.db')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 20)
+    conn.commit()
+    conn.close()
+    return app
+
+
+def test_async_refresh_writes_snapshot(app):
+    thread = refresh_snapshot_async(app)
+    thread.join(10)
+
+    conn = sqlite3.connect(app.config['READ_SNAPSHOT_PATH'])
+    assert conn.execute('SELECT COUNT(*) FROM master_pelanggan').fetchone()[0] > 0
+    conn.close()
+
+
+class _FailingSource:
+    """Koneksi sumber yang gagal di tengah backup"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def backup(self, target, **kwargs):
+        target.execute('CREATE TABLE partial (x)')  # file sementara sudah ditulis sebagian
+        raise sqlite3.OperationalError('disk I/O error')
+
+    def close(self):
+        self.conn.close()
+
+
+def test_failed_copy_removes_tmp_file(app, tmp_path, monkeypatch):
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda path, *args, **kwargs: (
+        connect(path, *args, **kwargs) if path.endswith('.tmp')
+        else _FailingSource(connect(path, *args, **kwargs))
+    ))
+
+    with app.app_context(), pytest.raises(sqlite3.OperationalError):
+        refresh_snapshot()
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')] == []
@@ -0,0 +1,172 @@
+"""
+Upload tests
+
+POST /api/upload dengan file Excel sungguhan: loader menulis tabel fakta,
+lalu ringkasan KPI dan customer_series di-refresh untuk setiap periode yang
+ditulis (ARDEBT bisa menulis ke periode PERIODE_BILL lain; upload ulang
+mengganti periode tersebut, tidak menggandakan). Staging dipecah menjadi
+job writer pendek per UPLOAD_CHUNK_ROWS baris; swap, refresh ringkasan dan
+bump data_version berjalan dalam satu transaksi.
+"""
+
+import io
+import sqlite3
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+import api.upload as upload
+from core.database import close_db, get_db, init_db
+from core.series import rebuild_customer_series
+from core.summary import check_kpi_summary, rebuild_kpi_summary
+from core.versioning import current_data_version
+from core.writer import get_writer, run_write
+from tests.conftest import _populate
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = str(tmp_path / 'sunter.db')
+    app.config['ARCHIVE_DIR'] = str(tmp_path / 'archive')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    init_db(app)
+
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    _populate(conn, 50)
+    conn.commit()
+    conn.close()
+
+    app.teardown_appcontext(close_db)
+    upload.register_upload_routes(app, get_db)
+    with app.app_context():
+        rebuild_kpi_summary(get_db())
+        rebuild_customer_series(get_db())
+        get_db().commit()
+    return app
+
+
+def _post(app, monkeypatch, file_type, bulan, tahun, frame):
+    """Upload frame sebagai .xlsx; periode & jenis file ditetapkan (bukan dari deteksi nama file)"""
+    monkeypatch.setattr(upload, 'auto_detect_periode', lambda path, name: {
+        'file_type': file_type, 'periode_bulan': bulan, 'periode_tahun': tahun, 'method': 'test',
+    })
+    buf = io.BytesIO()
+    frame.to_excel(buf, index=False)
+    buf.seek(0)
+    return app.test_client().post('/api/upload', data={'file': (buf, f'{file_type}.xlsx')})
+
+
+def test_ardebt_bill_periodes_are_refreshed(app, monkeypatch):
+    frame = pd.DataFrame({
+        'NOMEN': ['60000001', '60000002', '60000003'],
+        'PCEZ': ['340/01', '340/02', '341/01'],
+        'PERIODE_BILL': ['2025-04-01', '2025-05-01', '2025-06-01'],
+        'JUMLAH': [125000, 250000, 375000],
+    })
+    response = _post(app, monkeypatch, 'ardebt', 6, 2025, frame)
+    assert response.status_code == 200, response.get_json()
+
+    with app.app_context():
+        db = get_db()
+        assert check_kpi_summary(db, [(2025, 4), (2025, 5), (2025, 6)]) == []
+        for bulan in (4, 5, 6):
+            expected = db.execute('''
+                SELECT nomen_id, SUM(saldo_tunggakan) FROM ardebt
+                WHERE periode_tahun = 2025 AND periode_bulan = ? GROUP BY nomen_id
+            ''', (bulan,)).fetchall()
+            stored = db.execute('''
+                SELECT nomen_id, saldo_tunggakan FROM customer_series
+                WHERE periode_tahun = 2025 AND periode_bulan = ? AND saldo_tunggakan IS NOT NULL
+            ''', (bulan,)).fetchall()
+            assert sorted(map(tuple, stored)) == sorted(map(tuple, expected))
+
+
+def test_upload_runs_as_bounded_writer_jobs(app, monkeypatch):
+    app.config['UPLOAD_CHUNK_ROWS'] = 2
+    frame = pd.DataFrame({
+        'NOMEN': [f'6100000{i}' for i in range(5)],
+        'NAMA_PEL': [f'Pelanggan {i}' for i in range(5)],
+        'NOMINAL': [10000 * (i + 1) for i in range(5)],
+    })
+    with app.app_context():
+        version = current_data_version(get_db())
+        jobs = get_writer().stats['jobs']
+
+    response = _post(app, monkeypatch, 'mc', 7, 2025, frame)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['processing']['rows_inserted'] == 5
+
+    with app.app_context():
+        db = get_db()
+        # create stage + 3 chunk + swap (refresh + bump versi) + drop stage
+        assert get_writer().stats['jobs'] - jobs == 6
+        assert current_data_version(db) > version
+        rows = db.execute(
+            'SELECT nomen, target_mc FROM master_pelanggan WHERE periode_tahun = 2025 AND periode_bulan = 7'
+        ).fetchall()
+        assert sorted(map(tuple, rows)) == [(f'6100000{i}', 10000 * (i + 1)) for i in range(5)]
+        assert check_kpi_summary(db, [(2025, 7)]) == []
+        stages = run_write(lambda conn: conn.execute(
+            "SELECT name FROM temp.sqlite_master WHERE name LIKE 'upload_stage_%'"
+        ).fetchall())
+        assert stages == []
+
+
+def test_ardebt_reupload_replaces_bill_periodes(app, monkeypatch):
+    frame = pd.DataFrame({
+        'NOMEN': ['60000001', '60000002', '60000003'],
+        'PCEZ': ['340/01', '340/02', '341/01'],
+        'PERIODE_BILL': ['2025-04-01', '2025-05-01', '2025-05-01'],
+        'JUMLAH': [125000, 100000, 150000],
+    })
+
+    def _state():
+        with app.app_context():
+            db = get_db()
+            return [
+                (tuple(db.execute('''
+                    SELECT COUNT(*), SUM(saldo_tunggakan) FROM ardebt
+                    WHERE periode_tahun = 2025 AND periode_bulan = ?
+                ''', (bulan,)).fetchone()),
+                 db.execute('''
+                    SELECT total_tunggakan FROM kpi_periode WHERE periode_tahun = 2025 AND periode_bulan = ?
+                ''', (bulan,)).fetchone()[0])
+                for bulan in (4, 5)
+            ]
+
+    assert _post(app, monkeypatch, 'ardebt', 6, 2025, frame).status_code == 200
+    first = _state()
+    assert first[0][0] == (1, 125000) and first[1][0] == (2, 250000)
+
+    assert _post(app, monkeypatch, 'ardebt', 6, 2025, frame).status_code == 200
+    assert _state() == first
+
+
+def test_failed_refresh_rolls_back_swap(app, monkeypatch):
+    frame = pd.DataFrame({
+        'NOMEN': ['61000001', '61000002'],
+        'NAMA_PEL': ['Pelanggan 1', 'Pelanggan 2'],
+        'NOMINAL': [10000, 20000],
+    })
+    with app.app_context():
+        db = get_db()
+        version = current_data_version(db)
+        before = db.execute(
+            'SELECT COUNT(*) FROM master_pelanggan WHERE periode_tahun = 2025 AND periode_bulan = 6'
+        ).fetchone()[0]
+
+    def _fail(conn, bulan, tahun):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(upload, 'refresh_kpi_periode', _fail)
+    assert _post(app, monkeypatch, 'mc', 6, 2025, frame).status_code == 500
+
+    with app.app_context():
+        db = get_db()
+        assert current_data_version(db) == version
+        assert db.execute(
+            'SELECT COUNT(*) FROM master_pelanggan WHERE periode_tahun = 2025 AND periode_bulan = 6'
+        ).fetchone()[0] == before
+        assert check_kpi_summary(db, [(2025, 6)]) == []
@@ -0,0 +1,129 @@
+"""
+Write coordinator tests
+
+Mutasi dari banyak thread lewat satu writer: hasil di-commit dalam batch,
+job yang gagal tidak membatalkan job lain dalam batch yang sama. Penulis
+di luar coordinator (CLI) menahan batch lewat write_lock().
+"""
+
+import concurrent.futures
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask
+
+from api.analisa import register_analisa_routes
+from core.database import close_db, get_db, init_db
+from core.writer import WriteCoordinator, get_writer, write_lock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'sunter.db')
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = path
+    init_db(app)
+
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        INSERT INTO analisa_manual (id, nomen, jenis_anomali, status, created_at, updated_at)
+        VALUES (1, '60000001', 'zero', 'pending', '2025-01-01', '2025-01-01')
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _insert_comment(text):
+    def _job(conn):
+        return conn.execute('''
+            INSERT INTO analisa_comments (analisa_id, "user", comment, created_at)
+            VALUES (1, 'tester', ?, '2025-01-01')
+        ''', (text,)).lastrowid
+    return _job
+
+
+def test_group_commit_batches_queued_jobs(db_path):
+    writer = WriteCoordinator(db_path, batch_wait_ms=50)
+    futures = [writer.submit(_insert_comment(f'c{i}')) for i in range(20)]
+    ids = [f.result(5) for f in futures]
+    writer.stop()
+
+    assert sorted(ids) == list(range(1, 21))
+    assert writer.stats['jobs'] == 20
+    assert writer.stats['batches'] < 20
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM analisa_comments').fetchone()[0] == 20
+    conn.close()
+
+
+def test_failed_job_rolls_back_only_itself(db_path):
+    def _bad(conn):
+        _insert_comment('partial')(conn)
+        raise ValueError('boom')
+
+    writer = WriteCoordinator(db_path, batch_wait_ms=50)
+    ok_before = writer.submit(_insert_comment('before'))
+    bad = writer.submit(_bad)
+    ok_after = writer.submit(_insert_comment('after'))
+
+    assert ok_before.result(5) and ok_after.result(5)
+    with pytest.raises(ValueError):
+        bad.result(5)
+    writer.stop()
+
+    conn = sqlite3.connect(db_path)
+    comments = {r[0] for r in conn.execute('SELECT comment FROM analisa_comments')}
+    assert comments == {'before', 'after'}
+    conn.close()
+
+
+def test_write_lock_holds_writer_batches(db_path):
+    writer = WriteCoordinator(db_path)
+    with write_lock(db_path):
+        future = writer.submit(_insert_comment('waiting'))
+        with pytest.raises(concurrent.futures.TimeoutError):
+            future.result(0.3)
+    assert future.result(5)
+    writer.stop()
+
+
+def test_concurrent_analisa_writes(db_path):
+    app = Flask(__name__)
+    app.config['DATABASE_PATH'] = db_path
+    app.teardown_appcontext(close_db)
+    register_analisa_routes(app, get_db)
+
+    client = app.test_client()
+    created = client.post('/api/analisa/create', json={'nomen': '60000001', 'jenis_anomali': 'zero'})
+    analisa_id = created.get_json()['id']
+
+    errors = []
+
+    def _worker(n):
+        local = app.test_client()
+        for i in range(10):
+            response = local.post(f'/api/analisa/{analisa_id}/comments/add',
+                                  json={'user': f'u{n}', 'comment': f'{n}-{i}'})
+            if response.status_code != 200:
+                errors.append(response.get_json())
+
+    threads = [threading.Thread(target=_worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM analisa_comments WHERE analisa_id = ?',
+                        (analisa_id,)).fetchone()[0] == 80
+    # 1 activity 'created' + 80 'commented'
+    assert conn.execute('SELECT COUNT(*) FROM analisa_activity WHERE analisa_id = ?',
+                        (analisa_id,)).fetchone()[0] == 81
+    conn.close()
+
+    with app.app_context():
+        assert get_writer().stats['jobs'] == 81